@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Piloto automático de Birds & Planes
+===================================
+Un bot que juega leyendo el estado de la simulación. Como los aviones
+vuelan a velocidad constante, la posición de cada uno en cualquier
+instante futuro es `x + velocity * t`: con eso se arma una grilla de
+ocupación (tiempo, fila, columna) alrededor del pájaro y se busca la ruta
+sin choques que llegue antes a la META, avanzando en el tiempo en anchura
+(programación dinámica sobre las celdas alcanzables).
+
+Cada decisión se mantiene `hold_ticks` pasos, lo que tarda el pájaro en
+recorrer una celda, y se vuelve a planificar desde la posición real. El
+tamaño de las celdas sale de la regla de movimiento de la simulación
+(`SimBird.next_position`): con `birdSpeed / tickRate` terminado en .5 el
+pájaro avanza un píxel más por paso hacia la derecha y abajo que hacia la
+izquierda y arriba, así que cada sentido tiene su ancho de celda. Los
+aviones que aparezcan después de planificar no se conocen: por eso el
+pájaro se mantiene lejos de los bordes de entrada (`edge_margin`) y el
+plan se rehace varias veces por segundo.
+
+Uso:
+    pilot = Autopilot(sim)
+    sim.step(dt, pilot.inputs())          # bits INPUT_*, como keys_to_input
+
+    python autopilot.py --games 20        # supervivencia y ms por plan
+"""
+
+import argparse
+import math
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from simulation import (
+    Simulation, load_config,
+    INPUT_UP, INPUT_DOWN, INPUT_LEFT, INPUT_RIGHT,
+)
+
+# Desplazamientos (fila, columna) del predecesor al reconstruir la ruta,
+# en orden de preferencia. Las filas crecen hacia arriba.
+_PREDECESSORS = [(-1, 0), (0, 0), (-1, -1), (-1, 1), (0, -1), (0, 1),
+                 (1, 0), (1, -1), (1, 1)]
+
+
+def _dilate(cells: np.ndarray) -> np.ndarray:
+    """Celdas alcanzables en un paso (las 8 vecinas y quedarse)."""
+    row = cells.copy()
+    row[:, 1:] |= cells[:, :-1]
+    row[:, :-1] |= cells[:, 1:]
+    out = row.copy()
+    out[1:] |= row[:-1]
+    out[:-1] |= row[1:]
+    return out
+
+
+class Autopilot:
+    """
+    Planificador para una `Simulation`. `inputs()` se llama antes de cada
+    `sim.step` y retorna los bits de entrada del paso.
+
+    - `horizon`: segundos que mira hacia adelante.
+    - `hold_ticks`: pasos que dura cada movimiento (una celda de la grilla).
+    - `margin`: píxeles de holgura alrededor de cada avión.
+    - `edge_margin`: distancia mínima a los bordes de la pantalla, por
+      donde entran aviones que el plan todavía no ve.
+    """
+
+    def __init__(self, sim: Simulation, horizon: float = 4.0, hold_ticks: int = 6,
+                 margin: int = 4, edge_margin: int = 160):
+        self.sim = sim
+        self.dt = 1.0 / sim.config['tickRate']
+        bird = sim.bird
+        self.hold_ticks = hold_ticks
+        # Píxeles por paso en cada sentido, medidos con la regla de
+        # SimBird desde el centro de la pantalla (lejos de los topes)
+        x0, y0 = sim.width // 2, sim.height // 2
+        self.step_left = x0 - self._next_position(x0, y0, INPUT_LEFT)[0]
+        self.step_right = self._next_position(x0, y0, INPUT_RIGHT)[0] - x0
+        self.step_up = y0 - self._next_position(x0, y0, INPUT_UP)[1]
+        self.step_down = self._next_position(x0, y0, INPUT_DOWN)[1] - y0
+        self.steps = max(1, round(horizon / (hold_ticks * self.dt)))
+        self.margin = margin
+        self.edge_margin = edge_margin
+
+        self.goal_y = sim.finish_zone_y + sim.finish_zone_height
+        self.max_y = min(sim.height - bird.height, sim.height - sim.safe_zone_height)
+        self.max_x = sim.width - bird.width
+
+        self.current = 0
+        self._remaining = 0
+        self._expected: Optional[Tuple[int, int]] = None
+        self.last_plan_time = 0.0
+        self.plans = 0
+
+    def inputs(self) -> int:
+        """
+        Bits de entrada para el próximo paso: sigue el movimiento en curso
+        mientras el pájaro esté donde el plan esperaba, y si no (o si el
+        movimiento terminó) planifica de nuevo.
+        """
+        bird = self.sim.bird
+        if self._remaining > 0 and (bird.x, bird.y) == self._expected:
+            self._remaining -= 1
+        else:
+            self.current = self.plan()
+            self._remaining = self.hold_ticks - 1
+        self._expected = self._next_position(bird.x, bird.y, self.current)
+        return self.current
+
+    def _next_position(self, x: int, y: int, inputs: int) -> Tuple[int, int]:
+        sim = self.sim
+        return sim.bird.next_position(x, y, self.dt, inputs, sim.width, sim.height,
+                                      sim.safe_zone_height)
+
+    # ------------------------------------------------------------------
+    # Planificación
+    # ------------------------------------------------------------------
+
+    def _grid(self) -> Tuple[np.ndarray, np.ndarray, int, int]:
+        """
+        Coordenadas (x, y) del pájaro en cada columna y fila de la grilla,
+        que tiene su origen en la posición actual. Retorna también los
+        índices de la columna y fila actuales.
+
+        Las celdas a cada lado del origen miden lo que avanza el pájaro en
+        `hold_ticks` pasos en ese sentido, así que las rutas en línea recta
+        (y el primer movimiento, el único que se ejecuta antes de volver a
+        planificar) caen exactas; si los sentidos difieren, una ruta que
+        vuelve sobre sus pasos queda aproximada en unos píxeles.
+        """
+        bird = self.sim.bird
+        hold = self.hold_ticks
+        left, right = self.step_left * hold, self.step_right * hold
+        up_cell, down_cell = self.step_up * hold, self.step_down * hold
+
+        lo = min(self.edge_margin, bird.x)
+        hi = max(self.max_x - self.edge_margin, bird.x)
+        left_cols = (bird.x - lo) // left
+        right_cols = (hi - bird.x) // right
+        xs = np.concatenate([bird.x - left * np.arange(left_cols, 0, -1),
+                             bird.x + right * np.arange(right_cols + 1)])
+
+        # Filas hacia arriba hasta la primera que ya está en la META
+        up = max(1, math.ceil((bird.y - self.goal_y) / up_cell))
+        down = max(0, (self.max_y - bird.y) // down_cell)
+        ys = np.concatenate([bird.y + down_cell * np.arange(down, 0, -1),
+                             bird.y - up_cell * np.arange(up + 1)])
+        return xs, ys, left_cols, down
+
+    def _safe_cells(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+        (pasos, filas, columnas): True donde el pájaro no choca con ningún
+        avión conocido durante todo el intervalo [t, t+1]. Cada avión se
+        barre entre sus posiciones al inicio y al final del intervalo, con
+        los rectángulos reducidos de `Simulation._check_collisions`.
+        """
+        sim = self.sim
+        store = sim.planes
+        bird = sim.bird
+        m = self.margin
+        shape = (self.steps, len(ys), len(xs))
+
+        lanes = sim.lanes_near(int(ys.min()) + 5, int(ys.max()) + bird.height - 5)
+        if not lanes or store.count == 0:
+            return np.ones(shape, dtype=bool)
+        lane_idx, slots = np.nonzero(store.alive[lanes.start:lanes.stop])
+        if lane_idx.size == 0:
+            return np.ones(shape, dtype=bool)
+        lane_idx += lanes.start
+
+        x = store.x[lane_idx, slots]
+        velocity = store.velocity[lane_idx, slots]
+        width = store.width[lane_idx, slots]
+        top = store.top[lane_idx, slots]
+        height = store.height[lane_idx, slots]
+
+        times = np.arange(self.steps + 1) * (self.hold_ticks * self.dt)
+        left = x + velocity * times[:, None]
+        swept_lo = np.minimum(left[:-1], left[1:])
+        swept_hi = np.maximum(left[:-1], left[1:])
+
+        # Pájaro reducido: [x + 5, x + width - 5); avión: [left + 2, left + w - 3)
+        x_min = swept_lo + 2 - m - (bird.width - 5)
+        x_max = swept_hi + width - 3 + m - 5
+        hit_x = (x_min[:, :, None] < xs) & (xs < x_max[:, :, None])
+        y_min = top + 2 - m - (bird.height - 5)
+        y_max = top + height - 3 + m - 5
+        hit_y = (y_min[:, None] < ys) & (ys < y_max[:, None])
+
+        hits = np.matmul(hit_y.T.astype(np.float32), hit_x.astype(np.float32))
+        return hits == 0
+
+    def plan(self) -> int:
+        """
+        Busca la ruta más corta a la META dentro del horizonte y retorna el
+        primer movimiento. Si no hay ninguna, se acerca lo más posible sin
+        chocar durante el mayor tiempo posible.
+        """
+        start = time.perf_counter()
+        xs, ys, col0, row0 = self._grid()
+        safe = self._safe_cells(xs, ys)
+        goal_row = len(ys) - 1
+
+        reach = np.zeros((len(ys), len(xs)), dtype=bool)
+        reach[row0, col0] = True
+        # Celdas desde donde se puede partir en cada paso (la inicial, siempre)
+        sources: List[np.ndarray] = [reach]
+        arrived = False
+        for t in range(self.steps):
+            reach = _dilate(sources[t]) & safe[t]
+            if not reach.any():
+                break
+            if reach[goal_row].any():
+                arrived = True
+                sources.append(reach)
+                break
+            if t + 1 < self.steps:
+                sources.append(reach & safe[t + 1])
+                if not sources[-1].any():
+                    sources[-1] = reach
+                    break
+            else:
+                sources.append(reach)
+
+        target = self._choose_target(sources[-1], xs, goal_row if arrived else None)
+        move = self._first_move(sources, target)
+
+        self.last_plan_time = time.perf_counter() - start
+        self.plans += 1
+        return move
+
+    def _choose_target(self, cells: np.ndarray, xs: np.ndarray,
+                       goal_row: Optional[int]) -> Tuple[int, int]:
+        """La fila más alta alcanzada (o la de la META) y, en ella, la columna más central."""
+        if goal_row is None:
+            goal_row = int(np.flatnonzero(cells.any(axis=1))[-1])
+        row = goal_row
+        cols = np.flatnonzero(cells[row])
+        center = self.max_x / 2
+        col = int(cols[np.argmin(np.abs(xs[cols] - center))])
+        return row, col
+
+    def _first_move(self, sources: List[np.ndarray], target: Tuple[int, int]) -> int:
+        """Reconstruye la ruta hacia atrás hasta el paso 1 y la traduce a bits."""
+        row, col = target
+        rows, cols = sources[0].shape
+        for t in range(len(sources) - 1, 1, -1):
+            previous = sources[t - 1]
+            for dr, dc in _PREDECESSORS:
+                r, c = row + dr, col + dc
+                if 0 <= r < rows and 0 <= c < cols and previous[r, c]:
+                    row, col = r, c
+                    break
+        start_row, start_col = np.argwhere(sources[0])[0]
+        inputs = 0
+        if row > start_row:
+            inputs |= INPUT_UP
+        elif row < start_row:
+            inputs |= INPUT_DOWN
+        if col > start_col:
+            inputs |= INPUT_RIGHT
+        elif col < start_col:
+            inputs |= INPUT_LEFT
+        return inputs
+
+
+def main(argv: Optional[List[str]] = None):
+    """Juega partidas con el piloto y mide supervivencia, puntaje y costo por plan."""
+    parser = argparse.ArgumentParser(description="Piloto automático de Birds & Planes")
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-seconds', type=float, default=300.0,
+                        help="tope de duración de cada partida")
+    args = parser.parse_args(argv)
+
+    config = load_config()
+    dt = 1.0 / config['tickRate']
+    max_ticks = int(args.max_seconds / dt)
+    plan_times = []
+    for game in range(args.games):
+        sim = Simulation(config, seed=args.seed + game)
+        pilot = Autopilot(sim)
+        tick = 0
+        while tick < max_ticks and not sim.game_over:
+            plans = pilot.plans
+            sim.step(dt, pilot.inputs())
+            if pilot.plans != plans:
+                plan_times.append(pilot.last_plan_time)
+            tick += 1
+        print(f"Partida {game}: {sim.game_time:6.1f} s  {sim.score:6d} puntos  "
+              f"{config['lives'] - sim.lives} choques")
+
+    ms = np.array(plan_times) * 1000
+    print(f"{len(ms)} planes: p50 {np.percentile(ms, 50):.2f} ms  "
+          f"p99 {np.percentile(ms, 99):.2f} ms  máx {ms.max():.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
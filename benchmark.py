@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Benchmarks de Birds & Planes
+============================
+Mide los componentes del game loop con el driver de video "dummy" de SDL,
+sin ventana ni audio, sobre una grilla de parámetros (numLanes, spawnRate
+y tamaño de pantalla).
+
+Uso:
+    python benchmark.py                             # grilla por defecto
+    python benchmark.py --output base.json          # guardar resultados
+    python benchmark.py --compare base.json         # comparar contra base
+    python benchmark.py --lanes 5 --spawn 1 --screens 800x600 --quick
+
+Antes de cada tanda la simulación vuelve al mismo estado (varios
+componentes, como `lanes.update`, la modifican al medirse), así que todas
+las tandas y todas las corridas miden la misma secuencia de estados.
+
+Cada tanda va seguida de una tanda de una carga de referencia fija
+(Python, NumPy y una superficie de Pygame, sin código del juego). Con
+--compare se marca como regresión todo componente cuyo tiempo relativo a
+esa referencia (el mínimo de las tandas) sea más de --threshold más lento
+que en la base (por defecto 25%, o 50% con --quick), y el script termina
+con código 1. La referencia descuenta buena parte de los cambios de
+velocidad de la máquina entre corridas (frecuencia de la CPU, otros
+procesos), pero no todos: en una máquina virtual compartida conviene
+repetir la comparación antes de creer en una regresión, y generar la base
+y la comparación en la misma máquina.
+"""
+
+import os
+
+# Sin ventana ni audio: debe fijarse antes de importar pygame
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+import timeit
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pygame
+
+from autopilot import Autopilot
+from main import GameScene
+from simulation import load_config
+
+SEED = 1234
+WARMUP_TICKS = 600      # 10 s de juego: los carriles ya están poblados
+
+DEFAULT_LANES = [3, 5, 8]
+DEFAULT_SPAWN_RATES = [1.0, 3.0]
+DEFAULT_SCREENS = ['800x600', '1280x720']
+
+
+def parse_screen(text: str) -> Tuple[int, int]:
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def make_scene(num_lanes: int, spawn_rate: float,
+               screen_size: Tuple[int, int]) -> GameScene:
+    """Escena en juego, con los carriles poblados y el pájaro en un carril."""
+    config = load_config()
+    config.update({
+        'numLanes': num_lanes,
+        'spawnRate': spawn_rate,
+        'screenWidth': screen_size[0],
+        'screenHeight': screen_size[1],
+        'soundEnabled': False,
+        'recordReplays': False,
+        'dirtyRects': False,
+    })
+    screen = pygame.display.set_mode(screen_size)
+    game = GameScene(screen, config, seed=SEED)
+    game._reset_game()
+    game.state = GameScene.STATE_PLAYING
+
+    sim = game.sim
+    sim.fast_forward(WARMUP_TICKS / config['tickRate'])
+
+    # Pájaro quieto en el carril del medio: colisiones y cruce de carril
+    # recorren el mismo camino que en una partida
+    lane = sim.lanes[len(sim.lanes) // 2]
+    sim.bird.y = sim.bird.prev_y = lane.y - sim.bird.height // 2
+    game.bird.update(0)
+    return game
+
+
+def component_benchmarks(game: GameScene) -> Dict[str, Callable[[], object]]:
+    """Componentes a medir, por nombre."""
+    sim = game.sim
+    ui = game.ui
+    dt = 1.0 / game.config['tickRate']
+    pilot = Autopilot(sim)
+    return {
+        'lanes.update': lambda: sim._update_lanes(dt),
+        'sim.check_collisions': sim._check_collisions,
+        'sim.check_lane_cross': sim._check_lane_cross,
+        'autopilot.plan': pilot.plan,
+        'ui.draw_hud': lambda: ui.draw_hud(sim.score, sim.lives, game.highscore,
+                                           True, False),
+        'touch.draw': lambda: game.touch_controls.draw(game.screen),
+        'scene.draw': lambda: game.draw(1.0),
+    }
+
+
+def reference_workload() -> Callable[[], object]:
+    """Carga fija que no depende del código del juego, para calibrar la máquina."""
+    values = np.arange(4096, dtype=np.float64)
+    surface = pygame.Surface((64, 64))
+
+    def work():
+        total = 0
+        for i in range(300):
+            total += i * i
+        np.sqrt(values).sum()
+        surface.fill((i & 255, 0, 0))
+        return total
+    return work
+
+
+def state_restorer(game: GameScene) -> Callable[[], None]:
+    """Función que devuelve la simulación al estado que tiene ahora."""
+    sim = game.sim
+    state = sim.get_state()
+    return lambda: sim.set_state(state)
+
+
+def _calibrate(timer: timeit.Timer, min_time: float) -> int:
+    """Llamadas por tanda para que una tanda dure al menos `min_time` segundos."""
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    return number
+
+
+def time_call(fn: Callable[[], object], repeat: int, min_time: float,
+              reset: Callable[[], None] = lambda: None,
+              reference: Optional[Callable[[], object]] = None) -> Dict[str, float]:
+    """
+    Tiempo por llamada en µs: mejor y mediana de `repeat` tandas, cada una
+    de al menos `min_time` segundos. `reset` se llama (sin medirlo) antes
+    de cada tanda. Con `reference`, cada tanda va seguida de una tanda de
+    la carga de referencia, y `relative` es el mínimo de los cocientes
+    entre ambas: tandas vecinas ven la máquina a la misma velocidad.
+    """
+    timer = timeit.Timer(fn, setup=reset)
+    number = _calibrate(timer, min_time)
+    if reference is None:
+        runs = np.array(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+        return {'best_us': float(runs.min()), 'median_us': float(np.median(runs)),
+                'number': number}
+
+    reference_timer = timeit.Timer(reference)
+    reference_number = _calibrate(reference_timer, min_time)
+    runs = np.empty(repeat)
+    reference_runs = np.empty(repeat)
+    for i in range(repeat):
+        runs[i] = timer.timeit(number) / number * 1e6
+        reference_runs[i] = reference_timer.timeit(reference_number) / reference_number * 1e6
+    return {'best_us': float(runs.min()), 'median_us': float(np.median(runs)),
+            'number': number, 'reference_us': float(reference_runs.min()),
+            'relative': float((runs / reference_runs).min())}
+
+
+def run_grid(lanes: List[int], spawn_rates: List[float], screens: List[str],
+             repeat: int, min_time: float) -> List[Dict]:
+    """Mide cada componente en cada punto de la grilla."""
+    reference = reference_workload()
+    results = []
+    for num_lanes, spawn_rate, screen in itertools.product(lanes, spawn_rates, screens):
+        params = {'numLanes': num_lanes, 'spawnRate': spawn_rate, 'screen': screen}
+        game = make_scene(num_lanes, spawn_rate, parse_screen(screen))
+        reset = state_restorer(game)
+        for name, fn in component_benchmarks(game).items():
+            timing = time_call(fn, repeat, min_time, reset, reference)
+            results.append({'bench': name, 'params': params, **timing})
+            print(f"{name:<22} {format_params(params):<34} "
+                  f"{timing['median_us']:10.2f} µs  (mejor {timing['best_us']:.2f})")
+    return results
+
+
+def format_params(params: Dict) -> str:
+    return (f"lanes={params['numLanes']} spawn={params['spawnRate']:g} "
+            f"{params['screen']}")
+
+
+def result_key(result: Dict) -> Tuple:
+    params = result['params']
+    return (result['bench'], params['numLanes'], float(params['spawnRate']),
+            params['screen'])
+
+
+def compare(results: List[Dict], baseline: List[Dict],
+            threshold: float) -> int:
+    """
+    Compara el mejor tiempo contra la base, en unidades de la carga de
+    referencia medida junto a cada componente. Imprime cada cambio mayor
+    que el umbral y retorna la cantidad de regresiones.
+    """
+    base = {result_key(r): r for r in baseline}
+    regressions = 0
+    print()
+    print(f"Comparación contra la base (umbral {threshold:.0%}):")
+    for result in results:
+        old = base.get(result_key(result))
+        if old is None:
+            continue
+        if 'relative' in old:
+            ratio = result['relative'] / old['relative']
+        else:
+            ratio = result['best_us'] / old['best_us']
+        if ratio > 1 + threshold:
+            status = "REGRESIÓN"
+            regressions += 1
+        elif ratio < 1 - threshold:
+            status = "mejora"
+        else:
+            continue
+        print(f"  {status:<10} {result['bench']:<22} {format_params(result['params']):<34} "
+              f"{old['best_us']:.2f} -> {result['best_us']:.2f} µs (x{ratio:.2f} relativo a la referencia)")
+    if not regressions:
+        print("  Sin regresiones.")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de Birds & Planes")
+    parser.add_argument('--lanes', default=','.join(map(str, DEFAULT_LANES)),
+                        help="valores de numLanes, separados por comas")
+    parser.add_argument('--spawn', default=','.join(map(str, DEFAULT_SPAWN_RATES)),
+                        help="valores de spawnRate, separados por comas")
+    parser.add_argument('--screens', default=','.join(DEFAULT_SCREENS),
+                        help="tamaños de pantalla (ANCHOxALTO), separados por comas")
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="tandas por componente")
+    parser.add_argument('--min-time', type=float, default=0.02,
+                        help="duración mínima de cada tanda, en segundos")
+    parser.add_argument('--quick', action='store_true',
+                        help="menos tandas y más cortas (para probar rápido)")
+    parser.add_argument('--output', help="guardar los resultados en este JSON")
+    parser.add_argument('--compare', help="JSON base contra el cual comparar")
+    parser.add_argument('--threshold', type=float, default=None,
+                        help="fracción de enlentecimiento que cuenta como regresión "
+                             "(por defecto 0.25, o 0.6 con --quick)")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.repeat, args.min_time = 5, 0.005
+    if args.threshold is None:
+        args.threshold = 0.5 if args.quick else 0.25
+
+    pygame.init()
+    start = time.perf_counter()
+    results = run_grid([int(v) for v in args.lanes.split(',')],
+                       [float(v) for v in args.spawn.split(',')],
+                       args.screens.split(','),
+                       args.repeat, args.min_time)
+    print(f"\n{len(results)} mediciones en {time.perf_counter() - start:.1f} s")
+
+    report = {
+        'meta': {
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'min_time': args.min_time,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Resultados guardados en {args.output}")
+
+    regressions = 0
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+
+    pygame.quit()
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
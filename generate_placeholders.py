@@ -6,28 +6,60 @@ Script para generar sprites placeholder en formato PNG para Birds & Planes.
 Ejecutar este script antes de correr el juego si no tienes los assets.
 
 Uso:
-    python generate_placeholders.py
+    python generate_placeholders.py [--force] [--workers N] [--sizes WxH,...]
 
 Genera:
     - assets/bird_1.png, bird_2.png, bird_3.png (animación del pájaro)
     - assets/plane_small.png, plane_med.png, plane_large.png (aviones)
     - assets/background.png (fondo con montañas y ciudad)
+    - assets/background_ANCHOxALTO.png para cada tamaño de --sizes (el
+      juego lo usa en lugar de escalar background.png)
+    - assets/atlas.png + assets/atlas.json (sprites del pájaro y de los
+      aviones, ya escalados y en ambas direcciones, en una sola imagen)
+
+El atlas se arma a partir de los PNG de assets/, así que también empaqueta
+sprites propios que reemplacen a los placeholder. Para regenerar sólo el
+atlas:
+
+    python generate_placeholders.py --atlas
+
+Las imágenes se generan con NumPy, en paralelo, y sólo si cambió algo: en
+assets/.build_cache.json se guarda el hash de lo que produjo cada archivo
+(este script y sus parámetros) y el del archivo resultante. Si ambos
+coinciden, el archivo se omite. --force regenera todo.
 """
 
+import argparse
+import hashlib
+import json
 import os
 import struct
+import time
 import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from simulation import BIRD_SIZE, PLANE_SIZES, PLANE_TYPES
+
+ATLAS_IMAGE = 'atlas.png'
+ATLAS_MANIFEST = 'atlas.json'
+ATLAS_WIDTH = 256
+ATLAS_PADDING = 1
+
+BUILD_CACHE = '.build_cache.json'
+
 
 def create_png(width, height, pixels):
     """
-    Crea un archivo PNG desde una lista de píxeles RGBA.
-    pixels: lista de tuplas (r, g, b, a) de tamaño width * height
+    Crea un archivo PNG desde un arreglo RGBA.
+    pixels: arreglo uint8 de forma (height, width, 4)
     """
     def make_chunk(chunk_type, data):
         chunk_len = struct.pack('>I', len(data))
         chunk_crc = struct.pack('>I', zlib.crc32(chunk_type + data) & 0xffffffff)
         return chunk_len + chunk_type + data + chunk_crc
-
+    
     # PNG signature
     signature = b'\x89PNG\r\n\x1a\n'
     
@@ -35,16 +67,12 @@ def create_png(width, height, pixels):
     ihdr_data = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
     ihdr = make_chunk(b'IHDR', ihdr_data)
     
-    # IDAT chunk (imagen comprimida)
-    raw_data = b''
-    for y in range(height):
-        raw_data += b'\x00'  # Filter byte
-        for x in range(width):
-            idx = y * width + x
-            r, g, b, a = pixels[idx]
-            raw_data += bytes([r, g, b, a])
+    # IDAT chunk (imagen comprimida): cada fila lleva delante su byte de
+    # filtro (0 = ninguno), así que se arma todo de una vez
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    raw[:, 1:] = pixels.reshape(height, width * 4)
     
-    compressed = zlib.compress(raw_data, 9)
+    compressed = zlib.compress(raw.tobytes(), 9)
     idat = make_chunk(b'IDAT', compressed)
     
     # IEND chunk
@@ -53,10 +81,15 @@ def create_png(width, height, pixels):
     return signature + ihdr + idat + iend
 
 
+def _blank(width, height):
+    """Imagen RGBA transparente."""
+    return np.zeros((height, width, 4), dtype=np.uint8)
+
+
 def create_bird_frame(frame_num):
     """Crea un frame del pájaro (32x32 píxeles)."""
     width, height = 32, 32
-    pixels = [(0, 0, 0, 0)] * (width * height)  # Transparente
+    pixels = _blank(width, height)
     
     # Colores del pájaro
     body_color = (255, 200, 50, 255)      # Amarillo
@@ -65,30 +98,19 @@ def create_bird_frame(frame_num):
     beak_color = (255, 100, 0, 255)       # Naranja oscuro
     
     # Cuerpo (círculo central)
-    for y in range(10, 24):
-        for x in range(8, 24):
-            dx = x - 16
-            dy = y - 17
-            if dx*dx + dy*dy <= 49:  # Radio ~7
-                pixels[y * width + x] = body_color
+    ys, xs = np.mgrid[10:24, 8:24]
+    body = (xs - 16) ** 2 + (ys - 17) ** 2 <= 49  # Radio ~7
+    pixels[10:24, 8:24][body] = body_color
     
     # Ala (posición varía según frame para animación)
     wing_offset = [0, -2, 0][frame_num]
-    for y in range(12 + wing_offset, 18 + wing_offset):
-        for x in range(4, 12):
-            if y >= 0 and y < height:
-                pixels[y * width + x] = wing_color
+    pixels[max(0, 12 + wing_offset):18 + wing_offset, 4:12] = wing_color
     
     # Ojo
-    pixels[14 * width + 20] = eye_color
-    pixels[14 * width + 21] = eye_color
-    pixels[15 * width + 20] = eye_color
-    pixels[15 * width + 21] = eye_color
+    pixels[14:16, 20:22] = eye_color
     
     # Pico
-    for y in range(16, 19):
-        for x in range(24, 28):
-            pixels[y * width + x] = beak_color
+    pixels[16:19, 24:28] = beak_color
     
     return width, height, pixels
 
@@ -101,7 +123,7 @@ def create_plane(size_type):
         'large': (80, 40)
     }
     width, height = sizes[size_type]
-    pixels = [(0, 0, 0, 0)] * (width * height)
+    pixels = _blank(width, height)
     
     # Colores del avión
     body_colors = {
@@ -116,134 +138,319 @@ def create_plane(size_type):
     # Fuselaje (cuerpo principal)
     body_y_start = height // 3
     body_y_end = height * 2 // 3
-    for y in range(body_y_start, body_y_end):
-        for x in range(width // 6, width - width // 8):
-            pixels[y * width + x] = body_color
+    pixels[body_y_start:body_y_end, width // 6:width - width // 8] = body_color
     
     # Cabina (punta)
-    for y in range(body_y_start, body_y_end):
-        for x in range(width - width // 8, width - 2):
-            pixels[y * width + x] = window_color
+    pixels[body_y_start:body_y_end, width - width // 8:width - 2] = window_color
     
     # Alas
     wing_y = height // 2
-    for y in range(wing_y - height // 4, wing_y + height // 4):
-        for x in range(width // 3, width // 2):
-            if y >= 0 and y < height:
-                pixels[y * width + x] = wing_color
+    pixels[max(0, wing_y - height // 4):wing_y + height // 4,
+           width // 3:width // 2] = wing_color
     
     # Cola
-    for y in range(height // 6, body_y_start + 2):
-        for x in range(0, width // 5):
-            if y >= 0 and y < height:
-                pixels[y * width + x] = wing_color
+    pixels[max(0, height // 6):body_y_start + 2, 0:width // 5] = wing_color
     
     return width, height, pixels
 
 
-def create_background():
-    """Crea el fondo con cielo, montañas y ciudad (800x600)."""
-    width, height = 800, 600
-    pixels = []
-    
+def create_background(width=800, height=600):
+    """Crea el fondo con cielo, montañas y ciudad (800x600 por defecto)."""
     # Colores
-    sky_top = (135, 206, 250)       # Azul cielo claro
-    sky_bottom = (200, 230, 255)    # Azul más claro
+    sky_top = np.array((135, 206, 250), dtype=np.float64)       # Azul cielo claro
+    sky_bottom = np.array((200, 230, 255), dtype=np.float64)    # Azul más claro
     mountain_color = (100, 120, 140) # Gris azulado
     mountain_snow = (230, 240, 250)  # Blanco nieve
     city_color = (60, 60, 80)        # Gris oscuro ciudad
     window_color = (255, 255, 150)   # Amarillo ventanas
     
-    for y in range(height):
-        for x in range(width):
-            # Gradiente de cielo
-            t = y / height
-            r = int(sky_top[0] * (1-t) + sky_bottom[0] * t)
-            g = int(sky_top[1] * (1-t) + sky_bottom[1] * t)
-            b = int(sky_top[2] * (1-t) + sky_bottom[2] * t)
-            
-            # Montañas (en la parte inferior)
-            mountain_height = 150
-            mountain_base = height - 100
-            if y > mountain_base - mountain_height:
-                # Simular montañas con triángulos
-                peak1 = abs((x % 200) - 100) * 1.5
-                peak2 = abs(((x + 80) % 150) - 75) * 1.8
-                mountain_line = mountain_base - max(peak1, peak2)
-                
-                if y > mountain_line:
-                    if y < mountain_line + 20:
-                        r, g, b = mountain_snow
-                    else:
-                        r, g, b = mountain_color
-            
-            # Ciudad (edificios en primer plano)
-            city_base = height - 80
-            if y > city_base:
-                # Edificios con alturas variables
-                building_width = 40 + (x // 50) % 30
-                building_height = 50 + (hash(x // 40) % 60)
-                building_top = height - building_height
-                
-                if y > building_top:
-                    # Es parte de un edificio
-                    r, g, b = city_color
-                    
-                    # Ventanas
-                    local_x = x % 40
-                    local_y = (y - building_top) % 20
-                    if 5 < local_x < 15 and 5 < local_y < 12:
-                        if hash((x // 40, y // 20)) % 3 != 0:  # Algunas apagadas
-                            r, g, b = window_color
-                    elif 25 < local_x < 35 and 5 < local_y < 12:
-                        if hash((x // 40 + 1, y // 20)) % 3 != 0:
-                            r, g, b = window_color
-            
-            pixels.append((r, g, b, 255))
+    ys = np.arange(height)[:, None]
+    xs = np.arange(width)[None, :]
+    
+    # Gradiente de cielo (una fila por y, repetida a lo ancho)
+    t = (np.arange(height) / height)[:, None]
+    sky = (sky_top * (1 - t) + sky_bottom * t).astype(np.uint8)
+    rgb = np.repeat(sky[:, None, :], width, axis=1)
+    
+    # Montañas (en la parte inferior), simuladas con triángulos
+    mountain_height = 150
+    mountain_base = height - 100
+    peak1 = np.abs((xs % 200) - 100) * 1.5
+    peak2 = np.abs(((xs + 80) % 150) - 75) * 1.8
+    mountain_line = mountain_base - np.maximum(peak1, peak2)
+    mountain = (ys > mountain_base - mountain_height) & (ys > mountain_line)
+    snow = mountain & (ys < mountain_line + 20)
+    rgb[mountain & ~snow] = mountain_color
+    rgb[snow] = mountain_snow
+    
+    # Ciudad (edificios en primer plano) con alturas variables. Los hashes
+    # de enteros y tuplas de enteros son estables, así que se tabulan una
+    # vez por edificio / fila de ventanas
+    city_base = height - 80
+    columns = np.arange(width // 40 + 2)
+    rows = np.arange(height // 20 + 1)
+    building_heights = np.array([50 + hash(int(c)) % 60 for c in columns])
+    lights = np.array([[hash((int(c), int(r))) % 3 != 0 for r in rows] for c in columns])
+    
+    column = xs // 40
+    building_top = height - building_heights[column]
+    building = (ys > city_base) & (ys > building_top)
+    rgb[building] = city_color
+    
+    # Ventanas (algunas apagadas)
+    local_x = xs % 40
+    local_y = (ys - building_top) % 20
+    window_row = (5 < local_y) & (local_y < 12)
+    left_window = (5 < local_x) & (local_x < 15) & window_row
+    right_window = (25 < local_x) & (local_x < 35) & window_row
+    row = ys // 20
+    lit = np.where(left_window, lights[column, row], right_window & lights[column + 1, row])
+    rgb[building & lit] = window_color
     
+    pixels = np.empty((height, width, 4), dtype=np.uint8)
+    pixels[..., :3] = rgb
+    pixels[..., 3] = 255
     return width, height, pixels
 
 
+# ============================================================================
+# CONSTRUCCIÓN INCREMENTAL
+# ============================================================================
+
+# Trabajos independientes: archivo de salida -> (generador, argumentos)
+GENERATORS = {
+    'bird': create_bird_frame,
+    'plane': create_plane,
+    'background': create_background,
+}
+
+JOBS = (
+    [(f'bird_{i+1}.png', 'bird', (i,)) for i in range(3)] +
+    [(f'plane_{size}.png', 'plane', (size,)) for size in ['small', 'med', 'large']] +
+    [('background.png', 'background', ())]
+)
+
+
+def background_jobs(sizes):
+    """Un fondo por tamaño extra, dibujado a esa resolución (sin escalar)."""
+    return [(f'background_{w}x{h}.png', 'background', (w, h)) for w, h in sizes]
+
+
+def parse_sizes(text):
+    """'1280x720,1920x1080' -> [(1280, 720), (1920, 1080)]"""
+    sizes = []
+    for item in text.split(','):
+        width, height = item.lower().split('x')
+        sizes.append((int(width), int(height)))
+    return sizes
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _file_hash(path):
+    """Hash del contenido de un archivo, o None si no existe."""
+    try:
+        with open(path, 'rb') as f:
+            return _sha256(f.read())
+    except OSError:
+        return None
+
+
+def _script_hash():
+    """Hash de este script: si cambia un generador, cambian sus salidas."""
+    with open(os.path.abspath(__file__), 'rb') as f:
+        return _sha256(f.read())
+
+
+def load_build_cache(assets_dir):
+    """Lee assets/.build_cache.json (vacío si no existe o está roto)."""
+    try:
+        with open(os.path.join(assets_dir, BUILD_CACHE), 'r') as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_build_cache(assets_dir, cache):
+    with open(os.path.join(assets_dir, BUILD_CACHE), 'w') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+
+
+def is_fresh(cache, assets_dir, filename, input_hash):
+    """True si el archivo existe, no fue tocado y salió de las mismas entradas."""
+    entry = cache.get(filename)
+    if not entry or entry.get('input') != input_hash:
+        return False
+    return _file_hash(os.path.join(assets_dir, filename)) == entry.get('output')
+
+
+def render_job(job):
+    """Genera un asset y retorna (archivo, PNG, ancho, alto). Corre en un worker."""
+    filename, generator, args = job
+    w, h, px = GENERATORS[generator](*args)
+    return filename, create_png(w, h, px), w, h
+
+
+def generate_assets(assets_dir='assets', force=False, workers=None, sizes=()):
+    """
+    Genera los assets que falten o estén desactualizados, en paralelo, más
+    un fondo por cada (ancho, alto) de `sizes`. Retorna la cantidad de
+    archivos escritos.
+    """
+    cache = load_build_cache(assets_dir)
+    script = _script_hash()
+    
+    pending = []
+    for job in list(JOBS) + background_jobs(sizes):
+        filename = job[0]
+        input_hash = _sha256(json.dumps([script, job[1], job[2]]).encode())
+        if not force and is_fresh(cache, assets_dir, filename, input_hash):
+            print(f"· Sin cambios: {assets_dir}/{filename}")
+            continue
+        pending.append((job, input_hash))
+    
+    if not pending:
+        return 0
+    
+    jobs = [job for job, _ in pending]
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            results = list(pool.map(render_job, jobs))
+    else:
+        results = [render_job(job) for job in jobs]
+    
+    for (filename, png_data, w, h), (_, input_hash) in zip(results, pending):
+        with open(os.path.join(assets_dir, filename), 'wb') as f:
+            f.write(png_data)
+        cache[filename] = {'input': input_hash, 'output': _sha256(png_data)}
+        print(f"✓ Creado: {assets_dir}/{filename} ({w}x{h} píxeles)")
+    
+    save_build_cache(assets_dir, cache)
+    return len(results)
+
+
+def pack_shelves(sizes, max_width=ATLAS_WIDTH, padding=ATLAS_PADDING):
+    """
+    Empaqueta rectángulos en estantes (filas) de ancho máximo `max_width`.
+    sizes: dict nombre -> (w, h). Retorna (posiciones, alto total), con
+    posiciones como dict nombre -> (x, y).
+    """
+    positions = {}
+    x = y = shelf_height = 0
+    # Los más altos primero: los estantes desperdician menos espacio
+    for name, (w, h) in sorted(sizes.items(), key=lambda item: (-item[1][1], item[0])):
+        if x and x + w > max_width:
+            y += shelf_height + padding
+            x = shelf_height = 0
+        positions[name] = (x, y)
+        x += w + padding
+        shelf_height = max(shelf_height, h)
+    return positions, y + shelf_height
+
+
+def build_atlas(assets_dir='assets', force=False):
+    """
+    Empaqueta los frames del pájaro y los aviones (en ambas direcciones),
+    escalados al tamaño del juego, en assets/atlas.png con su manifiesto
+    assets/atlas.json. Retorna False si no se pudo armar.
+    """
+    sources = [f'bird_{i}.png' for i in range(1, 4)]
+    sources += [f'plane_{plane_type}.png' for plane_type in PLANE_TYPES]
+    
+    # Se omite si los PNG de origen, los tamaños del juego y el script
+    # son los mismos que la última vez
+    cache = load_build_cache(assets_dir)
+    input_hash = _sha256(json.dumps([
+        _script_hash(), BIRD_SIZE, PLANE_SIZES,
+        [_file_hash(os.path.join(assets_dir, name)) for name in sources],
+    ], sort_keys=True).encode())
+    if (not force and is_fresh(cache, assets_dir, ATLAS_IMAGE, input_hash)
+            and is_fresh(cache, assets_dir, ATLAS_MANIFEST, input_hash)):
+        print(f"· Sin cambios: {assets_dir}/{ATLAS_IMAGE}")
+        return True
+    
+    try:
+        os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+        import pygame
+    except ImportError:
+        print("✗ pygame no está instalado: se omite el atlas")
+        return False
+    
+    sprites = {}
+    try:
+        for i in range(1, 4):
+            img = pygame.image.load(os.path.join(assets_dir, f'bird_{i}.png'))
+            sprites[f'bird_{i}'] = pygame.transform.scale(img, BIRD_SIZE)
+        for plane_type in PLANE_TYPES:
+            img = pygame.image.load(os.path.join(assets_dir, f'plane_{plane_type}.png'))
+            img = pygame.transform.scale(img, PLANE_SIZES[plane_type])
+            sprites[f'plane_{plane_type}'] = img
+            sprites[f'plane_{plane_type}_flip'] = pygame.transform.flip(img, True, False)
+    except (pygame.error, FileNotFoundError) as e:
+        print(f"✗ No se pudo armar el atlas: {e}")
+        return False
+    
+    positions, height = pack_shelves({name: img.get_size() for name, img in sprites.items()})
+    atlas = pygame.Surface((ATLAS_WIDTH, height), pygame.SRCALPHA)
+    manifest = {'version': 1, 'image': ATLAS_IMAGE, 'sprites': {}}
+    for name, img in sprites.items():
+        x, y = positions[name]
+        atlas.blit(img, (x, y))
+        manifest['sprites'][name] = [x, y, img.get_width(), img.get_height()]
+    
+    pygame.image.save(atlas, os.path.join(assets_dir, ATLAS_IMAGE))
+    with open(os.path.join(assets_dir, ATLAS_MANIFEST), 'w') as f:
+        json.dump(manifest, f, sort_keys=True)
+    
+    for name in (ATLAS_IMAGE, ATLAS_MANIFEST):
+        cache[name] = {'input': input_hash,
+                       'output': _file_hash(os.path.join(assets_dir, name))}
+    save_build_cache(assets_dir, cache)
+    
+    print(f"✓ Creado: {assets_dir}/{ATLAS_IMAGE} ({ATLAS_WIDTH}x{height} píxeles, "
+          f"{len(sprites)} sprites) + {ATLAS_MANIFEST}")
+    return True
+
+
 def main():
     """Genera todos los assets placeholder."""
+    parser = argparse.ArgumentParser(description="Genera los assets placeholder")
+    parser.add_argument('--atlas', action='store_true',
+                        help="sólo rearmar el atlas a partir de assets/")
+    parser.add_argument('--force', action='store_true',
+                        help="regenerar aunque nada haya cambiado")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="procesos para generar (por defecto, uno por CPU)")
+    parser.add_argument('--sizes', type=parse_sizes, default=[],
+                        help="fondos extra, ANCHOxALTO separados por comas "
+                             "(p. ej. 1280x720,1920x1080)")
+    args = parser.parse_args()
+    
     # Crear directorio assets si no existe
     os.makedirs('assets', exist_ok=True)
     
+    if args.atlas:
+        build_atlas(force=args.force)
+        return
+    
     print("Generando assets placeholder para Birds & Planes...")
     print("-" * 50)
     
-    # Generar frames del pájaro
-    for i in range(3):
-        w, h, px = create_bird_frame(i)
-        png_data = create_png(w, h, px)
-        filename = f'assets/bird_{i+1}.png'
-        with open(filename, 'wb') as f:
-            f.write(png_data)
-        print(f"✓ Creado: {filename} ({w}x{h} píxeles)")
-    
-    # Generar aviones
-    for size in ['small', 'med', 'large']:
-        w, h, px = create_plane(size)
-        png_data = create_png(w, h, px)
-        filename = f'assets/plane_{size}.png'
-        with open(filename, 'wb') as f:
-            f.write(png_data)
-        print(f"✓ Creado: {filename} ({w}x{h} píxeles)")
+    start = time.perf_counter()
+    generate_assets(force=args.force, workers=args.workers, sizes=args.sizes)
     
-    # Generar fondo
-    print("Generando fondo (puede tomar unos segundos)...")
-    w, h, px = create_background()
-    png_data = create_png(w, h, px)
-    filename = 'assets/background.png'
-    with open(filename, 'wb') as f:
-        f.write(png_data)
-    print(f"✓ Creado: {filename} ({w}x{h} píxeles)")
+    # Empaquetar sprites en el atlas
+    build_atlas(force=args.force)
+    elapsed = time.perf_counter() - start
     
     print("-" * 50)
-    print("¡Todos los assets generados exitosamente!")
+    print(f"¡Todos los assets generados exitosamente! ({elapsed * 1000:.0f} ms)")
     print("\nAhora puedes ejecutar el juego con: python main.py")
 
 
 if __name__ == '__main__':
     main()
-
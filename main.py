@@ -13,18 +13,40 @@ Controles:
 - M: Activar/Desactivar sonido
 - R: Reiniciar (en Game Over)
 - ESC: Salir al menú / Cerrar juego
+- F3: Mostrar/ocultar el perfil de tiempos por frame
+- F4: Guardar el perfil en profiles/*.csv
+- F5: Mostrar entidades vivas y diferencias de memoria (tracemalloc)
 
 Autor: Birds & Planes Team
 Licencia: MIT
 """
 
+import time
+
+# Inicio del proceso, para el reporte de arranque (--startup-report)
+PROCESS_START = time.perf_counter()
+
 import pygame
+import argparse
 import json
 import os
-import random
 import sys
 import asyncio
-from typing import List, Dict, Tuple, Optional
+import numpy as np
+from collections import OrderedDict
+from typing import List, Dict, Tuple, Optional, Iterator
+
+from simulation import (
+    Simulation, SimBird, FixedTimestep, config_hash, load_config,
+    INPUT_UP, INPUT_DOWN, INPUT_LEFT, INPUT_RIGHT, INPUT_ACTION,
+    EVENT_POINT, EVENT_COLLISION, EVENT_GAME_OVER,
+    BIRD_SIZE, PLANE_SIZES, PLANE_TYPES,
+)
+from autopilot import Autopilot
+from replay import ReplayRecorder
+from scores import RunRecord, ScoreWriter, load_highscore
+from profiler import FrameProfiler
+from telemetry import MemoryMonitor, format_counts
 
 # ============================================================================
 # CONSTANTES Y CONFIGURACIÓN
@@ -46,61 +68,34 @@ ORANGE = (255, 150, 50)
 LIGHT_BLUE = (100, 150, 255)
 
 
-def load_config() -> Dict:
+def square_wave(length: int, period: int, amplitude: int, decay: int) -> bytes:
     """
-    Carga la configuración desde config.json.
-    Si no existe, usa valores por defecto.
+    Onda cuadrada de 8 bits centrada en 128 que se apaga linealmente en
+    `decay` muestras. Se calcula de una vez con NumPy.
     """
-    config_path = os.path.join(BASE_DIR, 'config.json')
-    default_config = {
-        "numLanes": 5,
-        "lives": 3,
-        "pointsPerCross": 100,
-        "spawnRate": 1.0,
-        "planeSpeedRange": [150, 320],
-        "difficultyStepEveryXSeconds": 15,
-        "difficultySpeedMultiplier": 1.08,
-        "minSpawnDistancePx": 120,
-        "screenWidth": 800,
-        "screenHeight": 600,
-        "birdSpeed": 200,
-        "laneHeight": 80,
-        "soundEnabled": True
-    }
-    
-    try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            loaded = json.load(f)
-            for key, value in default_config.items():
-                if key not in loaded:
-                    loaded[key] = value
-            return loaded
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        print(f"Advertencia: No se pudo cargar config.json ({e}). Usando valores por defecto.")
-        return default_config
-
-
-def load_highscore() -> int:
-    """Carga el highscore desde highscore.json."""
-    highscore_path = os.path.join(BASE_DIR, 'highscore.json')
-    try:
-        with open(highscore_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return data.get('highscore', 0)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return 0
+    i = np.arange(length)
+    sign = np.where(i % period < period // 2, 1, -1)
+    envelope = np.maximum(0, 1 - i / decay)
+    return (128 + amplitude * sign * envelope).astype(np.uint8).tobytes()
 
 
-def save_highscore(score: int) -> bool:
-    """Guarda el highscore en highscore.json."""
-    highscore_path = os.path.join(BASE_DIR, 'highscore.json')
-    try:
-        with open(highscore_path, 'w', encoding='utf-8') as f:
-            json.dump({'highscore': score}, f, indent=2)
-        return True
-    except IOError as e:
-        print(f"Error al guardar highscore: {e}")
-        return False
+class StartupReport:
+    """Tiempos de cada etapa del arranque, medidos desde el inicio del proceso."""
+    
+    def __init__(self):
+        self.marks: List[Tuple[str, float]] = [('módulos', time.perf_counter())]
+    
+    def mark(self, label: str):
+        self.marks.append((label, time.perf_counter()))
+    
+    def summary(self) -> str:
+        lines = ["Arranque (ms desde el inicio del proceso):"]
+        prev = PROCESS_START
+        for label, t in self.marks:
+            lines.append(f"  {label:<22} {(t - PROCESS_START) * 1000:8.1f}"
+                         f"  (+{(t - prev) * 1000:.1f})")
+            prev = t
+        return "\n".join(lines)
 
 
 # ============================================================================
@@ -110,6 +105,8 @@ def save_highscore(score: int) -> bool:
 class TouchControls:
     """Controles táctiles virtuales para dispositivos móviles."""
     
+    SYMBOLS = {'up': '▲', 'down': '▼', 'left': '◄', 'right': '►'}
+    
     def __init__(self, screen_width: int, screen_height: int):
         self.screen_width = screen_width
         self.screen_height = screen_height
@@ -159,6 +156,10 @@ class TouchControls:
         
         # Touch activos
         self.active_touches = {}
+        
+        # Botones pre-renderizados por (nombre, pulsado, alpha)
+        self._button_cache: Dict[Tuple[str, bool, int], pygame.Surface] = {}
+        self._fonts: Optional[Tuple[pygame.font.Font, pygame.font.Font]] = None
     
     def handle_touch_down(self, pos: Tuple[int, int], touch_id: int = 0):
         """Maneja el inicio de un toque."""
@@ -211,58 +212,146 @@ class TouchControls:
         """Retorna True si el botón de acción fue presionado."""
         return self.pressing['action']
     
-    def draw(self, screen: pygame.Surface, alpha: int = 100):
-        """Dibuja los controles táctiles en pantalla."""
-        # Superficie semi-transparente
-        overlay = pygame.Surface((self.screen_width, self.screen_height), pygame.SRCALPHA)
+    def button_rects(self) -> Dict[str, pygame.Rect]:
+        """Rectángulo de cada botón, por nombre."""
+        return {
+            'up': self.btn_up, 'down': self.btn_down,
+            'left': self.btn_left, 'right': self.btn_right,
+            'action': self.btn_action,
+        }
+    
+    def _button_surface(self, name: str, pressed: bool,
+                        alpha: int) -> pygame.Surface:
+        """
+        Superficie pre-renderizada de un botón. Se cachea por estado
+        (pulsado/suelto) y alpha: el overlay sólo cambia al tocar.
+        """
+        key = (name, pressed, alpha)
+        surface = self._button_cache.get(key)
+        if surface is not None:
+            return surface
+        
+        if self._fonts is None:
+            self._fonts = (pygame.font.Font(None, 36), pygame.font.Font(None, 24))
+        symbol_font, action_font = self._fonts
         
         btn_color = (*LIGHT_BLUE, alpha)
         btn_pressed_color = (*GREEN, alpha + 50)
         text_color = (*WHITE, 200)
+        color = btn_pressed_color if pressed else btn_color
         
-        # Dibujar D-pad
-        buttons = [
-            (self.btn_up, 'up', '▲'),
-            (self.btn_down, 'down', '▼'),
-            (self.btn_left, 'left', '◄'),
-            (self.btn_right, 'right', '►'),
-        ]
-        
-        for rect, key, symbol in buttons:
-            color = btn_pressed_color if self.pressing[key] else btn_color
-            pygame.draw.rect(overlay, color, rect, border_radius=10)
-            pygame.draw.rect(overlay, (*WHITE, 150), rect, 2, border_radius=10)
-            
-            # Símbolo
-            font = pygame.font.Font(None, 36)
-            text = font.render(symbol, True, text_color)
-            text_rect = text.get_rect(center=rect.center)
-            overlay.blit(text, text_rect)
+        rect = self.button_rects()[name]
+        surface = pygame.Surface(rect.size, pygame.SRCALPHA)
+        local = surface.get_rect()
         
-        # Dibujar botón de acción
-        action_color = btn_pressed_color if self.pressing['action'] else btn_color
-        pygame.draw.circle(overlay, action_color, self.btn_action.center, self.btn_size)
-        pygame.draw.circle(overlay, (*WHITE, 150), self.btn_action.center, self.btn_size, 3)
-        
-        font = pygame.font.Font(None, 24)
-        text = font.render("TAP", True, text_color)
-        text_rect = text.get_rect(center=self.btn_action.center)
-        overlay.blit(text, text_rect)
+        if name == 'action':
+            pygame.draw.circle(surface, color, local.center, self.btn_size)
+            pygame.draw.circle(surface, (*WHITE, 150), local.center, self.btn_size, 3)
+            text = action_font.render("TAP", True, text_color)
+        else:
+            pygame.draw.rect(surface, color, local, border_radius=10)
+            pygame.draw.rect(surface, (*WHITE, 150), local, 2, border_radius=10)
+            text = symbol_font.render(self.SYMBOLS[name], True, text_color)
+        surface.blit(text, text.get_rect(center=local.center))
         
-        screen.blit(overlay, (0, 0))
+        self._button_cache[key] = surface
+        return surface
+    
+    def draw(self, screen: pygame.Surface, alpha: int = 100,
+             only: Optional[List[str]] = None):
+        """
+        Dibuja los controles táctiles en pantalla. Con `only` sólo se
+        vuelcan esos botones.
+        """
+        rects = self.button_rects()
+        names = rects if only is None else only
+        for name in names:
+            screen.blit(self._button_surface(name, self.pressing[name], alpha),
+                        rects[name])
 
 
 # ============================================================================
 # CLASES DEL JUEGO
 # ============================================================================
 
+def keys_to_input(keys_pressed: Dict[int, bool]) -> int:
+    """Convierte un diccionario de teclas en bits de entrada de la simulación."""
+    inputs = 0
+    if keys_pressed.get(pygame.K_UP, False):
+        inputs |= INPUT_UP
+    if keys_pressed.get(pygame.K_DOWN, False):
+        inputs |= INPUT_DOWN
+    if keys_pressed.get(pygame.K_LEFT, False):
+        inputs |= INPUT_LEFT
+    if keys_pressed.get(pygame.K_RIGHT, False):
+        inputs |= INPUT_RIGHT
+    if keys_pressed.get(pygame.K_SPACE, False):
+        inputs |= INPUT_ACTION
+    return inputs
+
+
+def input_to_keys(inputs: int) -> Dict[int, bool]:
+    """Inverso de `keys_to_input`, para manejar la escena con bits (bots)."""
+    return {
+        pygame.K_UP: bool(inputs & INPUT_UP),
+        pygame.K_DOWN: bool(inputs & INPUT_DOWN),
+        pygame.K_LEFT: bool(inputs & INPUT_LEFT),
+        pygame.K_RIGHT: bool(inputs & INPUT_RIGHT),
+        pygame.K_SPACE: bool(inputs & INPUT_ACTION),
+    }
+
+
+class SpriteAtlas:
+    """
+    Atlas de sprites generado por generate_placeholders.py: una sola imagen
+    (assets/atlas.png) con el pájaro y los aviones ya escalados y en ambas
+    direcciones, más un manifiesto (assets/atlas.json) con sus rectángulos.
+    Se lee una vez al arrancar y reparte subsuperficies.
+    """
+    
+    _sheet: Optional[pygame.Surface] = None
+    _rects: Dict[str, pygame.Rect] = {}
+    _loaded = False
+    
+    @classmethod
+    def load(cls) -> bool:
+        """Carga el atlas si existe. Retorna True si está disponible."""
+        if cls._loaded:
+            return cls._sheet is not None
+        cls._loaded = True
+        
+        assets_dir = os.path.join(BASE_DIR, 'assets')
+        try:
+            with open(os.path.join(assets_dir, 'atlas.json'), 'r') as f:
+                manifest = json.load(f)
+            sheet = pygame.image.load(os.path.join(assets_dir, manifest['image']))
+            cls._sheet = sheet.convert_alpha()
+            cls._rects = {name: pygame.Rect(r) for name, r in manifest['sprites'].items()}
+        except (OSError, ValueError, KeyError, TypeError, pygame.error):
+            cls._sheet = None
+            cls._rects = {}
+        return cls._sheet is not None
+    
+    @classmethod
+    def get(cls, name: str, size: Tuple[int, int]) -> Optional[pygame.Surface]:
+        """
+        Subsuperficie del sprite `name`, o None si no está en el atlas o
+        su tamaño no coincide con el del juego (atlas desactualizado).
+        """
+        if not cls.load():
+            return None
+        rect = cls._rects.get(name)
+        if rect is None or rect.size != tuple(size):
+            return None
+        return cls._sheet.subsurface(rect)
+
+
 class Bird(pygame.sprite.Sprite):
-    """Clase que representa al pájaro (jugador)."""
+    """Sprite que dibuja al pájaro (jugador) a partir de su estado lógico."""
     
-    def __init__(self, x: int, y: int, config: Dict):
+    def __init__(self, state: SimBird):
         super().__init__()
-        self.config = config
-        self.speed = config['birdSpeed']
+        self.state = state
         
         self.frames = self._load_frames()
         self.current_frame = 0
@@ -270,10 +359,7 @@ class Bird(pygame.sprite.Sprite):
         self.animation_speed = 0.15
         
         self.image = self.frames[self.current_frame]
-        self.rect = self.image.get_rect(center=(x, y))
-        
-        self.last_lane = -1
-        self.crossed_lanes = set()
+        self.rect = self.image.get_rect(topleft=(state.x, state.y))
     
     def _load_frames(self) -> List[pygame.Surface]:
         """Carga los frames de animación del pájaro."""
@@ -281,13 +367,18 @@ class Bird(pygame.sprite.Sprite):
         assets_dir = os.path.join(BASE_DIR, 'assets')
         
         for i in range(1, 4):
+            img = SpriteAtlas.get(f'bird_{i}', BIRD_SIZE)
+            if img is not None:
+                frames.append(img)
+                continue
+            
             path = os.path.join(assets_dir, f'bird_{i}.png')
             try:
                 img = pygame.image.load(path).convert_alpha()
-                img = pygame.transform.scale(img, (40, 40))
+                img = pygame.transform.scale(img, BIRD_SIZE)
                 frames.append(img)
             except pygame.error:
-                surf = pygame.Surface((40, 40), pygame.SRCALPHA)
+                surf = pygame.Surface(BIRD_SIZE, pygame.SRCALPHA)
                 pygame.draw.circle(surf, YELLOW, (20, 20), 15)
                 pygame.draw.circle(surf, ORANGE, (20, 15 + i*2), 8)
                 pygame.draw.circle(surf, BLACK, (28, 15), 3)
@@ -296,87 +387,41 @@ class Bird(pygame.sprite.Sprite):
         
         return frames
     
-    def update(self, dt: float, keys_pressed: Dict[int, bool], 
-               screen_width: int, screen_height: int, safe_zone_height: int):
-        """Actualiza la posición y animación del pájaro."""
-        dx, dy = 0, 0
-        if keys_pressed.get(pygame.K_LEFT, False):
-            dx = -self.speed * dt
-        if keys_pressed.get(pygame.K_RIGHT, False):
-            dx = self.speed * dt
-        if keys_pressed.get(pygame.K_UP, False):
-            dy = -self.speed * dt
-        if keys_pressed.get(pygame.K_DOWN, False):
-            dy = self.speed * dt
-        
-        self.rect.x += dx
-        self.rect.y += dy
-        
-        self.rect.clamp_ip(pygame.Rect(0, 0, screen_width, screen_height))
-        
-        if self.rect.bottom > screen_height - safe_zone_height + self.rect.height:
-            self.rect.bottom = screen_height - safe_zone_height + self.rect.height
+    def update(self, dt: float, alpha: float = 1.0):
+        """Sincroniza la posición con el estado lógico y avanza la animación."""
+        self.rect.topleft = self.state.interpolated_position(alpha)
         
         self.animation_timer += dt
         if self.animation_timer >= self.animation_speed:
             self.animation_timer = 0
             self.current_frame = (self.current_frame + 1) % len(self.frames)
             self.image = self.frames[self.current_frame]
-    
-    def reset_position(self, x: int, y: int):
-        """Resetea la posición del pájaro."""
-        self.rect.center = (x, y)
-        self.crossed_lanes.clear()
-        self.last_lane = -1
-    
-    def get_current_lane(self, lane_rects: List[pygame.Rect]) -> int:
-        """Retorna el índice del carril actual."""
-        for i, lane_rect in enumerate(lane_rects):
-            if lane_rect.colliderect(self.rect):
-                return i
-        return -1
 
 
-class Plane(pygame.sprite.Sprite):
-    """Clase que representa un avión enemigo."""
+class PlaneImages:
+    """Caché de imágenes de aviones por tipo y dirección."""
     
     _image_cache: Dict[str, pygame.Surface] = {}
     
-    def __init__(self, lane_index: int, lane_y: int, direction: int, 
-                 speed: float, plane_type: str, screen_width: int):
-        super().__init__()
-        
-        self.lane_index = lane_index
-        self.direction = direction
-        self.speed = speed
-        self.plane_type = plane_type
-        self.screen_width = screen_width
-        
-        self.image = self._load_image(plane_type, direction)
-        self.rect = self.image.get_rect()
-        
-        if direction > 0:
-            self.rect.right = 0
-        else:
-            self.rect.left = screen_width
-        
-        self.rect.centery = lane_y
-        self.x = float(self.rect.x)
-    
     @classmethod
-    def _load_image(cls, plane_type: str, direction: int) -> pygame.Surface:
+    def get(cls, plane_type: str, direction: int) -> pygame.Surface:
         """Carga y cachea la imagen del avión."""
         cache_key = f"{plane_type}_{direction}"
         
         if cache_key in cls._image_cache:
             return cls._image_cache[cache_key]
         
+        size = PLANE_SIZES.get(plane_type, (70, 35))
+        
+        name = f'plane_{plane_type}' + ('_flip' if direction < 0 else '')
+        img = SpriteAtlas.get(name, size)
+        if img is not None:
+            cls._image_cache[cache_key] = img
+            return img
+        
         assets_dir = os.path.join(BASE_DIR, 'assets')
         path = os.path.join(assets_dir, f'plane_{plane_type}.png')
         
-        sizes = {'small': (50, 25), 'med': (70, 35), 'large': (90, 45)}
-        size = sizes.get(plane_type, (70, 35))
-        
         try:
             img = pygame.image.load(path).convert_alpha()
             img = pygame.transform.scale(img, size)
@@ -400,100 +445,70 @@ class Plane(pygame.sprite.Sprite):
         cls._image_cache[cache_key] = img
         return img
     
-    def update(self, dt: float):
-        """Actualiza la posición del avión."""
-        self.x += self.speed * self.direction * dt
-        self.rect.x = int(self.x)
-    
-    def is_off_screen(self) -> bool:
-        """Retorna True si el avión salió de la pantalla."""
-        if self.direction > 0:
-            return self.rect.left > self.screen_width
-        else:
-            return self.rect.right < 0
+    @classmethod
+    def preload(cls):
+        """Prepara todas las variantes para no escalar a mitad de partida."""
+        for plane_type in PLANE_TYPES:
+            for direction in (1, -1):
+                cls.get(plane_type, direction)
 
 
-class Lane:
-    """Representa un carril donde aparecen aviones."""
-    
-    def __init__(self, index: int, y: int, height: int, direction: int,
-                 config: Dict, screen_width: int):
-        self.index = index
-        self.y = y
-        self.height = height
-        self.direction = direction
-        self.config = config
-        self.screen_width = screen_width
-        
-        self.planes: List[Plane] = []
-        self.spawn_timer = random.uniform(0, 1.0 / config['spawnRate'])
-        
-        self.plane_types = ['small', 'med', 'large']
-        self.type_weights = [0.5, 0.35, 0.15]
-    
-    @property
-    def rect(self) -> pygame.Rect:
-        return pygame.Rect(0, self.y - self.height // 2, 
-                          self.screen_width, self.height)
+class TextCache:
+    """
+    Caché LRU de textos renderizados, por (fuente, texto, color). Los textos
+    del HUD y de los menús casi nunca cambian, así que se rasterizan una vez.
+    """
     
-    def _get_spawn_rate(self, difficulty_multiplier: float) -> float:
-        return self.config['spawnRate'] * difficulty_multiplier
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[tuple, pygame.Surface]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
     
-    def _get_speed_range(self, difficulty_multiplier: float) -> Tuple[float, float]:
-        base_min, base_max = self.config['planeSpeedRange']
-        return (base_min * difficulty_multiplier, base_max * difficulty_multiplier)
+    def __len__(self) -> int:
+        return len(self._entries)
     
-    def _can_spawn(self) -> bool:
-        min_distance = self.config['minSpawnDistancePx']
-        
-        for plane in self.planes:
-            if self.direction > 0:
-                if plane.rect.left < min_distance:
-                    return False
-            else:
-                if plane.rect.right > self.screen_width - min_distance:
-                    return False
-        
-        return True
+    def render(self, font: pygame.font.Font, text: str,
+               color: Tuple[int, ...]) -> pygame.Surface:
+        """Equivale a `font.render(text, True, color)`, pero cacheado."""
+        key = (font, text, color)
+        surface = self._entries.get(key)
+        if surface is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return surface
+        
+        self.misses += 1
+        surface = font.render(text, True, color)
+        self._entries[key] = surface
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return surface
+
+
+class DigitAtlas:
+    """
+    Dígitos 0-9 pre-renderizados de una fuente y color, para componer
+    números que cambian a menudo (puntuación) sin rasterizar texto.
+    """
     
-    def _choose_plane_type(self) -> str:
-        return random.choices(self.plane_types, weights=self.type_weights)[0]
+    def __init__(self, font: pygame.font.Font, color: Tuple[int, ...]):
+        self.glyphs = [font.render(str(d), True, color) for d in range(10)]
+        self.height = max(g.get_height() for g in self.glyphs)
     
-    def update(self, dt: float, difficulty_multiplier: float) -> List[Plane]:
-        new_planes = []
-        
-        for plane in self.planes[:]:
-            plane.update(dt)
-            if plane.is_off_screen():
-                self.planes.remove(plane)
-        
-        spawn_rate = self._get_spawn_rate(difficulty_multiplier)
-        self.spawn_timer -= dt
-        
-        if self.spawn_timer <= 0:
-            self.spawn_timer = 1.0 / spawn_rate + random.uniform(-0.3, 0.3)
-            
-            if self._can_spawn():
-                speed_min, speed_max = self._get_speed_range(difficulty_multiplier)
-                speed = random.uniform(speed_min, speed_max)
-                plane_type = self._choose_plane_type()
-                
-                plane = Plane(
-                    lane_index=self.index,
-                    lane_y=self.y,
-                    direction=self.direction,
-                    speed=speed,
-                    plane_type=plane_type,
-                    screen_width=self.screen_width
-                )
-                
-                self.planes.append(plane)
-                new_planes.append(plane)
-        
-        return new_planes
+    def width_of(self, value: int) -> int:
+        """Ancho en píxeles del número compuesto."""
+        return sum(self.glyphs[int(c)].get_width() for c in str(value))
     
-    def clear(self):
-        self.planes.clear()
+    def blit_number(self, surface: pygame.Surface, value: int,
+                    pos: Tuple[int, int]) -> pygame.Rect:
+        """Dibuja `value` (entero no negativo) con su esquina superior izquierda en pos."""
+        x, y = pos
+        for c in str(value):
+            glyph = self.glyphs[int(c)]
+            surface.blit(glyph, (x, y))
+            x += glyph.get_width()
+        return pygame.Rect(pos[0], y, x - pos[0], self.height)
 
 
 class GameUI:
@@ -514,23 +529,36 @@ class GameUI:
             self.font_large = pygame.font.SysFont('arial', 72)
             self.font_medium = pygame.font.SysFont('arial', 48)
             self.font_small = pygame.font.SysFont('arial', 32)
+        
+        self.text = TextCache()
+        self.score_digits = DigitAtlas(self.font_small, WHITE)
+        self.record_digits = DigitAtlas(self.font_small, ORANGE)
+        
+        # Overlay del perfilador (ver draw_profile)
+        self.font_tiny: Optional[pygame.font.Font] = None
+        self._profile_panel: Optional[pygame.Surface] = None
+        self._profile_rows = None
     
-    def draw_menu(self, highscore: int):
-        """Dibuja el menú principal."""
+    def draw_menu(self, highscore: int, loading: bool = False,
+                  overlay_alpha: int = 200):
+        """
+        Dibuja el menú principal (con `loading`, aún cargando assets).
+        `overlay_alpha` es la opacidad del velo sobre lo que hay detrás.
+        """
         overlay = pygame.Surface((self.width, self.height))
         overlay.fill(DARK_GRAY)
-        overlay.set_alpha(200)
+        overlay.set_alpha(overlay_alpha)
         self.screen.blit(overlay, (0, 0))
         
-        title = self.font_large.render("BIRDS & PLANES", True, YELLOW)
+        title = self.text.render(self.font_large, "BIRDS & PLANES", YELLOW)
         title_rect = title.get_rect(center=(self.width // 2, self.height // 4))
         self.screen.blit(title, title_rect)
         
-        subtitle = self.font_small.render("Esquiva los aviones!", True, WHITE)
+        subtitle = self.text.render(self.font_small, "Esquiva los aviones!", WHITE)
         subtitle_rect = subtitle.get_rect(center=(self.width // 2, self.height // 4 + 50))
         self.screen.blit(subtitle, subtitle_rect)
         
-        hs_text = self.font_medium.render(f"Record: {highscore}", True, ORANGE)
+        hs_text = self.text.render(self.font_medium, f"Record: {highscore}", ORANGE)
         hs_rect = hs_text.get_rect(center=(self.width // 2, self.height // 2 - 30))
         self.screen.blit(hs_text, hs_rect)
         
@@ -539,34 +567,97 @@ class GameUI:
             "PC: Flechas para mover",
             "Movil: Usa los controles tactiles",
             "",
-            "TOCA o presiona ESPACIO"
+            "Cargando..." if loading else "TOCA o presiona ESPACIO"
         ]
         
         y_offset = self.height // 2 + 40
         for line in instructions:
-            text = self.font_small.render(line, True, WHITE)
+            text = self.text.render(self.font_small, line, WHITE)
             text_rect = text.get_rect(center=(self.width // 2, y_offset))
             self.screen.blit(text, text_rect)
             y_offset += 35
     
+    PROFILE_COLUMN_WIDTHS = (90, 55, 55, 55)
+    PROFILE_ROW_HEIGHT = 16
+    
+    def draw_profile(self, rows: List[List[str]]) -> pygame.Rect:
+        """
+        Dibuja la tabla del perfilador bajo el HUD, a la derecha. El panel
+        sólo se vuelve a componer cuando cambian los valores.
+        """
+        if rows != self._profile_rows:
+            if self.font_tiny is None:
+                self.font_tiny = pygame.font.Font(None, 20)
+            widths = self.PROFILE_COLUMN_WIDTHS
+            panel = pygame.Surface((sum(widths) + 10,
+                                    len(rows) * self.PROFILE_ROW_HEIGHT + 8))
+            panel.fill(BLACK)
+            for r, row in enumerate(rows):
+                x = 5
+                color = YELLOW if r == 0 else WHITE
+                for cell, width in zip(row, widths):
+                    text = self.font_tiny.render(cell, True, color)
+                    panel.blit(text, (x, 4 + r * self.PROFILE_ROW_HEIGHT))
+                    x += width
+            self._profile_panel = panel
+            self._profile_rows = rows
+        
+        rect = self._profile_panel.get_rect(topright=(self.width - 5, self.HUD_HEIGHT + 5))
+        self.screen.blit(self._profile_panel, rect)
+        return rect
+    
+    HUD_HEIGHT = 45
+    HUD_FIELDS = ('score', 'lives', 'record')
+    
+    def hud_field_rects(self) -> Dict[str, pygame.Rect]:
+        """Zona de la barra del HUD que ocupa cada campo."""
+        h = self.HUD_HEIGHT
+        lives_x = self.width // 2 - 80
+        record_x = self.width // 2 + 120
+        return {
+            'score': pygame.Rect(0, 0, lives_x, h),
+            'lives': pygame.Rect(lives_x, 0, record_x - lives_x, h),
+            'record': pygame.Rect(record_x, 0, self.width - record_x, h),
+        }
+    
+    def draw_hud_fields(self, score: int, lives: int, highscore: int,
+                        fields=HUD_FIELDS):
+        """Dibuja sólo los campos indicados del HUD, cada uno en su zona."""
+        rects = self.hud_field_rects()
+        clip = self.screen.get_clip()
+        
+        for field in fields:
+            rect = rects[field]
+            self.screen.set_clip(rect)
+            pygame.draw.rect(self.screen, (0, 0, 0, 150), rect)
+            
+            if field == 'score':
+                label = self.text.render(self.font_small, "Puntos: ", WHITE)
+                self.screen.blit(label, (10, 10))
+                self.score_digits.blit_number(self.screen, score,
+                                              (10 + label.get_width(), 10))
+            
+            elif field == 'lives':
+                lives_text = self.text.render(self.font_small, "Vidas: ", WHITE)
+                self.screen.blit(lives_text, (self.width // 2 - 80, 10))
+                
+                for i in range(lives):
+                    pygame.draw.circle(self.screen, RED, 
+                                     (self.width // 2 + i * 25, 22), 8)
+            
+            elif field == 'record':
+                label = self.text.render(self.font_small, "Record: ", ORANGE)
+                digits_x = self.width - 10 - self.record_digits.width_of(highscore)
+                self.screen.blit(label, (digits_x - label.get_width(), 10))
+                self.record_digits.blit_number(self.screen, highscore,
+                                               (digits_x, 10))
+        
+        self.screen.set_clip(clip)
+    
     def draw_hud(self, score: int, lives: int, highscore: int, 
                  sound_on: bool, paused: bool):
         """Dibuja el HUD durante el juego."""
-        pygame.draw.rect(self.screen, (0, 0, 0, 150), (0, 0, self.width, 45))
-        
-        score_text = self.font_small.render(f"Puntos: {score}", True, WHITE)
-        self.screen.blit(score_text, (10, 10))
-        
-        lives_text = self.font_small.render("Vidas: ", True, WHITE)
-        self.screen.blit(lives_text, (self.width // 2 - 80, 10))
-        
-        for i in range(lives):
-            pygame.draw.circle(self.screen, RED, 
-                             (self.width // 2 + i * 25, 22), 8)
-        
-        hs_text = self.font_small.render(f"Record: {highscore}", True, ORANGE)
-        hs_rect = hs_text.get_rect(topright=(self.width - 10, 10))
-        self.screen.blit(hs_text, hs_rect)
+        self.draw_hud_fields(score, lives, highscore)
         
         if paused:
             pause_overlay = pygame.Surface((self.width, self.height))
@@ -574,11 +665,11 @@ class GameUI:
             pause_overlay.set_alpha(150)
             self.screen.blit(pause_overlay, (0, 0))
             
-            pause_text = self.font_large.render("PAUSA", True, WHITE)
+            pause_text = self.text.render(self.font_large, "PAUSA", WHITE)
             pause_rect = pause_text.get_rect(center=(self.width // 2, self.height // 2))
             self.screen.blit(pause_text, pause_rect)
             
-            resume_text = self.font_small.render("Toca para continuar", True, GRAY)
+            resume_text = self.text.render(self.font_small, "Toca para continuar", GRAY)
             resume_rect = resume_text.get_rect(center=(self.width // 2, self.height // 2 + 50))
             self.screen.blit(resume_text, resume_rect)
     
@@ -589,91 +680,229 @@ class GameUI:
         overlay.set_alpha(220)
         self.screen.blit(overlay, (0, 0))
         
-        go_text = self.font_large.render("GAME OVER", True, RED)
+        go_text = self.text.render(self.font_large, "GAME OVER", RED)
         go_rect = go_text.get_rect(center=(self.width // 2, self.height // 3))
         self.screen.blit(go_text, go_rect)
         
-        score_text = self.font_medium.render(f"Puntuacion: {score}", True, WHITE)
+        score_text = self.text.render(self.font_medium, f"Puntuacion: {score}", WHITE)
         score_rect = score_text.get_rect(center=(self.width // 2, self.height // 2 - 20))
         self.screen.blit(score_text, score_rect)
         
         if is_new_record:
-            record_text = self.font_medium.render("NUEVO RECORD!", True, YELLOW)
+            record_text = self.text.render(self.font_medium, "NUEVO RECORD!", YELLOW)
             record_rect = record_text.get_rect(center=(self.width // 2, self.height // 2 + 30))
             self.screen.blit(record_text, record_rect)
         else:
-            hs_text = self.font_small.render(f"Record: {highscore}", True, ORANGE)
+            hs_text = self.text.render(self.font_small, f"Record: {highscore}", ORANGE)
             hs_rect = hs_text.get_rect(center=(self.width // 2, self.height // 2 + 30))
             self.screen.blit(hs_text, hs_rect)
         
-        restart_text = self.font_small.render("TOCA para reiniciar", True, GRAY)
+        restart_text = self.text.render(self.font_small, "TOCA para reiniciar", GRAY)
         restart_rect = restart_text.get_rect(center=(self.width // 2, self.height * 2 // 3 + 30))
         self.screen.blit(restart_text, restart_rect)
     
-    def draw_safe_zone(self, y: int, height: int):
-        """Dibuja la zona segura."""
+    def draw_safe_zone(self, y: int, height: int,
+                       surface: Optional[pygame.Surface] = None):
+        """Dibuja la zona segura (en `surface` o en la pantalla)."""
+        surface = surface or self.screen
         zone_rect = pygame.Rect(0, y, self.width, height)
-        pygame.draw.rect(self.screen, (50, 150, 50, 100), zone_rect)
-        pygame.draw.line(self.screen, GREEN, (0, y), (self.width, y), 2)
+        pygame.draw.rect(surface, (50, 150, 50, 100), zone_rect)
+        pygame.draw.line(surface, GREEN, (0, y), (self.width, y), 2)
     
-    def draw_finish_zone(self, y: int, height: int):
-        """Dibuja la zona de llegada."""
+    def draw_finish_zone(self, y: int, height: int,
+                         surface: Optional[pygame.Surface] = None):
+        """Dibuja la zona de llegada (en `surface` o en la pantalla)."""
+        surface = surface or self.screen
         zone_rect = pygame.Rect(0, y, self.width, height)
-        pygame.draw.rect(self.screen, (50, 50, 150, 100), zone_rect)
-        pygame.draw.line(self.screen, BLUE, (0, y + height), (self.width, y + height), 2)
+        pygame.draw.rect(surface, (50, 50, 150, 100), zone_rect)
+        pygame.draw.line(surface, BLUE, (0, y + height), (self.width, y + height), 2)
         
-        flag_text = self.font_small.render("META!", True, WHITE)
+        flag_text = self.text.render(self.font_small, "META!", WHITE)
         flag_rect = flag_text.get_rect(center=(self.width // 2, y + height // 2))
-        self.screen.blit(flag_text, flag_rect)
+        surface.blit(flag_text, flag_rect)
+
+
+class DirtyRectTracker:
+    """
+    Estado del modo de dibujo por rectángulos sucios: qué se dibujó en el
+    frame anterior y cuánta pantalla se actualiza en cada frame.
+    """
+    
+    def __init__(self, screen_width: int, screen_height: int):
+        self.screen_rect = pygame.Rect(0, 0, screen_width, screen_height)
+        self.state: Optional[str] = None
+        self.full_redraw = True
+        self.sprite_rects: List[pygame.Rect] = []
+        self.hud_values: Dict[str, object] = {}
+        self.pressing: Dict[str, bool] = {}
+        
+        self.frames = 0
+        self.touched_area = 0
+        self.max_ratio = 0.0
+        self.last_ratio = 0.0
+    
+    def invalidate(self):
+        """Fuerza un redibujado completo en el próximo frame."""
+        self.full_redraw = True
+    
+    def record(self, rects: Optional[List[pygame.Rect]]):
+        """Acumula la fracción de pantalla actualizada (None = completa)."""
+        screen_area = self.screen_rect.width * self.screen_rect.height
+        if rects is None:
+            area = screen_area
+        else:
+            area = sum(r.width * r.height for r in rects)
+        ratio = min(area / screen_area, 1.0)
+        
+        self.frames += 1
+        self.touched_area += min(area, screen_area)
+        self.last_ratio = ratio
+        self.max_ratio = max(self.max_ratio, ratio)
+    
+    def summary(self) -> str:
+        if not self.frames:
+            return "Dirty rects: sin frames"
+        screen_area = self.screen_rect.width * self.screen_rect.height
+        mean = self.touched_area / (self.frames * screen_area)
+        return (f"Dirty rects: {mean:.1%} de la pantalla por frame en promedio "
+                f"(máx {self.max_ratio:.1%}, {self.frames} frames)")
 
 
 class GameScene:
-    """Escena principal del juego."""
+    """
+    Escena principal del juego: estados de menú/pausa, entrada, sonido y
+    dibujo. Las reglas del juego viven en `Simulation` (simulation.py).
+    """
     
     STATE_MENU = 'menu'
     STATE_PLAYING = 'playing'
     STATE_PAUSED = 'paused'
     STATE_GAME_OVER = 'game_over'
     
-    def __init__(self, screen: pygame.Surface, config: Dict):
+    def __init__(self, screen: pygame.Surface, config: Dict,
+                 seed: Optional[int] = None, record_replays: bool = False,
+                 dirty_rects: bool = False, defer_assets: bool = False,
+                 show_profile: bool = False, persist_highscore: bool = True):
+        """
+        Con `defer_assets` sólo se prepara lo necesario para mostrar el
+        menú; el resto lo carga `load_assets` mientras el menú ya corre.
+        Sin `persist_highscore` ni los récords ni las partidas se guardan
+        en disco (bots, pruebas).
+        """
         self.screen = screen
         self.config = config
         self.width = config['screenWidth']
         self.height = config['screenHeight']
         
-        self.background = self._load_background()
+        self.sim = Simulation(config, seed=seed)
+        
+        # Fondo liso hasta que cargue la imagen (ver load_asset_steps)
+        self.background = pygame.Surface((self.width, self.height))
+        self.background.fill((135, 206, 250))
         self.ui = GameUI(screen, config)
         self.touch_controls = TouchControls(self.width, self.height)
         
         self.highscore = load_highscore()
+        self.persist_highscore = persist_highscore
+        # Récord y tabla de partidas, escritos fuera del game loop
+        # (scores.py); el hilo se crea con la primera partida terminada
+        self.scores: Optional[ScoreWriter] = None
+        self.config_hash = config_hash(config)
         
         self.state = self.STATE_MENU
-        self.score = 0
-        self.lives = config['lives']
         self.sound_enabled = config.get('soundEnabled', True)
         self.is_new_record = False
         
-        self.game_time = 0
-        self.difficulty_multiplier = 1.0
-        
-        self.safe_zone_height = 60
-        self.finish_zone_y = 50
-        self.finish_zone_height = 50
-        
-        self._create_lanes()
-        
-        start_x = self.width // 2
-        start_y = self.height - self.safe_zone_height // 2
-        self.bird = Bird(start_x, start_y, config)
+        # Grabación de partidas (ver replay.py)
+        self.record_replays = record_replays or config.get('recordReplays', False)
+        self.recorder: Optional[ReplayRecorder] = None
+        
+        self.safe_zone_height = self.sim.safe_zone_height
+        self.finish_zone_y = self.sim.finish_zone_y
+        self.finish_zone_height = self.sim.finish_zone_height
+        
+        self.bird: Optional[Bird] = None
+        self.sounds: Dict[str, pygame.mixer.Sound] = {}
+        self.assets_ready = False
+        
+        # Modo opcional de dibujo por rectángulos sucios
+        self.dirty_rects = dirty_rects or config.get('dirtyRects', False)
+        self.dirty = DirtyRectTracker(self.width, self.height)
+        
+        # Tiempos por fase de cada frame (F3: overlay, F4: CSV)
+        self.profiler = FrameProfiler()
+        self.sim.profiler = self.profiler
+        self.show_profile = show_profile
+        self._profile_rows: List[List[str]] = []
+        
+        # Conteos de entidades e instantáneas de memoria (F5)
+        self.memory = MemoryMonitor()
+        self._profile_refresh = -1
+        
+        # Capa estática del tablero (ver _get_static_layer)
+        self._static_layer: Optional[pygame.Surface] = None
+        self._static_key = None
+        
+        # Demostración detrás del menú: una partida aparte jugada por el
+        # piloto automático, para no alterar la semilla del jugador
+        self.attract_mode = config.get('attractMode', True)
+        self.demo: Optional[Simulation] = None
+        self.demo_bird: Optional[Bird] = None
+        self.autopilot: Optional[Autopilot] = None
+        
+        if not defer_assets:
+            for _ in self.load_asset_steps():
+                pass
+    
+    def load_asset_steps(self) -> Iterator[str]:
+        """
+        Carga los assets de a una etapa, cediendo el nombre de cada una.
+        Los sprites salen todos del atlas antes de poder empezar a jugar,
+        así que no se escala nada a mitad de partida.
+        """
+        self.background = self._load_background()
+        self._static_layer = None
+        yield 'fondo'
         
-        self.all_sprites = pygame.sprite.Group()
-        self.plane_sprites = pygame.sprite.Group()
+        SpriteAtlas.load()
+        PlaneImages.preload()
+        self.bird = Bird(self.sim.bird)
+        yield 'sprites'
         
         self._load_sounds()
+        yield 'sonidos'
+        
+        self.assets_ready = True
+        self.dirty.invalidate()
+    
+    async def load_assets(self, report: Optional[StartupReport] = None):
+        """Carga los assets dentro del loop de asyncio, sin frenar el menú."""
+        for step in self.load_asset_steps():
+            if report is not None:
+                report.mark(step)
+            await asyncio.sleep(0)
+    
+    @property
+    def lanes(self):
+        return self.sim.lanes
+    
+    @property
+    def score(self) -> int:
+        return self.sim.score
+    
+    @property
+    def lives(self) -> int:
+        return self.sim.lives
     
     def _load_background(self) -> pygame.Surface:
-        """Carga la imagen de fondo."""
-        path = os.path.join(BASE_DIR, 'assets', 'background.png')
+        """
+        Carga la imagen de fondo: la generada para esta resolución
+        (`generate_placeholders.py --sizes`) si existe, o background.png
+        escalada.
+        """
+        path = os.path.join(BASE_DIR, 'assets', f'background_{self.width}x{self.height}.png')
+        if not os.path.exists(path):
+            path = os.path.join(BASE_DIR, 'assets', 'background.png')
         try:
             bg = pygame.image.load(path).convert()
             return pygame.transform.scale(bg, (self.width, self.height))
@@ -692,17 +921,13 @@ class GameScene:
         self.sounds = {}
         try:
             pygame.mixer.init()
-            collision_sound = pygame.mixer.Sound(buffer=bytes([
-                int(128 + 100 * (i % 20 < 10 and 1 or -1) * max(0, 1 - i/1000))
-                for i in range(2000)
-            ]))
+            collision_sound = pygame.mixer.Sound(
+                buffer=square_wave(2000, period=20, amplitude=100, decay=1000))
             collision_sound.set_volume(0.3)
             self.sounds['collision'] = collision_sound
             
-            point_sound = pygame.mixer.Sound(buffer=bytes([
-                int(128 + 80 * (i % 8 < 4 and 1 or -1) * max(0, 1 - i/800))
-                for i in range(1500)
-            ]))
+            point_sound = pygame.mixer.Sound(
+                buffer=square_wave(1500, period=8, amplitude=80, decay=800))
             point_sound.set_volume(0.2)
             self.sounds['point'] = point_sound
         except pygame.error:
@@ -717,108 +942,87 @@ class GameScene:
             except:
                 pass
     
-    def _create_lanes(self):
-        """Crea los carriles del juego."""
-        self.lanes: List[Lane] = []
-        num_lanes = self.config['numLanes']
-        
-        play_area_top = self.finish_zone_y + self.finish_zone_height
-        play_area_bottom = self.height - self.safe_zone_height
-        play_area_height = play_area_bottom - play_area_top
-        
-        lane_spacing = play_area_height / num_lanes
-        
-        for i in range(num_lanes):
-            lane_y = int(play_area_top + lane_spacing * (i + 0.5))
-            direction = 1 if i % 2 == 0 else -1
-            
-            lane = Lane(
-                index=i,
-                y=lane_y,
-                height=int(lane_spacing),
-                direction=direction,
-                config=self.config,
-                screen_width=self.width
-            )
-            self.lanes.append(lane)
-    
     def _reset_game(self):
         """Reinicia el juego."""
-        self.score = 0
-        self.lives = self.config['lives']
-        self.game_time = 0
-        self.difficulty_multiplier = 1.0
+        self._finish_replay()
+        self.sim.reset()
         self.is_new_record = False
+        self.bird.update(0)
         
-        for lane in self.lanes:
-            lane.clear()
-        
-        self.plane_sprites.empty()
-        
-        start_x = self.width // 2
-        start_y = self.height - self.safe_zone_height // 2
-        self.bird.reset_position(start_x, start_y)
+        if self.record_replays:
+            self.recorder = ReplayRecorder(self.sim)
     
-    def _check_collisions(self) -> bool:
-        """Verifica colisiones AABB."""
-        bird_rect = self.bird.rect.inflate(-10, -10)
-        
-        for lane in self.lanes:
-            for plane in lane.planes:
-                plane_rect = plane.rect.inflate(-5, -5)
-                if bird_rect.colliderect(plane_rect):
-                    return True
+    def _finish_replay(self):
+        """Guarda la grabación de la partida en curso, si la hay."""
+        if self.recorder is None:
+            return
+        replay = self.recorder.finish(self.sim)
+        self.recorder = None
         
-        return False
+        replay_dir = os.path.join(BASE_DIR, 'replays')
+        filename = f"{time.strftime('%Y%m%d-%H%M%S')}_{replay.seed}.bpr"
+        try:
+            os.makedirs(replay_dir, exist_ok=True)
+            replay.save(os.path.join(replay_dir, filename))
+        except IOError as e:
+            print(f"Error al guardar replay: {e}")
     
-    def _check_lane_cross(self) -> bool:
-        """Verifica si el pájaro cruzó un carril."""
-        lane_rects = [lane.rect for lane in self.lanes]
-        current_lane = self.bird.get_current_lane(lane_rects)
-        
-        if self.bird.rect.top <= self.finish_zone_y + self.finish_zone_height:
-            self.score += self.config['pointsPerCross'] * 2
-            self._play_sound('point')
-            
-            start_x = self.width // 2
-            start_y = self.height - self.safe_zone_height // 2
-            self.bird.reset_position(start_x, start_y)
-            
-            return True
-        
-        if current_lane >= 0 and current_lane not in self.bird.crossed_lanes:
-            self.bird.crossed_lanes.add(current_lane)
-            self.score += self.config['pointsPerCross']
-            self._play_sound('point')
-            return True
-        
-        return False
+    PROFILE_REFRESH_FRAMES = 30
     
-    def _update_difficulty(self, dt: float):
-        """Actualiza la dificultad."""
-        self.game_time += dt
-        
-        step_time = self.config['difficultyStepEveryXSeconds']
-        multiplier = self.config['difficultySpeedMultiplier']
-        
-        steps = int(self.game_time / step_time)
-        self.difficulty_multiplier = multiplier ** steps
+    def dump_profile(self, path: Optional[str] = None) -> Optional[str]:
+        """Guarda los tiempos por fase en CSV (por defecto en profiles/)."""
+        if path is None:
+            profile_dir = os.path.join(BASE_DIR, 'profiles')
+            path = os.path.join(profile_dir, f"{time.strftime('%Y%m%d-%H%M%S')}.csv")
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            rows = self.profiler.dump_csv(path)
+        except IOError as e:
+            print(f"Error al guardar perfil: {e}")
+            return None
+        print(f"Perfil guardado en {path} ({rows} frames)")
+        return path
     
-    def _handle_collision(self):
-        """Maneja una colisión."""
-        self._play_sound('collision')
-        self.lives -= 1
-        
-        if self.lives <= 0:
-            if self.score > self.highscore:
-                self.highscore = self.score
-                save_highscore(self.highscore)
-                self.is_new_record = True
-            self.state = self.STATE_GAME_OVER
-        else:
-            start_x = self.width // 2
-            start_y = self.height - self.safe_zone_height // 2
-            self.bird.reset_position(start_x, start_y)
+    def entity_counts(self) -> Dict[str, int]:
+        """Entidades vivas de la simulación y tamaño de cachés y buffers."""
+        counts = self.sim.entity_counts()
+        counts['text_cache'] = len(self.ui.text)
+        counts['plane_images'] = len(PlaneImages._image_cache)
+        counts['profiler_frames'] = min(self.profiler.count, self.profiler.capacity)
+        counts['replay_ticks'] = len(self.recorder.inputs) if self.recorder else 0
+        return counts
+    
+    def report_memory(self):
+        """Imprime los conteos y una instantánea de tracemalloc."""
+        print(f"Entidades: {format_counts(self.entity_counts())}")
+        for line in self.memory.snapshot():
+            print(line)
+    
+    def _handle_game_over(self):
+        """
+        Encola la partida (y el récord, si lo hay) para guardarlos en
+        segundo plano y pasa a Game Over.
+        """
+        self._finish_replay()
+        if self.persist_highscore and self.scores is None:
+            self.scores = ScoreWriter()
+        if self.scores is not None:
+            self.scores.record_run(RunRecord(self.score, self.sim.game_time,
+                                             self.sim.seed, self.config_hash,
+                                             time.time()))
+        if self.score > self.highscore:
+            self.highscore = self.score
+            if self.scores is not None:
+                self.scores.save_highscore(self.highscore)
+            self.is_new_record = True
+        self.state = self.STATE_GAME_OVER
+    
+    def close(self):
+        """Guarda la grabación en curso y espera las escrituras pendientes."""
+        self._finish_replay()
+        if self.scores is not None:
+            self.scores.close()
+            self.scores = None
     
     def handle_event(self, event: pygame.event.Event) -> bool:
         """Procesa eventos de entrada."""
@@ -828,6 +1032,8 @@ class GameScene:
             
             # Acciones según estado
             if self.state == self.STATE_MENU:
+                if not self.assets_ready:
+                    return True
                 self._reset_game()
                 self.state = self.STATE_PLAYING
             elif self.state == self.STATE_PAUSED:
@@ -845,8 +1051,16 @@ class GameScene:
         
         # Manejar eventos de teclado
         elif event.type == pygame.KEYDOWN:
-            if self.state == self.STATE_MENU:
-                if event.key == pygame.K_SPACE:
+            if event.key == pygame.K_F3:
+                self.show_profile = not self.show_profile
+                self.dirty.invalidate()
+            elif event.key == pygame.K_F4:
+                self.dump_profile()
+            elif event.key == pygame.K_F5:
+                self.report_memory()
+            
+            elif self.state == self.STATE_MENU:
+                if event.key == pygame.K_SPACE and self.assets_ready:
                     self._reset_game()
                     self.state = self.STATE_PLAYING
                 elif event.key == pygame.K_ESCAPE:
@@ -858,12 +1072,14 @@ class GameScene:
                 elif event.key == pygame.K_m:
                     self.sound_enabled = not self.sound_enabled
                 elif event.key == pygame.K_ESCAPE:
+                    self._finish_replay()
                     self.state = self.STATE_MENU
             
             elif self.state == self.STATE_PAUSED:
                 if event.key == pygame.K_p:
                     self.state = self.STATE_PLAYING
                 elif event.key == pygame.K_ESCAPE:
+                    self._finish_replay()
                     self.state = self.STATE_MENU
             
             elif self.state == self.STATE_GAME_OVER:
@@ -875,89 +1091,277 @@ class GameScene:
         
         return True
     
+    @property
+    def demo_active(self) -> bool:
+        return self.state == self.STATE_MENU and self.demo is not None
+    
+    def _update_demo(self, dt: float):
+        """Avanza la demostración del menú; al perder, empieza otra."""
+        if not (self.attract_mode and self.assets_ready):
+            return
+        if self.demo is None:
+            self.demo = Simulation(self.config)
+            self.demo_bird = Bird(self.demo.bird)
+            self.autopilot = Autopilot(self.demo)
+        self.demo.step(dt, self.autopilot.inputs())
+        if self.demo.game_over:
+            self.demo.reset()
+        self.demo_bird.update(dt)
+    
     def update(self, dt: float, keys_pressed: Dict[int, bool]):
         """Actualiza la lógica del juego."""
+        if self.state == self.STATE_MENU:
+            self._update_demo(dt)
+            return
         if self.state != self.STATE_PLAYING:
             return
         
         # Combinar teclas físicas con controles táctiles
-        touch_keys = self.touch_controls.get_keys_pressed()
-        combined_keys = {**keys_pressed}
-        for key, value in touch_keys.items():
-            if value:
-                combined_keys[key] = True
-        
-        self._update_difficulty(dt)
-        
-        self.bird.update(dt, combined_keys, self.width, self.height, 
-                        self.safe_zone_height)
-        
-        for lane in self.lanes:
-            new_planes = lane.update(dt, self.difficulty_multiplier)
-            for plane in new_planes:
-                self.plane_sprites.add(plane)
-        
-        if self._check_collisions():
-            self._handle_collision()
-        
-        self._check_lane_cross()
+        inputs = keys_to_input(keys_pressed)
+        inputs |= keys_to_input(self.touch_controls.get_keys_pressed())
+        
+        if self.recorder is not None:
+            self.recorder.record(self.sim, inputs)
+        events = self.sim.step(dt, inputs)
+        self.bird.update(dt)
+        
+        for event in events:
+            if event == EVENT_POINT:
+                self._play_sound('point')
+            elif event == EVENT_COLLISION:
+                self._play_sound('collision')
+            elif event == EVENT_GAME_OVER:
+                self._handle_game_over()
     
-    def draw(self):
-        """Dibuja la escena del juego."""
-        self.screen.blit(self.background, (0, 0))
-        
-        if self.state == self.STATE_MENU:
-            self.ui.draw_menu(self.highscore)
-        
-        elif self.state in [self.STATE_PLAYING, self.STATE_PAUSED]:
-            self.ui.draw_safe_zone(self.height - self.safe_zone_height, 
-                                   self.safe_zone_height)
-            self.ui.draw_finish_zone(self.finish_zone_y, self.finish_zone_height)
-            
+    def _plane_sprites(self, alpha: float,
+                       sim: Optional[Simulation] = None) -> List[Tuple[pygame.Surface, pygame.Rect]]:
+        """
+        Imagen y rectángulo de cada avión visible de `sim` (por defecto, la
+        partida), interpolados según alpha. Los que quedan enteros fuera de
+        la pantalla (recién aparecidos o ya de salida) se descartan en
+        bloque antes de armar la lista.
+        """
+        sim = sim or self.sim
+        store = sim.planes
+        live = store.live()
+        lefts = store.interpolated_left(sim.last_dt * (1.0 - alpha), live)
+        tops = store.top[live]
+        visible = ((lefts < self.width) & (lefts + store.width[live] > 0) &
+                   (tops < self.height) & (tops + store.height[live] > 0))
+        lanes = live[0][visible]
+        sprites = []
+        for type_id, direction, left, top in zip(store.type_id[lanes, live[1][visible]].tolist(),
+                                                 store.lane_direction[lanes].tolist(),
+                                                 lefts[visible].tolist(),
+                                                 tops[visible].tolist()):
+            image = PlaneImages.get(PLANE_TYPES[type_id], direction)
+            sprites.append((image, image.get_rect(topleft=(left, top))))
+        return sprites
+    
+    def _draw_planes(self, alpha: float):
+        """Dibuja los aviones visibles con una sola llamada a `blits`."""
+        self.screen.blits(self._plane_sprites(alpha), doreturn=False)
+    
+    def _get_static_layer(self) -> pygame.Surface:
+        """
+        Fondo con las zonas, la etiqueta "META!" y las líneas de carril ya
+        compuestos en una sola superficie. Sólo se reconstruye si cambian el
+        tamaño de pantalla, `numLanes` o `laneHeight`.
+        """
+        key = (self.screen.get_size(), self.config['numLanes'],
+               self.config['laneHeight'])
+        if self._static_layer is None or key != self._static_key:
+            layer = self.background.copy()
+            self.ui.draw_safe_zone(self.height - self.safe_zone_height,
+                                   self.safe_zone_height, layer)
+            self.ui.draw_finish_zone(self.finish_zone_y, self.finish_zone_height,
+                                     layer)
             for lane in self.lanes:
                 y = lane.y
-                pygame.draw.line(self.screen, (100, 100, 100, 100), 
-                               (0, y - lane.height // 2), 
+                pygame.draw.line(layer, (100, 100, 100, 100),
+                               (0, y - lane.height // 2),
                                (self.width, y - lane.height // 2), 1)
+            self._static_layer = layer
+            self._static_key = key
+        return self._static_layer
+    
+    def _draw_dirty(self, alpha: float) -> Optional[List[pygame.Rect]]:
+        """
+        Dibuja la partida restaurando sólo las regiones que cambiaron desde
+        el frame anterior. Retorna los rectángulos a actualizar en pantalla,
+        o None si hubo que redibujar todo.
+        """
+        tracker = self.dirty
+        if self.state != tracker.state:
+            tracker.state = self.state
+            tracker.invalidate()
+        
+        if not tracker.full_redraw and self.state != self.STATE_PLAYING:
+            # Menú, pausa y Game Over no cambian hasta el siguiente estado
+            return []
+        
+        prof = self.profiler
+        screen_rect = tracker.screen_rect
+        sprites = self._plane_sprites(alpha)
+        if self.bird is not None:
+            sprites.append((self.bird.image, self.bird.rect.copy()))
+        prof.lap('planes')
+        hud_values = {'score': self.score, 'lives': self.lives,
+                      'record': self.highscore}
+        
+        if tracker.full_redraw:
+            self._draw_full(alpha)
+            tracker.full_redraw = False
+            tracker.sprite_rects = [rect for _, rect in sprites]
+            tracker.hud_values = hud_values
+            tracker.pressing = dict(self.touch_controls.pressing)
+            return None
+        
+        sprite_rects = [rect for _, rect in sprites]
+        dirty = [r.clip(screen_rect) for r in tracker.sprite_rects + sprite_rects]
+        dirty = [r for r in dirty if r.width and r.height]
+        
+        buttons = []
+        for name, rect in self.touch_controls.button_rects().items():
+            pressed = self.touch_controls.pressing[name]
+            if pressed != tracker.pressing.get(name) or rect.collidelist(dirty) != -1:
+                buttons.append(name)
+        button_rects = self.touch_controls.button_rects()
+        dirty.extend(button_rects[name] for name in buttons)
+        
+        fields = []
+        for name, rect in self.ui.hud_field_rects().items():
+            if hud_values[name] != tracker.hud_values.get(name) or rect.collidelist(dirty) != -1:
+                fields.append(name)
+        
+        static = self._get_static_layer()
+        for rect in dirty:
+            self.screen.blit(static, rect, rect)
+        prof.lap('background')
+        
+        self.screen.blits(sprites, doreturn=False)
+        prof.lap('planes')
+        
+        if buttons:
+            self.touch_controls.draw(self.screen, only=buttons)
+        prof.lap('touch')
+        
+        if fields:
+            self.ui.draw_hud_fields(self.score, self.lives, self.highscore, fields)
+            field_rects = self.ui.hud_field_rects()
+            dirty.extend(field_rects[name] for name in fields)
+        prof.lap('hud')
+        
+        tracker.sprite_rects = sprite_rects
+        tracker.hud_values = hud_values
+        tracker.pressing = dict(self.touch_controls.pressing)
+        return dirty
+    
+    def draw(self, alpha: float = 1.0) -> Optional[List[pygame.Rect]]:
+        """
+        Dibuja la escena del juego. `alpha` es la fracción de paso de
+        simulación pendiente (ver FixedTimestep) para interpolar posiciones.
+        
+        Retorna la lista de rectángulos a pasar a `pygame.display.update`,
+        o None si hay que actualizar la pantalla entera.
+        """
+        self.profiler.start()
+        if self.state != self.STATE_PLAYING and not self.demo_active:
+            alpha = 1.0
+        if self.bird is not None:
+            self.bird.rect.topleft = self.sim.bird.interpolated_position(alpha)
+        
+        if self.dirty_rects:
+            if self.demo_active:
+                # La demostración mueve toda la pantalla
+                self.dirty.invalidate()
+            rects = self._draw_dirty(alpha)
+            self.dirty.record(rects)
+        else:
+            self._draw_full(alpha)
+            rects = None
+        
+        if self.show_profile:
+            profile_rect = self._draw_profile()
+            if rects is not None:
+                rects.append(profile_rect)
+        return rects
+    
+    def _draw_profile(self) -> pygame.Rect:
+        """Overlay con p50/p95/p99 por fase; se recalcula cada pocos frames."""
+        refresh = self.profiler.count // self.PROFILE_REFRESH_FRAMES
+        if refresh != self._profile_refresh:
+            self._profile_refresh = refresh
+            self._profile_rows = self.profiler.overlay_rows()
+        rect = self.ui.draw_profile(self._profile_rows)
+        self.profiler.lap('hud')
+        return rect
+    
+    def _draw_full(self, alpha: float):
+        """Dibuja la escena completa."""
+        prof = self.profiler
+        if self.state == self.STATE_MENU:
+            if self.demo is not None:
+                self.screen.blit(self._get_static_layer(), (0, 0))
+                prof.lap('background')
+                self.screen.blits(self._plane_sprites(alpha, self.demo), doreturn=False)
+                self.demo_bird.rect.topleft = self.demo.bird.interpolated_position(alpha)
+                self.screen.blit(self.demo_bird.image, self.demo_bird.rect)
+                prof.lap('planes')
+                self.ui.draw_menu(self.highscore, overlay_alpha=150)
+            else:
+                self.screen.blit(self.background, (0, 0))
+                prof.lap('background')
+                self.ui.draw_menu(self.highscore, loading=not self.assets_ready)
+            prof.lap('hud')
+        
+        elif self.state in [self.STATE_PLAYING, self.STATE_PAUSED]:
+            self.screen.blit(self._get_static_layer(), (0, 0))
+            prof.lap('background')
             
-            for lane in self.lanes:
-                for plane in lane.planes:
-                    self.screen.blit(plane.image, plane.rect)
+            self._draw_planes(alpha)
             
             self.screen.blit(self.bird.image, self.bird.rect)
+            prof.lap('planes')
             
             # Dibujar controles táctiles
             self.touch_controls.draw(self.screen)
+            prof.lap('touch')
             
             self.ui.draw_hud(self.score, self.lives, self.highscore,
                            self.sound_enabled, self.state == self.STATE_PAUSED)
+            prof.lap('hud')
         
         elif self.state == self.STATE_GAME_OVER:
-            self.ui.draw_safe_zone(self.height - self.safe_zone_height,
-                                   self.safe_zone_height)
-            self.ui.draw_finish_zone(self.finish_zone_y, self.finish_zone_height)
+            self.screen.blit(self._get_static_layer(), (0, 0))
+            prof.lap('background')
             
-            for lane in self.lanes:
-                for plane in lane.planes:
-                    self.screen.blit(plane.image, plane.rect)
+            self._draw_planes(alpha)
             
             self.screen.blit(self.bird.image, self.bird.rect)
+            prof.lap('planes')
             
             self.ui.draw_game_over(self.score, self.highscore, self.is_new_record)
+            prof.lap('hud')
 
 
 # ============================================================================
 # FUNCIÓN PRINCIPAL
 # ============================================================================
 
-async def main():
+async def main(seed: Optional[int] = None, record_replays: bool = False,
+               dirty_rects: bool = False, startup_report: bool = False,
+               profile: bool = False):
     """Punto de entrada principal del juego."""
+    report = StartupReport()
     pygame.init()
+    report.mark('pygame.init')
     
     config = load_config()
     
     screen = pygame.display.set_mode((config['screenWidth'], config['screenHeight']))
     pygame.display.set_caption("Birds & Planes")
+    report.mark('ventana')
     
     try:
         icon_path = os.path.join(BASE_DIR, 'assets', 'bird_1.png')
@@ -970,13 +1374,26 @@ async def main():
     clock = pygame.time.Clock()
     FPS = 60
     
-    game = GameScene(screen, config)
+    # La simulación avanza en pasos fijos, independientes del frame rate
+    timestep = FixedTimestep(config['tickRate'])
+    
+    # El menú se muestra de inmediato; el resto de los assets se carga
+    # en segundo plano dentro del mismo loop
+    game = GameScene(screen, config, seed=seed, record_replays=record_replays,
+                     dirty_rects=dirty_rects, defer_assets=True,
+                     show_profile=profile)
+    report.mark('menú')
+    loader = asyncio.ensure_future(game.load_assets(report))
+    first_frame = True
     
     keys_pressed = {}
+    prof = game.profiler
     
     running = True
     while running:
-        dt = clock.tick(FPS) / 1000.0
+        prof.next_frame()
+        frame_time = clock.tick(FPS) / 1000.0
+        prof.lap('sleep')
         
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -989,16 +1406,60 @@ async def main():
                 keys_pressed[event.key] = False
             else:
                 game.handle_event(event)
-        
-        game.update(dt, keys_pressed)
-        game.draw()
-        
-        pygame.display.flip()
-        
+        prof.lap('events')
+        
+        for _ in range(timestep.advance(frame_time)):
+            game.update(timestep.dt, keys_pressed)
+        dirty = game.draw(timestep.alpha)
+        
+        prof.start()
+        if dirty is None:
+            pygame.display.flip()
+        elif dirty:
+            pygame.display.update(dirty)
+        prof.lap('flip')
+        
+        if first_frame:
+            report.mark('primer frame')
+            first_frame = False
+        if loader is not None and loader.done():
+            loader.result()  # propaga errores de carga
+            loader = None
+            if startup_report:
+                print(report.summary())
+        
+        prof.start()
         await asyncio.sleep(0)
+        prof.lap('sleep')
     
+    game.close()
+    if profile:
+        game.dump_profile()
+    if game.dirty_rects:
+        print(game.dirty.summary())
     pygame.quit()
 
 
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Opciones de línea de comandos (ignora las desconocidas, p. ej. de pygbag)."""
+    parser = argparse.ArgumentParser(description="Birds & Planes")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="Semilla de la partida para reproducirla exactamente")
+    parser.add_argument('--record', action='store_true',
+                        help="Grabar cada partida en replays/ (ver replay.py)")
+    parser.add_argument('--dirty-rects', action='store_true',
+                        help="Actualizar sólo las regiones de pantalla que cambian")
+    parser.add_argument('--startup-report', action='store_true',
+                        help="Mostrar cuánto tarda cada etapa del arranque")
+    parser.add_argument('--profile', action='store_true',
+                        help="Mostrar el perfil por fase (F3) y guardarlo en CSV al salir")
+    args, _ = parser.parse_known_args(argv)
+    return args
+
+
 if __name__ == '__main__':
-    asyncio.run(main())
+    args = parse_args()
+    asyncio.run(main(seed=args.seed, record_replays=args.record,
+                     dirty_rects=args.dirty_rects,
+                     startup_report=args.startup_report,
+                     profile=args.profile))
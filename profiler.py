@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Perfilador de frames para Birds & Planes
+========================================
+Mide cuánto tarda cada fase de cada frame (eventos, simulación, dibujo,
+flip y espera) y guarda los últimos N frames en un buffer circular de
+tamaño fijo. No depende de pygame: el overlay se dibuja en main.py.
+
+Uso:
+    profiler = FrameProfiler()
+    profiler.next_frame()        # al empezar cada frame
+    profiler.start()             # reinicia el cronómetro de fases
+    ...                          # trabajo
+    profiler.lap('events')       # suma el tiempo desde start/lap anterior
+
+En el juego: F3 muestra/oculta el overlay, F4 guarda el buffer en CSV
+(profiles/). `python main.py --profile` arranca con el overlay visible y
+guarda el CSV al salir.
+"""
+
+import csv
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Fases de un frame, en el orden en que ocurren
+PHASES = (
+    'sleep',        # clock.tick + asyncio.sleep
+    'events',       # pygame.event.get y handle_event
+    'difficulty',   # Simulation._update_difficulty
+    'bird',         # SimBird.update
+    'lanes',        # Simulation._update_lanes
+    'collisions',   # Simulation._check_collisions
+    'lane_cross',   # Simulation._check_lane_cross
+    'background',   # fondo / capa estática / restaurar regiones sucias
+    'planes',       # aviones y pájaro
+    'touch',        # controles táctiles
+    'hud',          # HUD y menús
+    'flip',         # display.flip / display.update
+)
+
+PERCENTILES = (50, 95, 99)
+
+
+class FrameProfiler:
+    """
+    Tiempos por fase de los últimos `capacity` frames. Cada fila del buffer
+    tiene el tiempo total del frame y el de cada fase, en segundos.
+    """
+
+    def __init__(self, capacity: int = 600):
+        self.capacity = capacity
+        self.samples = np.zeros((capacity, len(PHASES) + 1), dtype=np.float64)
+        self.index = {phase: i + 1 for i, phase in enumerate(PHASES)}
+        self.count = 0          # frames registrados en total
+        self._current = np.zeros(len(PHASES) + 1, dtype=np.float64)
+        self._frame_start: Optional[float] = None
+        self._last = time.perf_counter()
+
+    def next_frame(self):
+        """Cierra el frame en curso (si lo hay) y empieza uno nuevo."""
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            self._current[0] = now - self._frame_start
+            self.samples[self.count % self.capacity] = self._current
+            self.count += 1
+            self._current[:] = 0.0
+        self._frame_start = now
+        self._last = now
+
+    def start(self):
+        """Reinicia el cronómetro de fases (el tiempo previo no se asigna)."""
+        self._last = time.perf_counter()
+
+    def lap(self, phase: str):
+        """Suma a `phase` el tiempo desde el último start/lap."""
+        now = time.perf_counter()
+        self._current[self.index[phase]] += now - self._last
+        self._last = now
+
+    def history(self) -> np.ndarray:
+        """Frames registrados en orden cronológico (el más viejo primero)."""
+        n = min(self.count, self.capacity)
+        if self.count <= self.capacity:
+            return self.samples[:n]
+        start = self.count % self.capacity
+        return np.concatenate((self.samples[start:], self.samples[:start]))
+
+    def percentiles(self, q: Sequence[float] = PERCENTILES) -> Dict[str, List[float]]:
+        """Percentiles en ms del frame ('frame') y de cada fase."""
+        data = self.history()
+        if not len(data):
+            return {}
+        values = np.percentile(data, q, axis=0) * 1000.0
+        result = {'frame': values[:, 0].tolist()}
+        for phase, i in self.index.items():
+            result[phase] = values[:, i].tolist()
+        return result
+
+    def overlay_rows(self) -> List[List[str]]:
+        """Tabla para el overlay: fila de encabezado y p50/p95/p99 en ms."""
+        stats = self.percentiles()
+        rows = [['ms'] + [f"p{q}" for q in PERCENTILES]]
+        for name in ('frame',) + PHASES:
+            values = stats.get(name)
+            if values is None:
+                rows.append([name] + ['-'] * len(PERCENTILES))
+            else:
+                rows.append([name] + [f"{v:.2f}" for v in values])
+        return rows
+
+    def dump_csv(self, path: str) -> int:
+        """Guarda el buffer en CSV (ms por fase). Retorna las filas escritas."""
+        data = self.history()
+        first = self.count - len(data)
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(('frame', 'total') + PHASES)
+            for i, row in enumerate(data):
+                writer.writerow([first + i] + [f"{v * 1000.0:.4f}" for v in row])
+        return len(data)
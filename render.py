@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+render.py
+=========
+Dibujo sin ventana de Birds & Planes, para bots que aprenden de píxeles y
+para pruebas de regresión visual.
+
+`OffscreenRenderer` dibuja una `GameScene` sobre una superficie fuera de
+pantalla y la copia, reducida a la resolución pedida, a una superficie
+propia. Cada frame se entrega como una vista NumPy (alto, ancho, RGB) de
+los píxeles de esa superficie propia, sin copiar; con `out=` se copia a un
+arreglo del llamador, que puede reutilizarse en todos los pasos.
+
+Uso:
+    scene = make_offscreen_scene(seed=1)
+    renderer = OffscreenRenderer(scene, size=(160, 120))
+    scene.update(dt, input_to_keys(INPUT_UP))
+    frame = renderer.render()                 # vista, sin copia
+
+    python render.py --frames 600 --size 160x120        # mide frames/s
+    python render.py --frames 300 --save frames.npy     # guarda los frames
+"""
+
+import os
+
+# Sin ventana ni audio: debe fijarse antes de iniciar el display
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import argparse
+import random
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pygame
+
+from main import GameScene, input_to_keys
+from simulation import load_config
+from telemetry import bot_inputs
+
+
+def make_offscreen_scene(config: Optional[Dict] = None,
+                         seed: Optional[int] = None) -> GameScene:
+    """
+    Escena en juego dibujando sobre una superficie propia (no la pantalla),
+    con los assets cargados, sin sonido y sin guardar récords.
+    """
+    config = dict(config if config is not None else load_config())
+    config['soundEnabled'] = False
+    config['dirtyRects'] = False
+    config['recordReplays'] = False
+
+    pygame.init()
+    if pygame.display.get_surface() is None:
+        # convert()/convert_alpha() necesitan un modo de video; con el
+        # driver "dummy" no se abre ninguna ventana
+        pygame.display.set_mode((1, 1))
+    surface = pygame.Surface((config['screenWidth'], config['screenHeight']))
+
+    scene = GameScene(surface, config, seed=seed, persist_highscore=False)
+    scene._reset_game()
+    scene.state = GameScene.STATE_PLAYING
+    return scene
+
+
+class OffscreenRenderer:
+    """
+    Dibuja `scene` y la reduce a `size` (por defecto, el tamaño de la
+    escena). `frame` es una vista (alto, ancho, 3) de la superficie
+    reducida que se crea una sola vez: cada `render` la actualiza en el
+    lugar, así que conserva el frame anterior sólo quien lo copie.
+
+    También a tamaño nativo se copia a la superficie propia (scale al mismo
+    tamaño copia los píxeles tal cual): pixels3d deja bloqueada la
+    superficie que mira, y la de la escena tiene que quedar libre para que
+    `scene.draw` dibuje en ella.
+    """
+
+    def __init__(self, scene: GameScene, size: Optional[Tuple[int, int]] = None,
+                 smooth: bool = False):
+        self.scene = scene
+        self.size = tuple(size) if size else scene.screen.get_size()
+        self.smooth = smooth
+        self.target = pygame.Surface(self.size, 0, scene.screen)
+        # pixels3d deja `target` bloqueada mientras exista la vista; sólo se
+        # escribe con transform.scale, que admite superficies bloqueadas
+        self.frame = pygame.surfarray.pixels3d(self.target).transpose(1, 0, 2)
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        width, height = self.size
+        return height, width, 3
+
+    def render(self, alpha: float = 1.0, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Dibuja el estado actual y retorna `frame`, o lo copia a `out`
+        (uint8 con forma `shape`) y retorna `out`.
+        """
+        self.scene.draw(alpha)
+        scale = pygame.transform.smoothscale if self.smooth else pygame.transform.scale
+        scale(self.scene.screen, self.size, self.target)
+        if out is None:
+            return self.frame
+        np.copyto(out, self.frame)
+        return out
+
+
+def parse_size(text: str) -> Tuple[int, int]:
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def main(argv=None):
+    """Juega con el bot de telemetry.py y mide frames/s del dibujo sin ventana."""
+    parser = argparse.ArgumentParser(description="Dibujo sin ventana de Birds & Planes")
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--size', type=parse_size, default=(160, 120),
+                        help="resolución de salida, ANCHOxALTO")
+    parser.add_argument('--smooth', action='store_true',
+                        help="reducir con smoothscale en lugar de scale")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help="guardar los frames en este .npy")
+    args = parser.parse_args(argv)
+
+    scene = make_offscreen_scene(seed=args.seed)
+    renderer = OffscreenRenderer(scene, args.size, smooth=args.smooth)
+    frames = np.zeros((args.frames,) + renderer.shape, dtype=np.uint8) if args.save else None
+
+    rng = random.Random(args.seed)
+    dt = 1.0 / scene.config['tickRate']
+    inputs = 0
+    start = time.perf_counter()
+    for i in range(args.frames):
+        if i % 15 == 0:
+            inputs = bot_inputs(rng)
+        scene.update(dt, input_to_keys(inputs))
+        if scene.state == GameScene.STATE_GAME_OVER:
+            scene._reset_game()
+            scene.state = GameScene.STATE_PLAYING
+        if frames is not None:
+            renderer.render(out=frames[i])
+        else:
+            renderer.render()
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.frames} frames de {args.size[0]}x{args.size[1]} en {elapsed:.2f} s "
+          f"({args.frames / elapsed:.0f} frames/s)")
+    if frames is not None:
+        np.save(args.save, frames)
+        print(f"Frames guardados en {args.save}")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
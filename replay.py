@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+replay.py
+=========
+Grabación y reproducción de partidas de Birds & Planes.
+
+Una partida queda determinada por su semilla y por la entrada de cada paso
+de simulación (ver `Simulation`), así que basta guardar eso. El archivo
+(.bpr) es binario y compacto:
+
+    cabecera     magic, versión, semilla, pasos, resultado final, config
+    entradas     pares (bits de entrada, repeticiones) en varint (RLE)
+    índice       (paso, tamaño) de cada keyframe
+    keyframes    estado completo de la simulación cada N pasos (zlib)
+
+Los keyframes permiten saltar a cualquier paso restaurando el más cercano
+anterior y simulando sólo lo que falta. Reproducir una partida entera, en
+cambio, la simula desde el paso 0 y compara cada keyframe que atraviesa:
+así se detecta una divergencia en cualquier punto de la partida.
+
+Uso:
+    python replay.py replays/*.bpr             # reproduce, verifica y mide velocidad
+    python replay.py partida.bpr --seek 3600   # estado en el paso 3600
+"""
+
+import argparse
+import bisect
+import glob
+import json
+import math
+import struct
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from simulation import Simulation, PlaneStore
+
+# ============================================================================
+# FORMATO
+# ============================================================================
+
+MAGIC = b'BPRP'
+# Se lee sólo la versión actual: un cambio del formato la incrementa
+VERSION = 1
+
+# magic, versión, intervalo de keyframes, semilla, pasos, puntos, vidas,
+# longitud del config JSON
+HEADER = struct.Struct('<4sHIqIiiI')
+KEYFRAME_ENTRY = struct.Struct('<II')
+
+# semilla, puntos, vidas, game_over, game_time, dificultad, último dt,
+# pájaro (x, y, prev_x, prev_y, last_lane)
+STATE_SCALARS = struct.Struct('<qiiBddd5i')
+
+DEFAULT_KEYFRAME_INTERVAL = 600
+
+# Tipos de los arreglos de PlaneStore, en el orden de PlaneStore._FIELDS
+_PLANE_DTYPES = [
+    ('lane', np.int32), ('x', np.float64), ('left', np.int64),
+    ('top', np.int64), ('width', np.int64), ('height', np.int64),
+    ('speed', np.float64), ('direction', np.int64),
+    ('velocity', np.float64), ('type_id', np.int8),
+]
+assert tuple(name for name, _ in _PLANE_DTYPES) == PlaneStore._FIELDS
+
+
+def _write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def encode_inputs(inputs: np.ndarray) -> bytes:
+    """Codifica los bits de entrada por paso como pares (valor, repeticiones)."""
+    out = bytearray()
+    if len(inputs) == 0:
+        return bytes(out)
+    # Inicio de cada tramo de valores iguales
+    starts = np.flatnonzero(np.diff(inputs.astype(np.int16), prepend=-1))
+    lengths = np.diff(starts, append=len(inputs))
+    for value, length in zip(inputs[starts].tolist(), lengths.tolist()):
+        out.append(value)
+        _write_varint(out, length)
+    return bytes(out)
+
+
+def decode_inputs(data: bytes) -> np.ndarray:
+    """Inverso de `encode_inputs`."""
+    values, lengths = [], []
+    pos = 0
+    while pos < len(data):
+        values.append(data[pos])
+        length, pos = _read_varint(data, pos + 1)
+        lengths.append(length)
+    return np.repeat(np.array(values, dtype=np.uint8), lengths)
+
+
+def pack_state(state: Dict) -> bytes:
+    """Serializa (y comprime) un estado de `Simulation.get_state`."""
+    version, internal, gauss_next = state['rng']
+    parts = [
+        STATE_SCALARS.pack(state['seed'], state['score'], state['lives'],
+                           state['game_over'], state['game_time'],
+                           state['difficulty_multiplier'], state['last_dt'],
+                           *state['bird']),
+        struct.pack('<idI', version,
+                    math.nan if gauss_next is None else gauss_next,
+                    len(internal)),
+        np.array(internal, dtype=np.uint32).tobytes(),
+        struct.pack('<I', len(state['crossed_lanes'])),
+        np.array(state['crossed_lanes'], dtype=np.int32).tobytes(),
+        struct.pack('<dI', state['spawn_clock'], len(state['spawn_due'])),
+        state['spawn_due'].astype(np.float64).tobytes(),
+        struct.pack('<I', len(state['planes']['lane'])),
+    ]
+    for name, dtype in _PLANE_DTYPES:
+        parts.append(state['planes'][name].astype(dtype).tobytes())
+    return zlib.compress(b''.join(parts))
+
+
+def unpack_state(blob: bytes) -> Dict:
+    """Inverso de `pack_state`."""
+    data = zlib.decompress(blob)
+    pos = 0
+
+    def take(n: int) -> bytes:
+        nonlocal pos
+        chunk = data[pos:pos + n]
+        pos += n
+        return chunk
+
+    def take_array(dtype, count: int) -> np.ndarray:
+        dtype = np.dtype(dtype)
+        return np.frombuffer(take(dtype.itemsize * count), dtype=dtype).copy()
+
+    (seed, score, lives, game_over, game_time, difficulty, last_dt,
+     *bird) = STATE_SCALARS.unpack(take(STATE_SCALARS.size))
+    version, gauss_next, n_internal = struct.unpack('<idI', take(16))
+    internal = tuple(take_array(np.uint32, n_internal).tolist())
+    n_crossed, = struct.unpack('<I', take(4))
+    crossed = take_array(np.int32, n_crossed).tolist()
+    spawn_clock, = struct.unpack('<d', take(8))
+    n_lanes, = struct.unpack('<I', take(4))
+    spawn_due = take_array(np.float64, n_lanes)
+    n_planes, = struct.unpack('<I', take(4))
+    planes = {name: take_array(dtype, n_planes) for name, dtype in _PLANE_DTYPES}
+
+    return {
+        'seed': seed,
+        'rng': (version, internal, None if math.isnan(gauss_next) else gauss_next),
+        'score': score,
+        'lives': lives,
+        'game_over': bool(game_over),
+        'game_time': game_time,
+        'difficulty_multiplier': difficulty,
+        'last_dt': last_dt,
+        'bird': tuple(bird),
+        'crossed_lanes': crossed,
+        'spawn_clock': spawn_clock,
+        'spawn_due': spawn_due,
+        'planes': planes,
+    }
+
+
+# ============================================================================
+# REPLAY
+# ============================================================================
+
+class Replay:
+    """Una partida grabada: semilla, config, entradas por paso y keyframes."""
+
+    def __init__(self, seed: int, config: Dict, inputs: np.ndarray,
+                 keyframes: List[Tuple[int, bytes]],
+                 keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL,
+                 final_score: int = 0, final_lives: int = 0):
+        self.seed = seed
+        self.config = config
+        self.inputs = inputs
+        self.keyframes = keyframes
+        self.keyframe_ticks = [tick for tick, _ in keyframes]
+        self.keyframe_interval = keyframe_interval
+        self.final_score = final_score
+        self.final_lives = final_lives
+
+    @property
+    def ticks(self) -> int:
+        return len(self.inputs)
+
+    def to_bytes(self) -> bytes:
+        config_data = json.dumps(self.config, separators=(',', ':')).encode('utf-8')
+        input_data = encode_inputs(self.inputs)
+        parts = [
+            HEADER.pack(MAGIC, VERSION, self.keyframe_interval, self.seed,
+                        self.ticks, self.final_score, self.final_lives,
+                        len(config_data)),
+            config_data,
+            struct.pack('<I', len(input_data)),
+            input_data,
+            struct.pack('<I', len(self.keyframes)),
+        ]
+        for tick, blob in self.keyframes:
+            parts.append(KEYFRAME_ENTRY.pack(tick, len(blob)))
+        for _, blob in self.keyframes:
+            parts.append(blob)
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Replay':
+        (magic, version, interval, seed, ticks, score, lives,
+         config_len) = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError("No es un replay de Birds & Planes")
+        if version != VERSION:
+            raise ValueError(f"Replay en la versión {version} del formato "
+                             f"(se admite sólo la {VERSION})")
+        pos = HEADER.size
+        config = json.loads(data[pos:pos + config_len].decode('utf-8'))
+        pos += config_len
+
+        input_len, = struct.unpack_from('<I', data, pos)
+        pos += 4
+        inputs = decode_inputs(data[pos:pos + input_len])
+        pos += input_len
+        if len(inputs) != ticks:
+            raise ValueError("Replay corrupto: número de pasos incorrecto")
+
+        n_keyframes, = struct.unpack_from('<I', data, pos)
+        pos += 4
+        entries = [KEYFRAME_ENTRY.unpack_from(data, pos + i * KEYFRAME_ENTRY.size)
+                   for i in range(n_keyframes)]
+        pos += n_keyframes * KEYFRAME_ENTRY.size
+        keyframes = []
+        for tick, length in entries:
+            keyframes.append((tick, data[pos:pos + length]))
+            pos += length
+
+        return cls(seed, config, inputs, keyframes, interval, score, lives)
+
+    def save(self, path: str):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> 'Replay':
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+
+class ReplayRecorder:
+    """
+    Graba una partida. Llamar a `record` con la entrada de cada paso justo
+    antes de `Simulation.step`, y a `finish` al terminar.
+    """
+
+    def __init__(self, sim: Simulation,
+                 keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL):
+        self.seed = sim.seed
+        self.config = dict(sim.config)
+        self.keyframe_interval = keyframe_interval
+        self.inputs = bytearray()
+        self.keyframes: List[Tuple[int, bytes]] = []
+
+    def record(self, sim: Simulation, inputs: int):
+        tick = len(self.inputs)
+        if tick and tick % self.keyframe_interval == 0:
+            self.keyframes.append((tick, pack_state(sim.get_state())))
+        self.inputs.append(inputs)
+
+    def finish(self, sim: Simulation) -> Replay:
+        return Replay(self.seed, self.config,
+                      np.frombuffer(bytes(self.inputs), dtype=np.uint8),
+                      self.keyframes, self.keyframe_interval,
+                      sim.score, sim.lives)
+
+
+def _keyframe_matches(sim: Simulation, blob: bytes) -> bool:
+    """
+    True si el estado completo de `sim` (incluidos todos los aviones, en
+    pantalla o no, y el generador aleatorio) es el que guardó el keyframe.
+    """
+    return pack_state(sim.get_state()) == blob
+
+
+class ReplayPlayer:
+    """
+    Reproduce un `Replay` sin ventana, con salto a cualquier paso.
+    `stepped` cuenta los pasos realmente simulados (sin los que se saltaron
+    restaurando un keyframe).
+    """
+
+    def __init__(self, replay: Replay):
+        self.replay = replay
+        self.dt = 1.0 / replay.config['tickRate']
+        self.sim = Simulation(replay.config, seed=replay.seed)
+        self.tick = 0
+        self.stepped = 0
+
+    def seek(self, tick: int) -> Simulation:
+        """Deja la simulación en el estado previo al paso `tick`."""
+        tick = max(0, min(tick, self.replay.ticks))
+        k = bisect.bisect_right(self.replay.keyframe_ticks, tick) - 1
+        if k >= 0:
+            key_tick, blob = self.replay.keyframes[k]
+            if tick < self.tick or key_tick > self.tick:
+                self.sim.set_state(unpack_state(blob))
+                self.tick = key_tick
+        elif tick < self.tick:
+            self.sim.reset(self.replay.seed)
+            self.tick = 0
+
+        sim = self.sim
+        dt = self.dt
+        for inputs in self.replay.inputs[self.tick:tick].tolist():
+            sim.step(dt, inputs)
+        self.stepped += tick - self.tick
+        self.tick = tick
+        return sim
+
+    def run(self, check_keyframes: bool = True) -> Simulation:
+        """
+        Reproduce la partida entera desde el paso 0 (sin restaurar
+        keyframes). Con `check_keyframes`, compara el estado con cada
+        keyframe al pasar por él; los pasos que no coinciden quedan en
+        `mismatched_keyframes`.
+        """
+        replay = self.replay
+        sim = self.sim
+        dt = self.dt
+        sim.reset(replay.seed)
+        self.mismatched_keyframes: List[int] = []
+
+        tick = 0
+        keyframes = replay.keyframes if check_keyframes else []
+        for key_tick, blob in keyframes + [(replay.ticks, None)]:
+            for inputs in replay.inputs[tick:key_tick].tolist():
+                sim.step(dt, inputs)
+            self.stepped += key_tick - tick
+            tick = key_tick
+            if blob is not None and not _keyframe_matches(sim, blob):
+                self.mismatched_keyframes.append(key_tick)
+        self.tick = tick
+        return sim
+
+
+# ============================================================================
+# LÍNEA DE COMANDOS
+# ============================================================================
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Reproduce replays de Birds & Planes")
+    parser.add_argument('paths', nargs='+', help="Archivos .bpr (admite comodines)")
+    parser.add_argument('--seek', type=int, default=None,
+                        help="Paso al que saltar en lugar de reproducir entero")
+    args = parser.parse_args(argv)
+
+    paths = [p for pattern in args.paths for p in sorted(glob.glob(pattern))]
+    total_ticks = 0
+    total_seconds = 0.0
+    mismatches = 0
+    start = time.perf_counter()
+
+    for path in paths:
+        replay = Replay.load(path)
+        player = ReplayPlayer(replay)
+        if args.seek is not None:
+            sim = player.seek(args.seek)
+            total_ticks += player.stepped
+            total_seconds += player.stepped * player.dt
+            print(f"{path}: paso {player.tick} puntos={sim.score} vidas={sim.lives} "
+                  f"({player.stepped} pasos simulados)")
+            continue
+
+        sim = player.run()
+        total_ticks += player.stepped
+        total_seconds += player.stepped * player.dt
+        ok = (sim.score, sim.lives) == (replay.final_score, replay.final_lives)
+        ok = ok and not player.mismatched_keyframes
+        mismatches += not ok
+        detail = ''
+        if player.mismatched_keyframes:
+            detail = f" (primer keyframe distinto: paso {player.mismatched_keyframes[0]})"
+        print(f"{path}: {replay.ticks} pasos puntos={sim.score} vidas={sim.lives}"
+              f"{'' if ok else '  ¡NO COINCIDE con la grabación!' + detail}")
+
+    elapsed = time.perf_counter() - start
+    if elapsed > 0 and total_ticks:
+        print(f"{len(paths)} replays, {total_ticks} pasos en {elapsed:.2f} s "
+              f"({total_ticks / elapsed:.0f} pasos/s, "
+              f"x{total_seconds / elapsed:.0f} tiempo real)")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Récords y tabla de partidas de Birds & Planes
+=============================================
+`highscore.json` guarda el récord; `leaderboard.sqlite3` guarda cada
+partida terminada (puntaje, duración, semilla y huella de la
+configuración) con índices para pedir las N mejores sin recorrer la tabla.
+
+El juego no escribe en disco desde el game loop: `ScoreWriter` encola los
+pedidos y un hilo aparte los escribe. El récord se reemplaza de forma
+atómica (archivo temporal + `os.replace`, y fsync del archivo y del
+directorio), así que un corte a mitad de escritura deja el archivo
+anterior intacto. Donde no hay hilos (la versión
+web) escribe en el momento.
+
+Uso:
+    python scores.py                  # 10 mejores con la configuración actual
+    python scores.py --top 20 --all   # de todas las configuraciones
+"""
+
+import argparse
+import json
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from typing import List, NamedTuple, Optional
+
+try:
+    import sqlite3
+except ImportError:      # algunas compilaciones web de Python no lo traen
+    sqlite3 = None
+
+from simulation import config_hash, load_config
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HIGHSCORE_PATH = os.path.join(BASE_DIR, 'highscore.json')
+LEADERBOARD_PATH = os.path.join(BASE_DIR, 'leaderboard.sqlite3')
+
+# En el navegador (pygbag) no se pueden crear hilos
+THREADS_AVAILABLE = sys.platform != 'emscripten'
+
+
+# ============================================================================
+# RÉCORD
+# ============================================================================
+
+def load_highscore(path: str = HIGHSCORE_PATH) -> int:
+    """Carga el highscore desde highscore.json."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+            return data.get('highscore', 0)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return 0
+
+
+def write_json_atomic(path: str, data) -> None:
+    """
+    Escribe `data` en un temporal del mismo directorio y lo renombra sobre
+    `path`: quien lea el archivo ve el contenido viejo o el nuevo, nunca
+    uno a medias. Después sincroniza el directorio para que el renombrado
+    también sobreviva a un corte de luz.
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    _fsync_directory(directory)
+
+
+def _fsync_directory(directory: str) -> None:
+    """fsync de un directorio; Windows no permite abrirlos y ahí se omite."""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def save_highscore(score: int, path: str = HIGHSCORE_PATH) -> bool:
+    """Guarda el highscore en highscore.json (escritura atómica)."""
+    try:
+        write_json_atomic(path, {'highscore': score})
+        return True
+    except OSError as e:
+        print(f"Error al guardar highscore: {e}")
+        return False
+
+
+# ============================================================================
+# TABLA DE PARTIDAS
+# ============================================================================
+
+class RunRecord(NamedTuple):
+    """Una partida terminada."""
+    score: int
+    duration: float         # segundos de juego
+    seed: int
+    config_hash: str        # simulation.config_hash de la configuración
+    played_at: float        # time.time() al terminar
+
+
+class Leaderboard:
+    """
+    Partidas en SQLite. Los índices siguen el orden de `top` (puntaje
+    descendente y, a igual puntaje, la más antigua primero), así que pedir
+    las N mejores lee sólo N filas aunque haya millones.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY,
+            score INTEGER NOT NULL,
+            duration REAL NOT NULL,
+            seed INTEGER,
+            config_hash TEXT NOT NULL,
+            played_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS runs_by_score
+            ON runs (score DESC, played_at);
+        CREATE INDEX IF NOT EXISTS runs_by_config_score
+            ON runs (config_hash, score DESC, played_at);
+    """
+
+    def __init__(self, path: str = LEADERBOARD_PATH):
+        if sqlite3 is None:
+            raise RuntimeError("sqlite3 no está disponible")
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        # WAL: las lecturas (p. ej. `python scores.py`) no bloquean al juego
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(self.SCHEMA)
+
+    def add_runs(self, runs: List[RunRecord]):
+        """Inserta varias partidas en una sola transacción."""
+        with self.conn:
+            self.conn.executemany(
+                'INSERT INTO runs (score, duration, seed, config_hash, played_at) '
+                'VALUES (?, ?, ?, ?, ?)', runs)
+
+    def top(self, n: int = 10, config: Optional[str] = None) -> List[RunRecord]:
+        """Las `n` mejores partidas, de una configuración o de todas."""
+        columns = 'score, duration, seed, config_hash, played_at'
+        if config is None:
+            rows = self.conn.execute(
+                f'SELECT {columns} FROM runs ORDER BY score DESC, played_at LIMIT ?',
+                (n,))
+        else:
+            rows = self.conn.execute(
+                f'SELECT {columns} FROM runs WHERE config_hash = ? '
+                'ORDER BY score DESC, played_at LIMIT ?', (config, n))
+        return [RunRecord(*row) for row in rows]
+
+    def count(self, config: Optional[str] = None) -> int:
+        if config is None:
+            row = self.conn.execute('SELECT COUNT(*) FROM runs').fetchone()
+        else:
+            row = self.conn.execute('SELECT COUNT(*) FROM runs WHERE config_hash = ?',
+                                    (config,)).fetchone()
+        return row[0]
+
+    def close(self):
+        self.conn.close()
+
+
+# ============================================================================
+# ESCRITURA EN SEGUNDO PLANO
+# ============================================================================
+
+_STOP = object()
+
+
+class ScoreWriter:
+    """
+    Cola de escrituras atendida por un hilo. `save_highscore` y
+    `record_run` sólo encolan y vuelven enseguida; el hilo junta lo que
+    haya pendiente, escribe el último récord y agrega las partidas en una
+    transacción. La conexión SQLite vive en ese hilo.
+
+    Sin hilos (`threaded=False` o la versión web) escribe en el momento.
+    """
+
+    def __init__(self, highscore_path: str = HIGHSCORE_PATH,
+                 leaderboard_path: Optional[str] = LEADERBOARD_PATH,
+                 threaded: Optional[bool] = None):
+        self.highscore_path = highscore_path
+        self.leaderboard_path = leaderboard_path if sqlite3 is not None else None
+        self.leaderboard: Optional[Leaderboard] = None
+        self.errors = 0
+
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        if threaded is None:
+            threaded = THREADS_AVAILABLE
+        if threaded:
+            self._thread = threading.Thread(target=self._run, name='score-writer',
+                                            daemon=True)
+            self._thread.start()
+
+    def save_highscore(self, score: int):
+        self._submit(('highscore', score))
+
+    def record_run(self, run: RunRecord):
+        self._submit(('run', run))
+
+    def _submit(self, job):
+        if self._thread is not None:
+            self._queue.put(job)
+        else:
+            self._process([job])
+
+    def flush(self):
+        """Espera a que se escriba todo lo encolado hasta ahora."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        """Escribe lo pendiente y termina el hilo."""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+        elif self.leaderboard is not None:
+            self.leaderboard.close()
+            self.leaderboard = None
+
+    def _run(self):
+        while True:
+            jobs = [self._queue.get()]
+            while True:
+                try:
+                    jobs.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(job is _STOP for job in jobs)
+            try:
+                self._process([job for job in jobs if job is not _STOP])
+            except Exception as e:
+                # Un error inesperado no debe matar al hilo: `flush` y
+                # `close` esperan a que se marquen todos los pedidos
+                print(f"Error al guardar récords: {e}")
+                self.errors += 1
+            for _ in jobs:
+                self._queue.task_done()
+            if stop:
+                break
+        if self.leaderboard is not None:
+            self.leaderboard.close()
+            self.leaderboard = None
+
+    def _process(self, jobs: List):
+        # Los récords sólo suben: basta con escribir el último
+        highscores = [value for kind, value in jobs if kind == 'highscore']
+        runs = [value for kind, value in jobs if kind == 'run']
+        # Cada escritura por separado: si falla el récord, las partidas del
+        # mismo lote se guardan igual
+        if highscores:
+            try:
+                saved = save_highscore(highscores[-1], self.highscore_path)
+            except Exception as e:
+                print(f"Error al guardar highscore: {e}")
+                saved = False
+            if not saved:
+                self.errors += 1
+        if runs and self.leaderboard_path is not None:
+            try:
+                if self.leaderboard is None:
+                    self.leaderboard = Leaderboard(self.leaderboard_path)
+                self.leaderboard.add_runs(runs)
+            except Exception as e:
+                print(f"Error al guardar partidas: {e}")
+                self.errors += 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Muestra las mejores partidas guardadas."""
+    parser = argparse.ArgumentParser(description="Mejores partidas de Birds & Planes")
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--all', action='store_true',
+                        help="todas las configuraciones, no sólo la de config.json")
+    parser.add_argument('--db', default=LEADERBOARD_PATH)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"Sin partidas guardadas ({args.db} no existe)")
+        return 0
+    board = Leaderboard(args.db)
+    config = None if args.all else config_hash(load_config())
+    runs = board.top(args.top, config)
+    scope = "todas las configuraciones" if args.all else f"configuración {config}"
+    print(f"{board.count(config)} partidas ({scope}); récord en highscore.json: "
+          f"{load_highscore()}")
+    for rank, run in enumerate(runs, 1):
+        played = time.strftime('%Y-%m-%d %H:%M', time.localtime(run.played_at))
+        print(f"{rank:3}. {run.score:8d} pts  {run.duration:7.1f} s  "
+              f"semilla {run.seed:<10d}  {played}")
+    board.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
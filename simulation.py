@@ -0,0 +1,1180 @@
+#!/usr/bin/env python3
+"""
+simulation.py
+=============
+Núcleo lógico de Birds & Planes: pájaro, carriles, aviones, puntuación,
+vidas y dificultad. No depende de la pantalla, del mezclador de audio ni
+de superficies de Pygame, por lo que puede avanzarse sin ventana (CI,
+balanceo, pruebas de regresión).
+
+`GameScene` (main.py) usa esta simulación y se limita a dibujarla.
+
+Uso sin ventana:
+    python simulation.py --frames 100000
+"""
+
+import argparse
+import bisect
+import hashlib
+import heapq
+import json
+import math
+import os
+import random
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+# ============================================================================
+# CONSTANTES
+# ============================================================================
+
+# Ruta del directorio del script
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Bits de entrada (combinables con |)
+INPUT_UP = 1
+INPUT_DOWN = 2
+INPUT_LEFT = 4
+INPUT_RIGHT = 8
+INPUT_ACTION = 16
+
+# Eventos emitidos por la simulación en cada paso
+EVENT_POINT = 'point'
+EVENT_COLLISION = 'collision'
+EVENT_GAME_OVER = 'game_over'
+
+# Tamaños lógicos (coinciden con los sprites escalados en main.py)
+BIRD_SIZE = (40, 40)
+PLANE_SIZES = {'small': (50, 25), 'med': (70, 35), 'large': (90, 45)}
+PLANE_TYPES = ['small', 'med', 'large']
+PLANE_TYPE_WEIGHTS = [0.5, 0.35, 0.15]
+PLANE_TYPE_IDS = list(range(len(PLANE_TYPES)))
+PLANE_WIDTHS = np.array([PLANE_SIZES[t][0] for t in PLANE_TYPES], dtype=np.int64)
+PLANE_HEIGHTS = np.array([PLANE_SIZES[t][1] for t in PLANE_TYPES], dtype=np.int64)
+PLANE_MAX_WIDTH = int(PLANE_WIDTHS.max())
+PLANE_MAX_HEIGHT = int(PLANE_HEIGHTS.max())
+
+# Geometría fija del tablero
+SAFE_ZONE_HEIGHT = 60
+FINISH_ZONE_Y = 50
+FINISH_ZONE_HEIGHT = 50
+
+
+def load_config() -> Dict:
+    """
+    Carga la configuración desde config.json.
+    Si no existe, usa valores por defecto.
+    """
+    config_path = os.path.join(BASE_DIR, 'config.json')
+    default_config = {
+        "numLanes": 5,
+        "lives": 3,
+        "pointsPerCross": 100,
+        "spawnRate": 1.0,
+        "planeSpeedRange": [150, 320],
+        "difficultyStepEveryXSeconds": 15,
+        "difficultySpeedMultiplier": 1.08,
+        "minSpawnDistancePx": 120,
+        "screenWidth": 800,
+        "screenHeight": 600,
+        "birdSpeed": 200,
+        "laneHeight": 80,
+        "soundEnabled": True,
+        "tickRate": 60,
+        "seed": None,
+        "recordReplays": False,
+        "dirtyRects": False,
+        "warmupSeconds": 0,
+        "attractMode": True
+    }
+    
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            loaded = json.load(f)
+            for key, value in default_config.items():
+                if key not in loaded:
+                    loaded[key] = value
+            return loaded
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"Advertencia: No se pudo cargar config.json ({e}). Usando valores por defecto.")
+        return default_config
+
+
+# Claves que cambian las reglas de la partida (no el sonido ni el dibujo)
+GAMEPLAY_KEYS = (
+    'numLanes', 'lives', 'pointsPerCross', 'spawnRate', 'planeSpeedRange',
+    'difficultyStepEveryXSeconds', 'difficultySpeedMultiplier',
+    'minSpawnDistancePx', 'screenWidth', 'screenHeight', 'birdSpeed',
+    'laneHeight', 'tickRate', 'warmupSeconds',
+)
+
+
+def config_hash(config: Dict) -> str:
+    """
+    Huella corta de las claves de `config` que afectan a la simulación:
+    dos configuraciones con la misma huella juegan igual.
+    """
+    rules = {key: config.get(key) for key in GAMEPLAY_KEYS}
+    text = json.dumps(rules, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+
+def rect_round(value: float) -> int:
+    """
+    Redondea como `pygame.Rect` al asignarle un float: las mitades se
+    alejan del cero (2.5 -> 3, -2.5 -> -3). `round()` las lleva al par
+    (2.5 -> 2), lo que desvía al pájaro cuando `birdSpeed / tickRate`
+    termina en .5.
+    """
+    return int(math.copysign(math.floor(abs(value) + 0.5), value))
+
+
+def rects_overlap(ax: int, ay: int, aw: int, ah: int,
+                  bx: int, by: int, bw: int, bh: int) -> bool:
+    """Intersección AABB con la misma semántica que `pygame.Rect.colliderect`."""
+    return (aw > 0 and ah > 0 and bw > 0 and bh > 0 and
+            ax < bx + bw and bx < ax + aw and
+            ay < by + bh and by < ay + ah)
+
+
+# ============================================================================
+# ENTIDADES
+# ============================================================================
+
+class SimBird:
+    """Estado lógico del pájaro (posición entera, como un `pygame.Rect`)."""
+
+    def __init__(self, x: int, y: int, config: Dict):
+        self.speed = config['birdSpeed']
+        self.width, self.height = BIRD_SIZE
+        self.x = x - self.width // 2
+        self.y = y - self.height // 2
+        self.prev_x, self.prev_y = self.x, self.y
+
+        self.last_lane = -1
+        self.crossed_lanes = set()
+
+    @property
+    def top(self) -> int:
+        return self.y
+
+    @property
+    def bottom(self) -> int:
+        return self.y + self.height
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        return (self.x + self.width // 2, self.y + self.height // 2)
+
+    def update(self, dt: float, inputs: int,
+               screen_width: int, screen_height: int, safe_zone_height: int):
+        """Mueve el pájaro según los bits de entrada."""
+        self.prev_x, self.prev_y = self.x, self.y
+        self.x, self.y = self.next_position(self.x, self.y, dt, inputs, screen_width,
+                                            screen_height, safe_zone_height)
+
+    def next_position(self, x: int, y: int, dt: float, inputs: int,
+                      screen_width: int, screen_height: int,
+                      safe_zone_height: int) -> Tuple[int, int]:
+        """
+        Posición tras un paso desde (x, y) con los bits de entrada dados,
+        sin mover el pájaro. Es la regla de `update`; el piloto automático
+        la usa para predecir dónde quedará.
+        """
+        dx, dy = 0, 0
+        if inputs & INPUT_LEFT:
+            dx = -self.speed * dt
+        if inputs & INPUT_RIGHT:
+            dx = self.speed * dt
+        if inputs & INPUT_UP:
+            dy = -self.speed * dt
+        if inputs & INPUT_DOWN:
+            dy = self.speed * dt
+
+        # pygame.Rect redondea las coordenadas al asignar floats
+        x = rect_round(x + dx)
+        y = rect_round(y + dy)
+
+        x = max(0, min(x, screen_width - self.width))
+        y = max(0, min(y, screen_height - self.height))
+
+        max_bottom = screen_height - safe_zone_height + self.height
+        if y + self.height > max_bottom:
+            y = max_bottom - self.height
+        return x, y
+
+    def reset_position(self, x: int, y: int):
+        """Resetea la posición del pájaro."""
+        self.x = x - self.width // 2
+        self.y = y - self.height // 2
+        self.prev_x, self.prev_y = self.x, self.y
+        self.crossed_lanes.clear()
+        self.last_lane = -1
+
+    def interpolated_position(self, alpha: float) -> Tuple[int, int]:
+        """Posición entre el paso anterior (alpha=0) y el actual (alpha=1)."""
+        return (rect_round(self.prev_x + (self.x - self.prev_x) * alpha),
+                rect_round(self.prev_y + (self.y - self.prev_y) * alpha))
+
+
+class SimLane:
+    """Geometría lógica de un carril donde aparecen aviones."""
+
+    def __init__(self, index: int, y: int, height: int, direction: int,
+                 screen_width: int):
+        self.index = index
+        self.y = y
+        self.height = height
+        self.direction = direction
+        self.screen_width = screen_width
+
+    @property
+    def top(self) -> int:
+        return self.y - self.height // 2
+
+
+class LaneGeometry(NamedTuple):
+    """
+    Geometría de todos los carriles, calculada una vez en `_create_lanes`.
+    Tuplas indexadas por carril; `top` y `bottom` son crecientes, lo que
+    permite ubicar una coordenada y con `bisect`.
+    """
+    y: Tuple[int, ...]
+    top: Tuple[int, ...]
+    bottom: Tuple[int, ...]         # top + height (exclusivo)
+    height: int
+    direction: Tuple[int, ...]
+
+
+# ============================================================================
+# ALMACÉN DE AVIONES
+# ============================================================================
+
+class PlaneStore:
+    """
+    Aviones de todos los carriles en arreglos NumPy de forma
+    (carriles, ranuras).
+
+    Cada fila es un buffer circular con los aviones del carril en orden de
+    aparición: `head[i]` es la ranura del más antiguo y `size[i]` cuántos
+    hay. Crear un avión escribe en la ranura siguiente al último y retirar
+    avanza la cabeza, ambos O(1) y sin crear objetos; las ranuras se
+    reutilizan. `alive` marca las ranuras ocupadas. Mover y retirar se hace
+    en bloque para todos los carriles a la vez.
+
+    Los aviones salen de pantalla en el orden en que entraron salvo cuando
+    uno más rápido adelanta a otro: en ese caso el que ya salió espera fuera
+    de pantalla (sin poder chocar ni verse) hasta llegar a la cabeza.
+
+    Índice por x: `by_x[i, :size[i]]` son las ranuras del carril `i`
+    ordenadas por `left` y `left_by_x` sus `left` en ese orden, para ubicar
+    con búsqueda binaria los aviones que tocan un intervalo horizontal
+    (`overlaps`). Crear y retirar insertan o quitan una entrada; al mover
+    sólo se reordenan los carriles donde un avión adelantó a otro.
+    """
+
+    def __init__(self, lanes: List[SimLane], screen_width: int,
+                 capacity: int = 16):
+        self.screen_width = screen_width
+        self.lane_y = np.array([lane.y for lane in lanes], dtype=np.int64)
+        self.lane_direction = np.array([lane.direction for lane in lanes],
+                                       dtype=np.int64)
+        self.num_lanes = len(lanes)
+        self._rows = np.arange(self.num_lanes)
+
+        self.count = 0
+        self.capacity = 0
+        self.head = np.zeros(self.num_lanes, dtype=np.int64)
+        self.size = np.zeros(self.num_lanes, dtype=np.int64)
+        shape = (self.num_lanes, 0)
+        self.alive = np.zeros(shape, dtype=bool)
+        self.x = np.zeros(shape, dtype=np.float64)
+        self.left = np.zeros(shape, dtype=np.int64)
+        self.top = np.zeros(shape, dtype=np.int64)
+        self.width = np.zeros(shape, dtype=np.int64)
+        self.height = np.zeros(shape, dtype=np.int64)
+        self.speed = np.zeros(shape, dtype=np.float64)
+        self.velocity = np.zeros(shape, dtype=np.float64)
+        self.type_id = np.zeros(shape, dtype=np.int8)
+        # Distancia al borde de entrada = direction * left + entry_offset
+        # (0 o screen_width - width según el sentido del carril)
+        self.entry_offset = np.zeros(shape, dtype=np.int64)
+        self.by_x = np.zeros(shape, dtype=np.int64)
+        self.left_by_x = np.zeros(shape, dtype=np.int64)
+        self._grow(capacity)
+
+    # Campos del estado plano (get_state/set_state), uno por avión
+    _FIELDS = ('lane', 'x', 'left', 'top', 'width', 'height',
+               'speed', 'direction', 'velocity', 'type_id')
+    # Arreglos (carriles, ranuras)
+    _SLOT_FIELDS = ('alive', 'x', 'left', 'top', 'width', 'height',
+                    'speed', 'velocity', 'type_id', 'entry_offset')
+
+    def _grow(self, capacity: int):
+        """
+        Amplía las ranuras por carril (potencia de 2) desenrollando cada
+        buffer para que su cabeza quede en la ranura 0.
+        """
+        capacity = 1 << max(capacity - 1, 1).bit_length()
+        order = (self.head[:, None] + np.arange(self.capacity)) % max(self.capacity, 1)
+        for name in self._SLOT_FIELDS:
+            old = getattr(self, name)
+            new = np.zeros((self.num_lanes, capacity), dtype=old.dtype)
+            new[:, :self.capacity] = np.take_along_axis(old, order, axis=1)
+            setattr(self, name, new)
+        self.head[:] = 0
+        self.capacity = capacity
+        self._mask = capacity - 1
+        self._row_base = self._rows * capacity
+        self._row_base_column = self._row_base[:, None]
+        self._index_columns = np.arange(1, capacity)
+        self.by_x = np.zeros((self.num_lanes, capacity), dtype=np.int64)
+        self.left_by_x = np.zeros((self.num_lanes, capacity), dtype=np.int64)
+        self._rebuild_by_x()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def clear(self):
+        self.count = 0
+        self.head[:] = 0
+        self.size[:] = 0
+        self.alive[:] = False
+        self.velocity[:] = 0.0
+
+    def clear_lanes(self, lanes: np.ndarray):
+        """Vacía sólo los carriles `lanes` (índices de fila)."""
+        self.count -= int(self.size[lanes].sum())
+        self.head[lanes] = 0
+        self.size[lanes] = 0
+        self.alive[lanes] = False
+        self.velocity[lanes] = 0.0
+
+    def _ordered_slots(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(carril, ranura) de cada avión, por carril y en orden de aparición."""
+        lanes = np.repeat(self._rows, self.size)
+        starts = np.cumsum(self.size) - self.size
+        offset = np.arange(self.count) - np.repeat(starts, self.size)
+        return lanes, (self.head[lanes] + offset) & self._mask
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        """
+        Copia de los aviones vivos en arreglos planos, agrupados por carril
+        y en orden de aparición dentro de cada uno.
+        """
+        lanes, slots = self._ordered_slots()
+        state = {name: getattr(self, name)[lanes, slots]
+                 for name in self._FIELDS if name in self._SLOT_FIELDS}
+        state['lane'] = lanes.astype(np.int32)
+        state['direction'] = self.lane_direction[lanes]
+        return state
+
+    def set_state(self, state: Dict[str, np.ndarray]):
+        """Restaura el contenido guardado con `get_state`."""
+        self.clear()
+        self.load_lanes(self._rows, state)
+
+    def load_lanes(self, rows: np.ndarray, state: Dict[str, np.ndarray]):
+        """
+        Vacía las filas `rows` y carga en ellas los aviones de un estado de
+        `get_state`: el carril `i` del estado va a la fila `rows[i]`. Sirve
+        para copiar una partida de `Simulation` dentro de un almacén con
+        varias partidas (vecenv.py).
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        lanes = rows[np.asarray(state['lane'], dtype=np.int64)]
+        # Agrupar por carril conservando el orden de aparición
+        order = np.argsort(lanes, kind='stable')
+        lanes = lanes[order]
+        sizes = np.bincount(lanes, minlength=self.num_lanes)
+        self.clear_lanes(rows)
+        if sizes.size and sizes.max() > self.capacity:
+            self._grow(int(sizes.max()))
+
+        starts = np.cumsum(sizes) - sizes
+        slots = np.arange(len(lanes)) - starts[lanes]
+        for name in self._FIELDS:
+            if name in self._SLOT_FIELDS:
+                getattr(self, name)[lanes, slots] = np.asarray(state[name])[order]
+        self.alive[lanes, slots] = True
+        self.entry_offset[lanes, slots] = self._entry_offset(
+            self.lane_direction[lanes], self.width[lanes, slots])
+        self.size[rows] = sizes[rows]
+        self.count += len(lanes)
+        self._rebuild_by_x(rows)
+
+    # ------------------------------------------------------------------
+    # Índice por x
+    # ------------------------------------------------------------------
+
+    def _rebuild_by_x(self, lanes: Optional[np.ndarray] = None):
+        """Ordena de cero el índice de los carriles `lanes` (todos por omisión)."""
+        if lanes is None:
+            lanes = self._rows
+        for lane in lanes[self.size[lanes] > 0].tolist():
+            slots = self._lane_slots(lane)
+            slots = slots[np.argsort(self.left[lane, slots], kind='stable')]
+            self.by_x[lane, :len(slots)] = slots
+            self.left_by_x[lane, :len(slots)] = self.left[lane, slots]
+
+    def _insert_by_x(self, lane: int, slot: int):
+        """Agrega `slot` al índice de su carril (antes de contarlo en `size`)."""
+        n = int(self.size[lane])
+        left = int(self.left[lane, slot])
+        keys = self.left_by_x[lane]
+        order = self.by_x[lane]
+        i = int(keys[:n].searchsorted(left, side='right'))
+        keys[i + 1:n + 1] = keys[i:n]
+        order[i + 1:n + 1] = order[i:n]
+        keys[i] = left
+        order[i] = slot
+
+    def _remove_by_x(self, lane: int, slot: int):
+        """Quita `slot` del índice de su carril (antes de descontarlo de `size`)."""
+        n = int(self.size[lane])
+        keys = self.left_by_x[lane]
+        order = self.by_x[lane]
+        i = int(keys[:n].searchsorted(self.left[lane, slot], side='left'))
+        while order[i] != slot:
+            i += 1
+        keys[i:n - 1] = keys[i + 1:n]
+        order[i:n - 1] = order[i + 1:n]
+
+    def _sort_by_x(self):
+        """
+        Actualiza las claves del índice tras mover los aviones y reordena
+        los carriles donde un avión más rápido adelantó a otro.
+        """
+        keys = self.left.take(self.by_x + self._row_base_column)
+        self.left_by_x = keys
+        swapped = (keys[:, 1:] < keys[:, :-1]) & (self._index_columns < self.size[:, None])
+        if not swapped.any():
+            return
+        for lane in np.flatnonzero(swapped.any(axis=1)).tolist():
+            n = int(self.size[lane])
+            order = np.argsort(keys[lane, :n], kind='stable')
+            self.by_x[lane, :n] = self.by_x[lane, :n][order]
+            keys[lane, :n] = keys[lane, :n][order]
+
+    def _entry_offset(self, direction: np.ndarray, width: np.ndarray) -> np.ndarray:
+        return np.where(direction > 0, 0, self.screen_width - width)
+
+    def _distance_from_entry(self, flat: np.ndarray) -> np.ndarray:
+        """
+        Distancia al borde de entrada de las ranuras `flat` (índices planos,
+        una por carril): negativa mientras el avión entra, mayor que el
+        ancho de pantalla cuando ya salió.
+        """
+        return (self.lane_direction * self.left.take(flat) +
+                self.entry_offset.take(flat))
+
+    def spawn(self, lanes: np.ndarray, speeds: np.ndarray, type_ids: np.ndarray,
+              delay: float = 0.0):
+        """
+        Crea un avión por elemento en el borde de entrada de su carril
+        (como mucho uno por carril en cada llamada). Con `delay` el avión
+        llega al borde dentro de `delay` segundos: se guarda donde estaría
+        ahora, todavía fuera de pantalla.
+        """
+        k = len(lanes)
+        if int(self.size[lanes].max()) >= self.capacity:
+            self._grow(self.capacity * 2)
+
+        slots = (self.head[lanes] + self.size[lanes]) & self._mask
+        direction = self.lane_direction[lanes]
+        width = PLANE_WIDTHS[type_ids]
+        height = PLANE_HEIGHTS[type_ids]
+        left = np.where(direction > 0, -width, self.screen_width)
+
+        self.alive[lanes, slots] = True
+        self.left[lanes, slots] = left
+        self.x[lanes, slots] = left
+        self.top[lanes, slots] = self.lane_y[lanes] - height // 2
+        self.width[lanes, slots] = width
+        self.height[lanes, slots] = height
+        self.speed[lanes, slots] = speeds
+        self.velocity[lanes, slots] = speeds * direction
+        self.type_id[lanes, slots] = type_ids
+        self.entry_offset[lanes, slots] = self._entry_offset(direction, width)
+        if delay:
+            self.x[lanes, slots] -= self.velocity[lanes, slots] * delay
+            self.left[lanes, slots] = self.x[lanes, slots]
+        for lane, slot in zip(lanes.tolist(), slots.tolist()):
+            self._insert_by_x(lane, slot)
+        self.size[lanes] += 1
+        self.count += k
+
+    def advance(self, dt: float):
+        """
+        Mueve todos los aviones `dt` segundos. Las ranuras libres tienen
+        velocidad 0, así que se pueden mover junto con las ocupadas.
+        """
+        self.x += self.velocity * dt
+        # Asignar floats a un arreglo entero trunca hacia cero, como int()
+        self.left[:] = self.x
+        self._sort_by_x()
+
+    def retire(self) -> int:
+        """
+        Retira desde la cabeza de cada carril los aviones que salieron de
+        pantalla; retorna cuántos.
+        """
+        removed = 0
+        head = self.head
+        while self.count:
+            off = self._distance_from_entry(self._row_base + head) > self.screen_width
+            off &= self.size > 0
+            lanes = np.flatnonzero(off)
+            if lanes.size == 0:
+                break
+            slots = head[lanes]
+            for lane, slot in zip(lanes.tolist(), slots.tolist()):
+                self._remove_by_x(lane, slot)
+            self.alive[lanes, slots] = False
+            self.velocity[lanes, slots] = 0.0
+            head[lanes] = (slots + 1) & self._mask
+            self.size[lanes] -= 1
+            self.count -= lanes.size
+            removed += lanes.size
+        return removed
+
+    def blocked_lanes(self, min_distance: int) -> np.ndarray:
+        """
+        Carriles cuyo último avión sigue a menos de `min_distance` píxeles
+        del borde de entrada (no se puede crear otro avión). Basta con mirar
+        el último: sólo se crea un avión cuando el anterior ya se alejó, y
+        los aviones nunca vuelven hacia la entrada.
+        """
+        tail = (self.head + self.size - 1) & self._mask
+        near = self._distance_from_entry(self._row_base + tail) < min_distance
+        return near & (self.size > 0)
+
+    # ------------------------------------------------------------------
+    # Modelo analítico: con velocidad constante, la posición de cada avión
+    # dentro de `seconds` segundos es x + velocity * seconds
+    # ------------------------------------------------------------------
+
+    def _lane_slots(self, lane: int) -> np.ndarray:
+        """Ranuras de un carril, en orden de aparición."""
+        return (self.head[lane] + np.arange(self.size[lane])) & self._mask
+
+    def lane_positions(self, lane: int, seconds: float = 0.0) -> np.ndarray:
+        """
+        `x` de los aviones del carril `lane` (en orden de aparición) dentro
+        de `seconds` segundos, o hace `-seconds` si es negativo. No cuenta
+        los aviones que aparezcan o se retiren en ese lapso.
+        """
+        slots = self._lane_slots(lane)
+        return self.x[lane, slots] + self.velocity[lane, slots] * seconds
+
+    def _distance_at(self, lane: int, slot: int, seconds: float) -> int:
+        """Como `_distance_from_entry`, para una ranura dentro de `seconds` segundos."""
+        left = int(self.x[lane, slot] + self.velocity[lane, slot] * seconds)
+        return int(self.lane_direction[lane]) * left + int(self.entry_offset[lane, slot])
+
+    def retire_lane(self, lane: int, seconds: float = 0.0) -> int:
+        """
+        Retira de la cabeza del carril los aviones que estarán fuera de
+        pantalla dentro de `seconds` segundos; retorna cuántos.
+        """
+        removed = 0
+        while self.size[lane]:
+            slot = int(self.head[lane])
+            if self._distance_at(lane, slot, seconds) <= self.screen_width:
+                break
+            self._remove_by_x(lane, slot)
+            self.alive[lane, slot] = False
+            self.velocity[lane, slot] = 0.0
+            self.head[lane] = (slot + 1) & self._mask
+            self.size[lane] -= 1
+            self.count -= 1
+            removed += 1
+        return removed
+
+    def lane_blocked(self, lane: int, min_distance: int, seconds: float = 0.0) -> bool:
+        """Como `blocked_lanes`, para un carril dentro de `seconds` segundos."""
+        if not self.size[lane]:
+            return False
+        tail = int(self.head[lane] + self.size[lane] - 1) & self._mask
+        return self._distance_at(lane, tail, seconds) < min_distance
+
+    def live(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Índices (carril, ranura) de los aviones vivos, para indexar los arreglos."""
+        return np.nonzero(self.alive)
+
+    def interpolated_left(self, back: float,
+                          index: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> np.ndarray:
+        """
+        `left` de los aviones `index` (por defecto, los vivos) `back`
+        segundos antes del último paso. Como la velocidad es constante no
+        hace falta guardar la posición anterior.
+        """
+        if index is None:
+            index = self.live()
+        return (self.x[index] - self.velocity[index] * back).astype(np.int64)
+
+    def lane_count(self, lane: int) -> int:
+        """Número de aviones vivos en un carril."""
+        return int(self.size[lane])
+
+    def on_screen_count(self) -> int:
+        """
+        Aviones que se ven al menos en parte. Difiere de `count` en los que
+        esperan fuera de pantalla a llegar a la cabeza de su carril.
+        """
+        return int(np.count_nonzero(self.alive & (self.left < self.screen_width) &
+                                    (self.left + self.width > 0)))
+
+    def overlaps(self, lanes: range, x: int, y: int, w: int, h: int) -> bool:
+        """
+        True si algún avión de los carriles `lanes` solapa el rectángulo
+        dado, con los rectángulos de avión reducidos como en
+        `Simulation._check_collisions`. En cada carril se buscan en el
+        índice por x sólo los aviones cuyo `left` puede tocar `[x, x + w)`.
+        """
+        for lane in lanes:
+            n = int(self.size[lane])
+            if n == 0:
+                continue
+            # Avión reducido: [left + 2, left + width - 3)
+            keys = self.left_by_x[lane, :n]
+            i0 = int(keys.searchsorted(x - PLANE_MAX_WIDTH + 3, side='right'))
+            i1 = int(keys.searchsorted(x + w - 2, side='left'))
+            for slot in self.by_x[lane, i0:i1].tolist():
+                if rects_overlap(x, y, w, h,
+                                 int(self.left[lane, slot]) + 2,
+                                 int(self.top[lane, slot]) + 2,
+                                 int(self.width[lane, slot]) - 5,
+                                 int(self.height[lane, slot]) - 5):
+                    return True
+        return False
+
+
+# ============================================================================
+# APARICIÓN DE AVIONES
+# ============================================================================
+
+def choose_plane_type(rng: random.Random) -> int:
+    """Sortea el tipo de un avión nuevo según PLANE_TYPE_WEIGHTS."""
+    return rng.choices(PLANE_TYPE_IDS, weights=PLANE_TYPE_WEIGHTS)[0]
+
+
+def pop_due_spawns(rng: random.Random, queue: List[Tuple[float, int]],
+                   clock: float, spawn_rate: float,
+                   speed_range: Tuple[float, float], blocked: np.ndarray
+                   ) -> Tuple[List[int], List[float], List[int]]:
+    """
+    Saca del montículo `queue` las apariciones vencidas en `clock`, las
+    reprograma y sortea velocidad y tipo de las de carriles libres
+    (`blocked[i]` falso). Retorna (carriles, velocidades, tipos).
+
+    Los sorteos van en orden de carril, como si cada carril tuviera su
+    temporizador. `Simulation` y `VecEnv` usan esta misma función, así que
+    una semilla da el mismo tráfico en ambos.
+    """
+    due = []
+    while queue and queue[0][0] <= clock:
+        due.append(heapq.heappop(queue)[1])
+    due.sort()
+
+    speed_min, speed_max = speed_range
+    lanes, speeds, type_ids = [], [], []
+    for i in due:
+        interval = 1.0 / spawn_rate + rng.uniform(-0.3, 0.3)
+        heapq.heappush(queue, (clock + interval, i))
+        if not blocked[i]:
+            lanes.append(i)
+            speeds.append(rng.uniform(speed_min, speed_max))
+            type_ids.append(choose_plane_type(rng))
+    return lanes, speeds, type_ids
+
+
+# ============================================================================
+# SIMULACIÓN
+# ============================================================================
+
+class Simulation:
+    """
+    Reglas del juego sin presentación: carriles, aviones, colisiones,
+    puntuación, vidas y dificultad.
+
+    `step` devuelve la lista de eventos ocurridos (EVENT_*) para que la capa
+    de presentación reproduzca sonidos o cambie de estado.
+
+    Todo el azar sale de `self.rng`, un `random.Random` propio de cada
+    partida sembrado con `self.seed`: la misma semilla y las mismas entradas
+    por paso reproducen la partida exactamente. Sin semilla explícita (ni
+    `seed` en config.json) se elige una al azar; las partidas siguientes
+    (`reset()`) toman semillas derivadas de la inicial.
+    """
+
+    def __init__(self, config: Dict, seed: Optional[int] = None):
+        self.config = config
+        self.width = config['screenWidth']
+        self.height = config['screenHeight']
+
+        self.safe_zone_height = SAFE_ZONE_HEIGHT
+        self.finish_zone_y = FINISH_ZONE_Y
+        self.finish_zone_height = FINISH_ZONE_HEIGHT
+
+        self.score = 0
+        self.lives = config['lives']
+        self.game_over = False
+        self.game_time = 0
+        self.difficulty_multiplier = 1.0
+        self.spawn_rate = config['spawnRate']
+        self.speed_range = tuple(config['planeSpeedRange'])
+        self.events: List[str] = []
+        self.last_dt = 0.0
+
+        # Perfilador opcional (profiler.FrameProfiler): mide cada fase de step
+        self.profiler = None
+
+        if seed is None:
+            seed = config.get('seed')
+        if seed is None:
+            seed = random.getrandbits(32)
+        self._seed_source = random.Random(seed)
+        self._next_seed = seed
+
+        self._create_lanes()
+
+        start_x, start_y = self.bird_start
+        self.bird = SimBird(start_x, start_y, config)
+
+        self.reset()
+
+    @property
+    def bird_start(self) -> Tuple[int, int]:
+        """Posición inicial (centro) del pájaro en la zona segura."""
+        return (self.width // 2, self.height - self.safe_zone_height // 2)
+
+    def _create_lanes(self):
+        """Crea los carriles del juego."""
+        self.lanes: List[SimLane] = []
+        num_lanes = self.config['numLanes']
+
+        play_area_top = self.finish_zone_y + self.finish_zone_height
+        play_area_bottom = self.height - self.safe_zone_height
+        play_area_height = play_area_bottom - play_area_top
+
+        lane_spacing = play_area_height / num_lanes
+        self.play_area_top = play_area_top
+        self.lane_spacing = lane_spacing
+
+        for i in range(num_lanes):
+            lane_y = int(play_area_top + lane_spacing * (i + 0.5))
+            direction = 1 if i % 2 == 0 else -1
+
+            lane = SimLane(
+                index=i,
+                y=lane_y,
+                height=int(lane_spacing),
+                direction=direction,
+                screen_width=self.width
+            )
+            self.lanes.append(lane)
+
+        self.lane_geometry = LaneGeometry(
+            y=tuple(lane.y for lane in self.lanes),
+            top=tuple(lane.top for lane in self.lanes),
+            bottom=tuple(lane.top + lane.height for lane in self.lanes),
+            height=int(lane_spacing),
+            direction=tuple(lane.direction for lane in self.lanes),
+        )
+
+        # Próximas apariciones: un montículo de (instante, carril) con una
+        # entrada por carril, sobre el reloj `spawn_clock`
+        self.spawn_clock = 0.0
+        self.spawn_queue: List[Tuple[float, int]] = []
+        self.planes = PlaneStore(self.lanes, self.width)
+
+    def reset(self, seed: Optional[int] = None):
+        """Reinicia la partida con `seed` o con la siguiente semilla derivada."""
+        if seed is None:
+            seed = self._next_seed
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self._next_seed = self._seed_source.getrandbits(32)
+
+        self.spawn_clock = 0.0
+        self._schedule_spawns([
+            self.rng.uniform(0, 1.0 / self.config['spawnRate'])
+            for _ in self.lanes
+        ])
+
+        self.score = 0
+        self.lives = self.config['lives']
+        self.game_over = False
+        self.game_time = 0
+        self._set_difficulty(1.0)
+        self.events = []
+        self.last_dt = 0.0
+
+        self.planes.clear()
+
+        self.bird.reset_position(*self.bird_start)
+
+        # Tablero ya poblado al empezar (0: los carriles empiezan vacíos)
+        warmup = self.config.get('warmupSeconds', 0)
+        if warmup:
+            self.fast_forward(warmup)
+
+    def get_state(self) -> Dict:
+        """
+        Estado completo de la partida en curso (incluido el generador
+        aleatorio), suficiente para continuarla con `set_state`.
+        """
+        bird = self.bird
+        return {
+            'seed': self.seed,
+            'rng': self.rng.getstate(),
+            'score': self.score,
+            'lives': self.lives,
+            'game_over': self.game_over,
+            'game_time': self.game_time,
+            'difficulty_multiplier': self.difficulty_multiplier,
+            'last_dt': self.last_dt,
+            'bird': (bird.x, bird.y, bird.prev_x, bird.prev_y, bird.last_lane),
+            'crossed_lanes': sorted(bird.crossed_lanes),
+            'spawn_clock': self.spawn_clock,
+            'spawn_due': self.spawn_due(),
+            'planes': self.planes.get_state(),
+        }
+
+    def set_state(self, state: Dict):
+        """Restaura un estado obtenido con `get_state`."""
+        self.seed = state['seed']
+        self.rng.setstate(state['rng'])
+        self.score = state['score']
+        self.lives = state['lives']
+        self.game_over = state['game_over']
+        self.game_time = state['game_time']
+        self._set_difficulty(state['difficulty_multiplier'])
+        self.last_dt = state['last_dt']
+        self.events = []
+
+        bird = self.bird
+        bird.x, bird.y, bird.prev_x, bird.prev_y, bird.last_lane = state['bird']
+        bird.crossed_lanes = set(state['crossed_lanes'])
+
+        self.spawn_clock = state['spawn_clock']
+        self._schedule_spawns(state['spawn_due'])
+        self.planes.set_state(state['planes'])
+
+    def entity_counts(self) -> Dict[str, int]:
+        """Entidades vivas y capacidad reservada, para telemetría."""
+        planes = self.planes
+        return {
+            'planes': planes.count,
+            'plane_slots': planes.num_lanes * planes.capacity,
+            'lanes': len(self.lanes),
+            'crossed_lanes': len(self.bird.crossed_lanes),
+        }
+
+    def get_current_lane(self) -> int:
+        """
+        Retorna el índice del primer carril que solapa al pájaro (-1 si
+        ninguno). Equivale a probar `rects_overlap` contra cada carril, pero
+        busca con `bisect` en la tabla de geometría: el primer carril cuyo
+        borde inferior queda por debajo del borde superior del pájaro.
+        """
+        bird = self.bird
+        geometry = self.lane_geometry
+        if (geometry.height <= 0 or bird.width <= 0 or bird.height <= 0 or
+                bird.x + bird.width <= 0 or bird.x >= self.width):
+            return -1
+        i = bisect.bisect_right(geometry.bottom, bird.y)
+        if i < len(geometry.top) and geometry.top[i] < bird.y + bird.height:
+            return i
+        return -1
+
+    def lanes_near(self, y0: int, y1: int) -> range:
+        """
+        Carriles cuyos aviones pueden solapar la franja vertical `[y0, y1)`,
+        calculados aritméticamente a partir de la geometría de `_create_lanes`
+        (un avión puede sobresalir de su carril hasta PLANE_MAX_HEIGHT / 2).
+        """
+        margin = PLANE_MAX_HEIGHT // 2 + 2
+        top = self.play_area_top
+        spacing = self.lane_spacing
+        first = math.floor((y0 - margin - top) / spacing - 0.5)
+        last = math.ceil((y1 + margin - top) / spacing - 0.5)
+        return range(max(first, 0), min(last, len(self.lanes) - 1) + 1)
+
+    def _check_collisions(self) -> bool:
+        """
+        Verifica colisiones AABB (rectángulos reducidos como en inflate).
+
+        Fase amplia: sólo los carriles cercanos al pájaro, calculados con la
+        geometría de carriles, y dentro de cada uno sólo los aviones que el
+        índice por x ubica cerca de él (`PlaneStore.overlaps`).
+        """
+        bird = self.bird
+        bx, by = bird.x + 5, bird.y + 5
+        bw, bh = bird.width - 10, bird.height - 10
+
+        if self.planes.count == 0 or bw <= 0 or bh <= 0:
+            return False
+
+        lanes = self.lanes_near(by, by + bh)
+        if not lanes:
+            return False
+        return self.planes.overlaps(lanes, bx, by, bw, bh)
+
+    def _check_lane_cross(self) -> bool:
+        """Verifica si el pájaro cruzó un carril."""
+        current_lane = self.get_current_lane()
+
+        if self.bird.top <= self.finish_zone_y + self.finish_zone_height:
+            self.score += self.config['pointsPerCross'] * 2
+            self.events.append(EVENT_POINT)
+            self.bird.reset_position(*self.bird_start)
+            return True
+
+        if current_lane >= 0 and current_lane not in self.bird.crossed_lanes:
+            self.bird.crossed_lanes.add(current_lane)
+            self.score += self.config['pointsPerCross']
+            self.events.append(EVENT_POINT)
+            return True
+
+        return False
+
+    def _set_difficulty(self, multiplier: float):
+        """Fija el multiplicador y recalcula la tasa y velocidades de aparición."""
+        self.difficulty_multiplier = multiplier
+        self.spawn_rate = self.config['spawnRate'] * multiplier
+        base_min, base_max = self.config['planeSpeedRange']
+        self.speed_range = (base_min * multiplier, base_max * multiplier)
+
+    def _schedule_spawns(self, due: Sequence[float]):
+        """Reprograma en bloque la próxima aparición de cada carril (instantes absolutos)."""
+        self.spawn_queue = [(float(t), lane) for lane, t in enumerate(due)]
+        heapq.heapify(self.spawn_queue)
+
+    def spawn_due(self) -> np.ndarray:
+        """Instante de la próxima aparición de cada carril, por índice de carril."""
+        due = np.zeros(len(self.lanes))
+        for t, lane in self.spawn_queue:
+            due[lane] = t
+        return due
+
+    def _choose_plane_type(self) -> int:
+        return choose_plane_type(self.rng)
+
+    def _update_lanes(self, dt: float):
+        """Mueve, descarta y crea aviones en todos los carriles."""
+        store = self.planes
+        store.advance(dt)
+        store.retire()
+
+        # Sólo se sacan del montículo las apariciones vencidas; la mayoría
+        # de los pasos no tiene ninguna
+        self.spawn_clock += dt
+        clock = self.spawn_clock
+        queue = self.spawn_queue
+        if not queue or queue[0][0] > clock:
+            return
+
+        blocked = store.blocked_lanes(self.config['minSpawnDistancePx'])
+        lanes, speeds, type_ids = pop_due_spawns(
+            self.rng, queue, clock, self.spawn_rate, self.speed_range, blocked)
+        if lanes:
+            store.spawn(np.array(lanes), np.array(speeds),
+                        np.array(type_ids, dtype=np.int8))
+
+    def fast_forward(self, seconds: float):
+        """
+        Adelanta el tráfico `seconds` segundos sin simular paso a paso:
+        recorre las apariciones del montículo en orden y evalúa cada avión
+        con su fórmula cerrada. Sirve para calentar el tablero antes de
+        empezar y en pruebas. El pájaro, la puntuación y la dificultad no
+        cambian.
+
+        Lo que hay en pantalla depende sólo de los últimos segundos: un
+        avión cruza y deja de bloquear su carril en menos de la mitad de
+        `horizon`. De un salto más largo sólo se recorre ese último tramo,
+        partiendo de carriles vacíos, así que el costo es O(aviones en
+        pantalla) y no depende de `seconds`.
+
+        Las apariciones se alinean a los pasos de `tickRate` y se sortean
+        en el mismo orden que en `_update_lanes`, así que un salto corto da
+        el mismo tráfico que simular paso a paso, salvo por redondeo.
+        """
+        if seconds <= 0:
+            return
+        store = self.planes
+        end = self.spawn_clock + seconds
+        dt = 1.0 / self.config['tickRate']
+        min_distance = self.config['minSpawnDistancePx']
+        speed_min, speed_max = self.speed_range
+
+        if speed_min > 0:
+            horizon = 2 * (self.width + PLANE_MAX_WIDTH + min_distance) / speed_min
+            if seconds > horizon:
+                store.clear()
+                self.spawn_clock = end - horizon
+                self._schedule_spawns([
+                    self.spawn_clock + self.rng.uniform(0, 1.0 / self.spawn_rate)
+                    for _ in self.lanes
+                ])
+
+        # Las posiciones guardadas siguen siendo las de `start`; cada evento
+        # se evalúa `elapsed` segundos más adelante, en el paso en que vence
+        queue = self.spawn_queue
+        start = self.spawn_clock
+        last_tick = math.floor((end - start) / dt + 1e-9)
+        tick = 0
+        while queue:
+            # Un intervalo negativo vence en el paso siguiente, nunca antes
+            tick = max(math.ceil((queue[0][0] - start) / dt), tick + 1)
+            if tick > last_tick:
+                break
+            elapsed = tick * dt
+            clock = start + elapsed
+            due = []
+            while queue and queue[0][0] <= clock:
+                due.append(heapq.heappop(queue)[1])
+            due.sort()
+            for lane in due:
+                store.retire_lane(lane, elapsed)
+                interval = 1.0 / self.spawn_rate + self.rng.uniform(-0.3, 0.3)
+                heapq.heappush(queue, (clock + interval, lane))
+                if not store.lane_blocked(lane, min_distance, elapsed):
+                    store.spawn(np.array([lane]),
+                                np.array([self.rng.uniform(speed_min, speed_max)]),
+                                np.array([self._choose_plane_type()], dtype=np.int8),
+                                delay=elapsed)
+
+        store.advance(end - start)
+        store.retire()
+        self.spawn_clock = end
+
+    def _update_difficulty(self, dt: float):
+        """Actualiza la dificultad."""
+        self.game_time += dt
+
+        step_time = self.config['difficultyStepEveryXSeconds']
+        multiplier = self.config['difficultySpeedMultiplier']
+
+        steps = int(self.game_time / step_time)
+        difficulty = multiplier ** steps
+        if difficulty != self.difficulty_multiplier:
+            self._set_difficulty(difficulty)
+
+    def _handle_collision(self):
+        """Maneja una colisión."""
+        self.events.append(EVENT_COLLISION)
+        self.lives -= 1
+
+        if self.lives <= 0:
+            self.game_over = True
+            self.events.append(EVENT_GAME_OVER)
+        else:
+            self.bird.reset_position(*self.bird_start)
+
+    def step(self, dt: float, inputs: int = 0) -> List[str]:
+        """Avanza la simulación `dt` segundos con los bits de entrada dados."""
+        self.events = []
+        if self.game_over:
+            return self.events
+
+        self.last_dt = dt
+        prof = self.profiler
+        if prof is not None:
+            prof.start()
+
+        self._update_difficulty(dt)
+        if prof is not None:
+            prof.lap('difficulty')
+
+        self.bird.update(dt, inputs, self.width, self.height,
+                         self.safe_zone_height)
+        if prof is not None:
+            prof.lap('bird')
+
+        self._update_lanes(dt)
+        if prof is not None:
+            prof.lap('lanes')
+
+        if self._check_collisions():
+            self._handle_collision()
+        if prof is not None:
+            prof.lap('collisions')
+
+        self._check_lane_cross()
+        if prof is not None:
+            prof.lap('lane_cross')
+
+        return self.events
+
+
+class FixedTimestep:
+    """
+    Acumulador de paso fijo. Convierte el tiempo real de cada frame en un
+    número entero de pasos de `dt` segundos, de modo que la simulación es
+    idéntica a cualquier frame rate. `alpha` (0..1) es la fracción de paso
+    pendiente, para interpolar el dibujo entre el estado anterior y el actual.
+    """
+
+    def __init__(self, tick_rate: float = 60, max_frame_time: float = 0.25):
+        self.dt = 1.0 / tick_rate
+        # Evita la espiral de muerte tras una pausa larga del sistema
+        self.max_frame_time = max_frame_time
+        self.accumulator = 0.0
+
+    def advance(self, frame_time: float) -> int:
+        """Acumula `frame_time` segundos; retorna cuántos pasos simular."""
+        self.accumulator += min(frame_time, self.max_frame_time)
+        steps = int(self.accumulator / self.dt)
+        self.accumulator = max(0.0, self.accumulator - steps * self.dt)
+        return steps
+
+    @property
+    def alpha(self) -> float:
+        return min(self.accumulator / self.dt, 1.0)
+
+
+# ============================================================================
+# EJECUCIÓN SIN VENTANA
+# ============================================================================
+
+def run_headless(config: Dict, frames: int, dt: Optional[float] = None,
+                 inputs: int = INPUT_UP, seed: Optional[int] = None) -> Simulation:
+    """
+    Avanza una partida `frames` pasos sin ventana. Si la partida termina se
+    reinicia, de modo que siempre se simulan exactamente `frames` pasos.
+    """
+    if dt is None:
+        dt = 1.0 / config['tickRate']
+    sim = Simulation(config, seed=seed)
+    for _ in range(frames):
+        sim.step(dt, inputs)
+        if sim.game_over:
+            sim.reset()
+    return sim
+
+
+def main(argv: Optional[List[str]] = None):
+    """Mide el rendimiento de la simulación sin ventana."""
+    parser = argparse.ArgumentParser(description="Simulación sin ventana de Birds & Planes")
+    parser.add_argument('--frames', type=int, default=100000,
+                        help="Número de pasos a simular")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="Semilla de la partida (por defecto la de config.json)")
+    args = parser.parse_args(argv)
+
+    config = load_config()
+    start = time.perf_counter()
+    sim = run_headless(config, args.frames, seed=args.seed)
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.frames} frames en {elapsed:.3f} s "
+          f"({args.frames / elapsed:.0f} frames/s)")
+    print(f"Semilla: {sim.seed}  Puntos: {sim.score}  Vidas: {sim.lives}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Barrido de parámetros de dificultad
+===================================
+Juega miles de partidas sin ventana sobre una grilla (o una muestra al
+azar) de configuraciones y resume, por configuración, cuánto sobrevive el
+jugador, qué puntaje logra y cuánto tráfico enfrenta.
+
+El jugador por defecto es el piloto automático (autopilot.py): es el que
+sirve para ajustar la dificultad, porque sobrevive lo suficiente para que
+la dificultad suba varias veces. El jugador al azar muere en pocos
+segundos, antes del primer aumento (`difficultyStepEveryXSeconds`), así que
+sólo mide la densidad de tráfico inicial; `difficultySpeedMultiplier` no
+influye en esas partidas. Las configuraciones cuya mediana de
+supervivencia no llega al primer aumento se marcan en la tabla y en el CSV
+(`ramp_reached`): sus parámetros de dificultad no quedaron medidos.
+
+El trabajo se divide en fragmentos (una configuración y un bloque de
+semillas) que se reparten entre procesos. Cada fragmento terminado se
+guarda en `<salida>/shards/`; al volver a correr el mismo barrido sólo se
+juegan los que falten, así que se puede interrumpir y retomar. El nombre
+de cada fragmento lleva la huella del código que decide las partidas
+(`code_version`): tras cambiar las reglas o el piloto se juegan de nuevo.
+
+Uso:
+    python sweep.py                                      # grilla por defecto
+    python sweep.py --param spawnRate=0.75,1,1.5 \\
+                    --param planeSpeedRange=150:320,200:400 --seeds 200
+    python sweep.py --sample 40 --param spawnRate=0.5~2 \\
+                    --param minSpawnDistancePx=80~200    # muestra al azar
+    python sweep.py --out sweeps/rapido --player up --workers 4
+    python sweep.py --player random --seeds 500          # tráfico inicial
+
+Valores: lista separada por comas (grilla o elección al azar), o rango
+`min~max` (sólo con --sample). planeSpeedRange se escribe `min:max`.
+"""
+
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from autopilot import Autopilot
+from simulation import BASE_DIR, Simulation, config_hash, load_config, INPUT_UP
+from telemetry import bot_inputs
+
+# Parámetros que se pueden barrer, en el orden de la tabla
+SWEEP_KEYS = [
+    'spawnRate',
+    'planeSpeedRange',
+    'difficultyStepEveryXSeconds',
+    'difficultySpeedMultiplier',
+    'minSpawnDistancePx',
+]
+
+DEFAULT_GRID = {
+    'spawnRate': '0.75,1,1.5',
+    'difficultySpeedMultiplier': '1.04,1.08,1.15',
+}
+
+DEFAULT_OUT = os.path.join('sweeps', 'default')
+SHARD_DIR = 'shards'
+RESULTS_CSV = 'results.csv'
+
+INPUT_PERIOD = 15       # pasos entre decisiones del jugador al azar
+
+# Formato de los resultados de una partida (`play_game`); subirlo cuando
+# cambie qué o cómo se mide
+SHARD_FORMAT = 2
+# Módulos cuyo código decide cómo termina una partida
+CODE_MODULES = ('simulation.py', 'autopilot.py', 'telemetry.py')
+
+
+# ============================================================================
+# CONFIGURACIONES
+# ============================================================================
+
+def parse_value(key: str, text: str):
+    if key == 'planeSpeedRange':
+        low, high = text.split(':')
+        return [float(low), float(high)]
+    return float(text)
+
+
+def parse_param(text: str) -> Tuple[str, object]:
+    """
+    `clave=v1,v2,...` -> (clave, [valores]); `clave=min~max` ->
+    (clave, (min, max)), un rango continuo para --sample.
+    """
+    key, _, values = text.partition('=')
+    if key not in SWEEP_KEYS:
+        raise argparse.ArgumentTypeError(
+            f"parámetro desconocido: {key} (opciones: {', '.join(SWEEP_KEYS)})")
+    if '~' in values:
+        if key == 'planeSpeedRange':
+            raise argparse.ArgumentTypeError("planeSpeedRange sólo admite una lista de valores")
+        low, high = values.split('~')
+        return key, (float(low), float(high))
+    return key, [parse_value(key, v) for v in values.split(',')]
+
+
+def grid_configs(params: Dict[str, object]) -> List[Dict]:
+    """Producto cartesiano de las listas de valores."""
+    for key, values in params.items():
+        if isinstance(values, tuple):
+            raise ValueError(f"{key}: los rangos min~max sólo sirven con --sample")
+    keys = list(params)
+    return [dict(zip(keys, combo)) for combo in itertools.product(*params.values())]
+
+
+def sample_configs(params: Dict[str, object], count: int, seed: int) -> List[Dict]:
+    """`count` configuraciones al azar: un valor de cada lista, o uniforme en cada rango."""
+    rng = random.Random(seed)
+    configs = []
+    for _ in range(count):
+        overrides = {}
+        for key, values in params.items():
+            if isinstance(values, tuple):
+                overrides[key] = round(rng.uniform(*values), 3)
+            else:
+                overrides[key] = rng.choice(values)
+        configs.append(overrides)
+    return configs
+
+
+def format_overrides(overrides: Dict) -> str:
+    parts = []
+    for key in SWEEP_KEYS:
+        if key in overrides:
+            value = overrides[key]
+            if key == 'planeSpeedRange':
+                value = f"{value[0]:g}:{value[1]:g}"
+            else:
+                value = f"{value:g}"
+            parts.append(f"{key}={value}")
+    return ' '.join(parts)
+
+
+# ============================================================================
+# PARTIDAS
+# ============================================================================
+
+def _random_player(sim: Simulation, seed: int) -> Callable[[int], int]:
+    rng = random.Random(seed)
+    inputs = 0
+
+    def player(tick: int) -> int:
+        nonlocal inputs
+        if tick % INPUT_PERIOD == 0:
+            inputs = bot_inputs(rng)
+        return inputs
+    return player
+
+
+def _up_player(sim: Simulation, seed: int) -> Callable[[int], int]:
+    return lambda tick: INPUT_UP
+
+
+def _autopilot_player(sim: Simulation, seed: int) -> Callable[[int], int]:
+    pilot = Autopilot(sim)
+    return lambda tick: pilot.inputs()
+
+
+# Jugadores por nombre: fábrica (simulación, semilla) -> función (paso) -> bits
+PLAYERS: Dict[str, Callable[[Simulation, int], Callable[[int], int]]] = {
+    'random': _random_player,
+    'up': _up_player,
+    'autopilot': _autopilot_player,
+}
+
+
+def play_game(config: Dict, seed: int, player: str, max_seconds: float) -> Dict:
+    """
+    Una partida hasta el Game Over o `max_seconds`. Retorna la supervivencia
+    (s), el puntaje y los aviones en pantalla (al menos en parte) en
+    promedio por paso.
+    """
+    dt = 1.0 / config['tickRate']
+    max_ticks = int(max_seconds * config['tickRate'])
+    sim = Simulation(config, seed=seed)
+    inputs = PLAYERS[player](sim, seed)
+    planes = 0
+    tick = 0
+    while tick < max_ticks and not sim.game_over:
+        sim.step(dt, inputs(tick))
+        planes += sim.planes.on_screen_count()
+        tick += 1
+    return {
+        'seed': seed,
+        'survival': sim.game_time,
+        'score': sim.score,
+        'planes': planes / max(tick, 1),
+        'capped': not sim.game_over,
+    }
+
+
+def run_shard(task: Dict) -> Dict:
+    """Juega todas las semillas de un fragmento. Corre en un worker."""
+    config = load_config()
+    config.update(task['overrides'])
+    games = [play_game(config, seed, task['player'], task['max_seconds'])
+             for seed in task['seeds']]
+    return {**task, 'games': games}
+
+
+# ============================================================================
+# FRAGMENTOS EN DISCO
+# ============================================================================
+
+def code_version() -> str:
+    """
+    Huella corta de SHARD_FORMAT y del código de CODE_MODULES: los
+    fragmentos guardados con otra huella no se retoman.
+    """
+    digest = hashlib.sha1(str(SHARD_FORMAT).encode())
+    for name in CODE_MODULES:
+        with open(os.path.join(BASE_DIR, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:8]
+
+
+def make_tasks(configs: List[Dict], seeds: int, shard_size: int, player: str,
+               max_seconds: float) -> List[Dict]:
+    """Divide cada configuración en bloques de `shard_size` semillas."""
+    base = load_config()
+    code = code_version()
+    tasks = []
+    for index, overrides in enumerate(configs):
+        config_id = config_hash({**base, **overrides})
+        for start in range(0, seeds, shard_size):
+            block = list(range(start, min(start + shard_size, seeds)))
+            tasks.append({
+                'config_index': index,
+                'config_id': config_id,
+                'overrides': overrides,
+                'player': player,
+                'max_seconds': max_seconds,
+                'seeds': block,
+                'code_version': code,
+                'name': f"{config_id}_{code}_{player}_{max_seconds:g}s_"
+                        f"{block[0]}-{block[-1]}.json",
+            })
+    return tasks
+
+
+def write_shard(shard_dir: str, result: Dict):
+    """Escribe un fragmento de forma atómica: nunca queda uno a medio escribir."""
+    path = os.path.join(shard_dir, result['name'])
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(result, f)
+    os.replace(tmp, path)
+
+
+def load_shard(shard_dir: str, name: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(shard_dir, name), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def run_sweep(tasks: List[Dict], out_dir: str, workers: Optional[int] = None,
+              resume: bool = True, verbose: bool = True) -> List[Dict]:
+    """
+    Juega los fragmentos que no estén ya en disco, en `workers` procesos, y
+    retorna todos los fragmentos (los retomados y los nuevos).
+    """
+    shard_dir = os.path.join(out_dir, SHARD_DIR)
+    os.makedirs(shard_dir, exist_ok=True)
+
+    done = {}
+    pending = []
+    for task in tasks:
+        shard = load_shard(shard_dir, task['name']) if resume else None
+        if shard is not None:
+            # Una muestra al azar puede repetir una configuración: la
+            # posición en la tabla es la de esta corrida
+            done[task['name']] = {**shard, 'config_index': task['config_index']}
+        else:
+            pending.append(task)
+    if verbose and done:
+        print(f"Retomando: {len(done)} de {len(tasks)} fragmentos ya estaban en {shard_dir}")
+
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    finished = 0
+
+    def report(result):
+        nonlocal finished
+        write_shard(shard_dir, result)
+        done[result['name']] = result
+        finished += 1
+        if verbose:
+            elapsed = time.perf_counter() - start
+            print(f"  [{finished}/{len(pending)}] {format_overrides(result['overrides'])} "
+                  f"semillas {result['seeds'][0]}-{result['seeds'][-1]} ({elapsed:.1f} s)")
+
+    if workers > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+            futures = [pool.submit(run_shard, task) for task in pending]
+            for future in as_completed(futures):
+                report(future.result())
+    else:
+        for task in pending:
+            report(run_shard(task))
+
+    return [done[task['name']] for task in tasks]
+
+
+# ============================================================================
+# RESULTADOS
+# ============================================================================
+
+def aggregate(shards: List[Dict], base: Optional[Dict] = None) -> List[Dict]:
+    """
+    Una fila por configuración, en el orden del barrido. `ramp_steps` es
+    cuántos aumentos de dificultad alcanza la mediana de supervivencia;
+    `ramp_reached` es False si no llega a ninguno.
+    """
+    base = base if base is not None else load_config()
+    groups: Dict[int, List[Dict]] = {}
+    overrides: Dict[int, Dict] = {}
+    for shard in shards:
+        groups.setdefault(shard['config_index'], []).extend(shard['games'])
+        overrides[shard['config_index']] = shard['overrides']
+
+    rows = []
+    for index in sorted(groups):
+        games = groups[index]
+        survival = np.array([g['survival'] for g in games])
+        score = np.array([g['score'] for g in games])
+        planes = np.array([g['planes'] for g in games])
+        config = {**base, **overrides[index]}
+        ramp_steps = float(np.percentile(survival, 50)) / config['difficultyStepEveryXSeconds']
+        rows.append({
+            'config': overrides[index],
+            'games': len(games),
+            'survival_mean': float(survival.mean()),
+            'survival_p10': float(np.percentile(survival, 10)),
+            'survival_p50': float(np.percentile(survival, 50)),
+            'survival_p90': float(np.percentile(survival, 90)),
+            'score_mean': float(score.mean()),
+            'score_p50': float(np.percentile(score, 50)),
+            'score_p90': float(np.percentile(score, 90)),
+            'planes_mean': float(planes.mean()),
+            'capped': float(np.mean([g['capped'] for g in games])),
+            'ramp_steps': ramp_steps,
+            'ramp_reached': ramp_steps >= 1,
+        })
+    return rows
+
+
+def print_table(rows: List[Dict]):
+    print(f"{'configuración':<60} {'partidas':>8} {'superv. p10/p50/p90 (s)':>24} "
+          f"{'puntos media/p90':>17} {'aviones':>8} {'al tope':>8} {'aumentos':>9}")
+    for row in rows:
+        survival = (f"{row['survival_p10']:.1f}/{row['survival_p50']:.1f}/"
+                    f"{row['survival_p90']:.1f}")
+        score = f"{row['score_mean']:.0f}/{row['score_p90']:.0f}"
+        print(f"{format_overrides(row['config']):<60} {row['games']:>8} {survival:>24} "
+              f"{score:>17} {row['planes_mean']:>8.2f} {row['capped']:>8.0%} "
+              f"{row['ramp_steps']:>8.1f}{'' if row['ramp_reached'] else '*'}")
+
+    short = sum(not row['ramp_reached'] for row in rows)
+    if short:
+        print(f"\n* En {short} de {len(rows)} configuraciones la mediana de supervivencia "
+              f"no llega al primer aumento de dificultad (difficultyStepEveryXSeconds):\n"
+              f"  sus parámetros de dificultad no quedaron medidos.")
+
+
+def write_csv(path: str, rows: List[Dict]):
+    fields = [k for k in rows[0] if k != 'config'] if rows else []
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(SWEEP_KEYS + fields)
+        for row in rows:
+            values = [row['config'].get(key, '') for key in SWEEP_KEYS]
+            values = [f"{v[0]:g}:{v[1]:g}" if isinstance(v, list) else v for v in values]
+            writer.writerow(values + [row[field] for field in fields])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Barrido de parámetros de dificultad")
+    parser.add_argument('--param', type=parse_param, action='append', default=[],
+                        metavar='CLAVE=VALORES',
+                        help="valores a barrer: v1,v2,... o min~max (con --sample)")
+    parser.add_argument('--sample', type=int, default=0,
+                        help="elegir N configuraciones al azar en lugar de la grilla")
+    parser.add_argument('--sample-seed', type=int, default=0)
+    parser.add_argument('--seeds', type=int, default=100,
+                        help="partidas (semillas 0..N-1) por configuración")
+    parser.add_argument('--shard-size', type=int, default=25,
+                        help="semillas por fragmento")
+    parser.add_argument('--player', choices=sorted(PLAYERS), default='autopilot',
+                        help="autopilot (por defecto) para ajustar la dificultad")
+    parser.add_argument('--max-seconds', type=float, default=300.0,
+                        help="tope de duración de cada partida")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="procesos (por defecto, uno por núcleo)")
+    parser.add_argument('--out', default=DEFAULT_OUT,
+                        help="directorio de fragmentos y resultados")
+    parser.add_argument('--fresh', action='store_true',
+                        help="volver a jugar aunque haya fragmentos guardados")
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args(argv)
+
+    params = dict(args.param) if args.param else {
+        key: parse_param(f"{key}={values}")[1] for key, values in DEFAULT_GRID.items()
+    }
+    try:
+        if args.sample:
+            configs = sample_configs(params, args.sample, args.sample_seed)
+        else:
+            configs = grid_configs(params)
+    except ValueError as e:
+        parser.error(str(e))
+
+    tasks = make_tasks(configs, args.seeds, args.shard_size, args.player,
+                       args.max_seconds)
+    print(f"{len(configs)} configuraciones x {args.seeds} partidas "
+          f"({len(tasks)} fragmentos) en {args.out}")
+
+    start = time.perf_counter()
+    shards = run_sweep(tasks, args.out, workers=args.workers,
+                       resume=not args.fresh, verbose=not args.quiet)
+    rows = aggregate(shards)
+    print(f"\nBarrido completo en {time.perf_counter() - start:.1f} s\n")
+    print_table(rows)
+
+    csv_path = os.path.join(args.out, RESULTS_CSV)
+    write_csv(csv_path, rows)
+    print(f"\nResultados guardados en {csv_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Telemetría de memoria para Birds & Planes
+=========================================
+Conteo de entidades vivas, instantáneas de `tracemalloc` a pedido y una
+prueba de resistencia ("soak") que simula muchas horas de juego y falla si
+la memoria sigue creciendo una vez que el juego entró en régimen.
+
+Uso:
+    python telemetry.py --hours 2                # sólo simulación
+    python telemetry.py --hours 0.5 --render     # también dibuja (SDL dummy)
+    python telemetry.py --hours 2 --autopilot    # partidas largas (autopilot.py)
+
+En el juego, F5 muestra los conteos y, a partir de la segunda vez, qué
+líneas de código reservaron más memoria desde la instantánea anterior.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+from autopilot import Autopilot
+from simulation import (
+    Simulation, load_config,
+    INPUT_UP, INPUT_DOWN, INPUT_LEFT, INPUT_RIGHT,
+)
+
+# Ignorar las reservas del propio tracemalloc y del sistema de imports
+_TRACE_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+]
+
+
+def format_counts(counts: Dict[str, int]) -> str:
+    return ' '.join(f"{name}={value}" for name, value in counts.items())
+
+
+class MemoryMonitor:
+    """
+    Instantáneas de `tracemalloc` a pedido. La primera llamada a `snapshot`
+    activa el rastreo; las siguientes listan las líneas que más memoria
+    reservaron desde la anterior.
+    """
+
+    def __init__(self, frames: int = 1):
+        self.frames = frames
+        self.previous: Optional[tracemalloc.Snapshot] = None
+
+    def snapshot(self, limit: int = 10) -> List[str]:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        snapshot = tracemalloc.take_snapshot().filter_traces(_TRACE_FILTERS)
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"Memoria rastreada: {current / 1024:.0f} KiB (pico {peak / 1024:.0f} KiB)"]
+        if self.previous is None:
+            lines.append("tracemalloc activo; la próxima instantánea mostrará las diferencias")
+        else:
+            for stat in snapshot.compare_to(self.previous, 'lineno')[:limit]:
+                lines.append(f"  {stat}")
+        self.previous = snapshot
+        return lines
+
+
+# ============================================================================
+# PRUEBA DE RESISTENCIA
+# ============================================================================
+
+def bot_inputs(rng: random.Random) -> int:
+    """Entrada al azar sesgada hacia arriba, como un jugador que intenta cruzar."""
+    inputs = 0
+    roll = rng.random()
+    if roll < 0.55:
+        inputs |= INPUT_UP
+    elif roll < 0.65:
+        inputs |= INPUT_DOWN
+    side = rng.random()
+    if side < 0.2:
+        inputs |= INPUT_LEFT
+    elif side < 0.4:
+        inputs |= INPUT_RIGHT
+    return inputs
+
+
+class _HeadlessSession:
+    """Partidas seguidas sólo con la simulación."""
+
+    def __init__(self, config: Dict, seed: int):
+        self.sim = Simulation(config, seed=seed)
+        self.games = 1
+
+    def step(self, dt: float, inputs: int):
+        self.sim.step(dt, inputs)
+        if self.sim.game_over:
+            self.sim.reset()
+            self.games += 1
+
+    def entity_counts(self) -> Dict[str, int]:
+        return self.sim.entity_counts()
+
+
+class _RenderedSession:
+    """Partidas seguidas con `GameScene` completa, dibujando cada paso."""
+
+    def __init__(self, config: Dict, seed: int):
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+        os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+        import pygame
+        from main import GameScene, input_to_keys
+        self.input_to_keys = input_to_keys
+        pygame.init()
+        screen = pygame.display.set_mode((config['screenWidth'], config['screenHeight']))
+        # La prueba no debe escribir highscore.json ni leaderboard.sqlite3
+        self.game = GameScene(screen, config, seed=seed, persist_highscore=False)
+        self.game._reset_game()
+        self.game.state = GameScene.STATE_PLAYING
+        self.sim = self.game.sim
+        self.games = 1
+
+    def step(self, dt: float, inputs: int):
+        game = self.game
+        game.profiler.next_frame()
+        game.update(dt, self.input_to_keys(inputs))
+        game.draw(1.0)
+        if game.state == game.STATE_GAME_OVER:
+            game._reset_game()
+            game.state = game.STATE_PLAYING
+            self.games += 1
+
+    def entity_counts(self) -> Dict[str, int]:
+        return self.game.entity_counts()
+
+
+def soak(config: Dict, hours: float, seed: int = 0, render: bool = False,
+         sample_every: float = 60.0, warmup: float = 0.1,
+         tolerance_kib: float = 256.0, verbose: bool = True,
+         autopilot: bool = False) -> Dict:
+    """
+    Simula `hours` horas de juego (reiniciando en cada Game Over) y mide la
+    memoria rastreada cada `sample_every` segundos simulados. Pasada la
+    fracción `warmup` de la sesión, la memoria no debe superar en más de
+    `tolerance_kib` el máximo alcanzado durante el calentamiento.
+
+    Juega el bot al azar o, con `autopilot`, el piloto de autopilot.py, que
+    sobrevive mucho más y lleva la dificultad a valores altos.
+    """
+    dt = 1.0 / config['tickRate']
+    total_ticks = int(hours * 3600 / dt)
+    sample_ticks = max(1, int(sample_every / dt))
+    warmup_ticks = int(total_ticks * warmup)
+    rng = random.Random(seed)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    session = _RenderedSession(config, seed) if render else _HeadlessSession(config, seed)
+    pilot = Autopilot(session.sim) if autopilot else None
+
+    baseline = 0
+    peak_after = 0
+    samples = []
+    inputs = 0
+    for tick in range(1, total_ticks + 1):
+        if pilot is not None:
+            inputs = pilot.inputs()
+        elif tick % 15 == 0:
+            inputs = bot_inputs(rng)
+        session.step(dt, inputs)
+
+        if tick % sample_ticks == 0 or tick == total_ticks:
+            current, _ = tracemalloc.get_traced_memory()
+            counts = session.entity_counts()
+            samples.append((tick * dt, current, counts))
+            if tick <= warmup_ticks or not samples[:-1]:
+                baseline = max(baseline, current)
+            else:
+                peak_after = max(peak_after, current)
+            if verbose:
+                print(f"{tick * dt / 60:7.1f} min  {current / 1024:9.1f} KiB  "
+                      f"{format_counts(counts)}")
+
+    tracemalloc.stop()
+    growth_kib = (peak_after - baseline) / 1024 if peak_after else 0.0
+    return {
+        'hours': hours,
+        'games': session.games,
+        'elapsed': time.perf_counter() - start,
+        'baseline_kib': baseline / 1024,
+        'peak_kib': peak_after / 1024,
+        'growth_kib': growth_kib,
+        'passed': growth_kib <= tolerance_kib,
+        'samples': samples,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Prueba de resistencia de memoria")
+    parser.add_argument('--hours', type=float, default=1.0,
+                        help="horas de juego a simular")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--render', action='store_true',
+                        help="usar GameScene y dibujar cada paso (SDL dummy)")
+    parser.add_argument('--sample-every', type=float, default=60.0,
+                        help="segundos simulados entre mediciones")
+    parser.add_argument('--tolerance', type=float, default=256.0,
+                        help="crecimiento máximo admitido tras el calentamiento, en KiB")
+    parser.add_argument('--autopilot', action='store_true',
+                        help="jugar con el piloto automático en lugar del bot al azar")
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args(argv)
+
+    result = soak(load_config(), args.hours, seed=args.seed, render=args.render,
+                  sample_every=args.sample_every, tolerance_kib=args.tolerance,
+                  verbose=not args.quiet, autopilot=args.autopilot)
+    print(f"{args.hours:g} h simuladas ({result['games']} partidas) en "
+          f"{result['elapsed']:.1f} s. Memoria tras el calentamiento: "
+          f"{result['baseline_kib']:.1f} -> {result['peak_kib']:.1f} KiB "
+          f"(+{result['growth_kib']:.1f}, tolerancia {args.tolerance:g})")
+    if not result['passed']:
+        print("FALLO: la memoria sigue creciendo")
+        return 1
+    print("OK: memoria acotada")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,34 @@
+"""
+Configuración común de las pruebas automáticas
+==============================================
+Sin ventana ni audio (driver "dummy" de SDL) y con la raíz del proyecto en
+`sys.path`, para importar los módulos como lo hace el juego.
+
+Uso:
+    python -m pytest
+"""
+
+import os
+import sys
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import pytest
+
+from simulation import load_config
+
+
+@pytest.fixture
+def config():
+    """config.json con las opciones que escriben en disco apagadas."""
+    config = load_config()
+    config['soundEnabled'] = False
+    config['recordReplays'] = False
+    config['seed'] = None
+    return config
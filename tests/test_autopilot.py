@@ -0,0 +1,38 @@
+"""Pruebas del piloto automático (autopilot.py)."""
+
+import pytest
+
+from autopilot import Autopilot
+from simulation import Simulation
+
+
+@pytest.mark.parametrize('speed', [200, 150])
+def test_autopilot_predicts_the_simulated_step(config, speed):
+    # 150 px/s a 60 pasos/s: 2.5 px por paso, 3 hacia la derecha y abajo
+    config['birdSpeed'] = speed
+    sim = Simulation(config, seed=3)
+    pilot = Autopilot(sim)
+    bird = sim.bird
+    start = (bird.x, bird.y)
+    dt = 1.0 / config['tickRate']
+    for _ in range(3000):
+        inputs = pilot.inputs()
+        sim.step(dt, inputs)
+        if sim.game_over:
+            break
+        # Tras un choque o al llegar a la META el pájaro vuelve a la salida
+        reset = (bird.x, bird.y) == start == (bird.prev_x, bird.prev_y)
+        if not reset:
+            assert (bird.x, bird.y) == pilot._expected
+
+
+def test_autopilot_cells_follow_movement_rule(config):
+    config['birdSpeed'] = 150
+    pilot = Autopilot(Simulation(config, seed=1))
+    assert (pilot.step_left, pilot.step_right) == (2, 3)
+    assert (pilot.step_up, pilot.step_down) == (2, 3)
+    xs, ys, col0, row0 = pilot._grid()
+    hold = pilot.hold_ticks
+    assert xs[col0 + 1] - xs[col0] == 3 * hold
+    assert xs[col0] - xs[col0 - 1] == 2 * hold
+    assert ys[row0] - ys[row0 + 1] == 2 * hold
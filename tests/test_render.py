@@ -0,0 +1,56 @@
+"""Pruebas del dibujo sin ventana (render.py)."""
+
+import numpy as np
+import pygame
+import pytest
+
+from main import input_to_keys
+from render import OffscreenRenderer, make_offscreen_scene
+from simulation import INPUT_UP
+
+
+@pytest.fixture
+def scene(config):
+    scene = make_offscreen_scene(config, seed=4)
+    yield scene
+    pygame.quit()
+
+
+def play(scene, ticks=3):
+    dt = 1.0 / scene.config['tickRate']
+    for _ in range(ticks):
+        scene.update(dt, input_to_keys(INPUT_UP))
+
+
+def test_native_render_can_be_called_repeatedly(scene):
+    renderer = OffscreenRenderer(scene)
+    assert renderer.shape == (scene.screen.get_height(), scene.screen.get_width(), 3)
+    frames = []
+    for _ in range(5):
+        play(scene)
+        # El llamador conserva el frame anterior: la escena no debe quedar
+        # bloqueada para el dibujo siguiente
+        frame = renderer.render()
+        assert frame.shape == renderer.shape
+        assert np.array_equal(frame, pygame.surfarray.array3d(scene.screen).transpose(1, 0, 2))
+        frames.append(frame.copy())
+    assert not scene.screen.get_locked()
+    assert any(not np.array_equal(frames[0], f) for f in frames[1:])
+
+
+def test_native_render_into_out(scene):
+    renderer = OffscreenRenderer(scene)
+    out = np.zeros(renderer.shape, dtype=np.uint8)
+    for _ in range(3):
+        play(scene)
+        assert renderer.render(out=out) is out
+        assert np.array_equal(out, renderer.frame)
+
+
+def test_scaled_render_updates_same_view(scene):
+    renderer = OffscreenRenderer(scene, size=(160, 120))
+    frame = renderer.render()
+    assert frame.shape == (120, 160, 3)
+    play(scene)
+    assert renderer.render() is frame
+    assert not scene.screen.get_locked()
@@ -0,0 +1,105 @@
+"""Pruebas de grabación y reproducción de partidas (replay.py)."""
+
+import random
+
+import numpy as np
+import pytest
+
+from replay import (
+    HEADER, Replay, ReplayPlayer, ReplayRecorder, pack_state, unpack_state,
+)
+from simulation import Simulation, INPUT_UP, INPUT_DOWN, INPUT_LEFT, INPUT_RIGHT
+
+TICKS = 1500
+INTERVAL = 200
+
+
+def record_game(config, seed=11, ticks=TICKS):
+    """Graba `ticks` pasos con entradas al azar; retorna el replay y la simulación."""
+    sim = Simulation(config, seed=seed)
+    recorder = ReplayRecorder(sim, keyframe_interval=INTERVAL)
+    dt = 1.0 / config['tickRate']
+    rng = random.Random(seed)
+    inputs = 0
+    for tick in range(ticks):
+        if tick % 20 == 0:
+            inputs = rng.choice([0, INPUT_UP, INPUT_UP | INPUT_RIGHT, INPUT_LEFT, INPUT_DOWN])
+        recorder.record(sim, inputs)
+        sim.step(dt, inputs)
+    return recorder.finish(sim), sim
+
+
+@pytest.fixture
+def recorded(config):
+    # Muchas vidas: la partida dura todos los pasos
+    config['lives'] = 1000
+    return record_game(config)
+
+
+def test_round_trip_preserves_everything(recorded):
+    replay, _ = recorded
+    loaded = Replay.from_bytes(replay.to_bytes())
+    assert loaded.seed == replay.seed
+    assert loaded.config == replay.config
+    assert np.array_equal(loaded.inputs, replay.inputs)
+    assert loaded.keyframes == replay.keyframes
+    assert loaded.keyframe_ticks == list(range(INTERVAL, TICKS, INTERVAL))
+    assert (loaded.final_score, loaded.final_lives) == (replay.final_score,
+                                                        replay.final_lives)
+
+
+def test_state_round_trip(recorded):
+    _, sim = recorded
+    blob = pack_state(sim.get_state())
+    assert pack_state(unpack_state(blob)) == blob
+
+
+def test_run_reproduces_the_game_and_every_keyframe(recorded):
+    replay, original = recorded
+    player = ReplayPlayer(Replay.from_bytes(replay.to_bytes()))
+    sim = player.run()
+    assert player.mismatched_keyframes == []
+    assert player.stepped == TICKS
+    assert pack_state(sim.get_state()) == pack_state(original.get_state())
+
+
+def test_run_detects_a_desync(recorded):
+    replay, _ = recorded
+    inputs = replay.inputs.copy()
+    inputs[300:360] ^= INPUT_LEFT | INPUT_RIGHT
+    tampered = Replay(replay.seed, replay.config, inputs, replay.keyframes,
+                      replay.keyframe_interval, replay.final_score, replay.final_lives)
+    player = ReplayPlayer(tampered)
+    player.run()
+    assert player.mismatched_keyframes
+    assert player.mismatched_keyframes[0] >= 400
+
+
+@pytest.mark.parametrize('ticks', [[0, 950, 130, 1500, 1, 1200, 1199, 600]])
+def test_seek_matches_playing_from_the_start(recorded, ticks):
+    replay, _ = recorded
+    player = ReplayPlayer(replay)
+    for tick in ticks:
+        seeked = pack_state(player.seek(tick).get_state())
+        fresh = ReplayPlayer(replay)
+        fresh.sim.reset(replay.seed)
+        for inputs in replay.inputs[:tick].tolist():
+            fresh.sim.step(fresh.dt, inputs)
+        assert seeked == pack_state(fresh.sim.get_state()), tick
+        assert player.tick == tick
+
+
+def test_seek_only_steps_from_the_nearest_keyframe(recorded):
+    replay, _ = recorded
+    player = ReplayPlayer(replay)
+    player.seek(1250)
+    assert player.stepped == 1250 - 1200
+
+
+def test_other_format_versions_are_rejected(recorded):
+    replay, _ = recorded
+    data = bytearray(replay.to_bytes())
+    magic, version, *rest = HEADER.unpack_from(data, 0)
+    HEADER.pack_into(data, 0, magic, version + 1, *rest)
+    with pytest.raises(ValueError):
+        Replay.from_bytes(bytes(data))
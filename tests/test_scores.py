@@ -0,0 +1,91 @@
+"""Pruebas de récords y tabla de partidas (scores.py)."""
+
+import json
+import os
+import stat
+
+import pytest
+
+import scores
+from scores import Leaderboard, RunRecord, ScoreWriter, load_highscore
+
+
+def run(score):
+    return RunRecord(score, 12.5, 7, 'abc', 1000.0 + score)
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / 'highscore.json'), str(tmp_path / 'leaderboard.sqlite3')
+
+
+def stored_scores(path):
+    board = Leaderboard(path)
+    try:
+        return [r.score for r in board.top(100)]
+    finally:
+        board.close()
+
+
+@pytest.mark.parametrize('threaded', [True, False])
+def test_flush_writes_highscore_and_runs(paths, threaded):
+    highscore_path, db_path = paths
+    writer = ScoreWriter(highscore_path, db_path, threaded=threaded)
+    writer.save_highscore(50)
+    writer.record_run(run(50))
+    writer.save_highscore(80)
+    writer.record_run(run(80))
+    writer.flush()
+    assert load_highscore(highscore_path) == 80
+    assert stored_scores(db_path) == [80, 50]
+    writer.close()
+    assert writer.errors == 0
+
+
+def test_close_writes_pending_jobs_and_stops_thread(paths):
+    highscore_path, db_path = paths
+    writer = ScoreWriter(highscore_path, db_path, threaded=True)
+    thread = writer._thread
+    for score in range(20):
+        writer.record_run(run(score))
+    writer.save_highscore(19)
+    writer.close()
+    assert not thread.is_alive()
+    assert writer.leaderboard is None
+    assert load_highscore(highscore_path) == 19
+    assert len(stored_scores(db_path)) == 20
+
+
+@pytest.mark.parametrize('threaded', [True, False])
+def test_failed_highscore_does_not_drop_runs(paths, monkeypatch, threaded):
+    highscore_path, db_path = paths
+
+    def broken(score, path):
+        raise TypeError("no serializable")
+    monkeypatch.setattr(scores, 'save_highscore', broken)
+
+    writer = ScoreWriter(highscore_path, db_path, threaded=threaded)
+    writer.save_highscore(10)
+    writer.record_run(run(10))
+    writer.flush()
+    writer.close()
+    assert writer.errors == 1
+    assert stored_scores(db_path) == [10]
+
+
+def test_write_json_atomic_syncs_file_and_directory(tmp_path, monkeypatch):
+    path = tmp_path / 'highscore.json'
+    path.write_text('{"highscore": 1}')
+    synced = []
+    real_fsync = os.fsync
+
+    def fsync(fd):
+        synced.append(stat.S_ISDIR(os.fstat(fd).st_mode))
+        real_fsync(fd)
+    monkeypatch.setattr(os, 'fsync', fsync)
+
+    scores.write_json_atomic(str(path), {'highscore': 2})
+    assert json.loads(path.read_text()) == {'highscore': 2}
+    assert os.listdir(tmp_path) == ['highscore.json']
+    expected = [False, True] if hasattr(os, 'O_DIRECTORY') else [False]
+    assert synced == expected
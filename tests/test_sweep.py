@@ -0,0 +1,29 @@
+"""Pruebas del barrido de dificultad (sweep.py)."""
+
+import numpy as np
+
+import sweep
+from simulation import Simulation
+
+
+def test_shard_names_change_with_code_version(monkeypatch):
+    configs = [{'spawnRate': 1.0}]
+    names = [task['name'] for task in sweep.make_tasks(configs, 4, 2, 'up', 5)]
+    assert all(sweep.code_version() in name for name in names)
+
+    monkeypatch.setattr(sweep, 'SHARD_FORMAT', sweep.SHARD_FORMAT + 1)
+    changed = [task['name'] for task in sweep.make_tasks(configs, 4, 2, 'up', 5)]
+    assert not set(names) & set(changed)
+
+
+def test_on_screen_count_skips_planes_off_screen(config):
+    sim = Simulation(config, seed=2)
+    for _ in range(1200):
+        sim.step(1.0 / config['tickRate'])
+        if sim.game_over:
+            sim.reset()
+        store = sim.planes
+        lanes, slots = store.live()
+        left = store.left[lanes, slots]
+        visible = (left < sim.width) & (left + store.width[lanes, slots] > 0)
+        assert store.on_screen_count() == int(np.count_nonzero(visible))
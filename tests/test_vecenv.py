@@ -0,0 +1,62 @@
+"""Pruebas de las partidas en paralelo (vecenv.py) contra `Simulation`."""
+
+import numpy as np
+import pytest
+
+from simulation import Simulation
+from vecenv import VecEnv, random_actions
+
+
+def env_planes(env, index):
+    """Estado de los aviones de la partida `index`, con carriles locales."""
+    state = env.planes.get_state()
+    first = index * env.num_lanes
+    mine = (state['lane'] >= first) & (state['lane'] < first + env.num_lanes)
+    state = {name: values[mine] for name, values in state.items()}
+    state['lane'] = state['lane'] - first
+    return state
+
+
+def assert_same_planes(env, index, sim):
+    expected = sim.planes.get_state()
+    actual = env_planes(env, index)
+    assert expected.keys() == actual.keys()
+    for name in expected:
+        assert np.array_equal(expected[name], actual[name]), name
+
+
+@pytest.mark.parametrize('warmup', [0, 3])
+def test_vecenv_matches_simulation(config, warmup):
+    config['lives'] = 2
+    config['warmupSeconds'] = warmup
+    # Dificultad que sube rápido para cubrir también tasas y velocidades
+    config['difficultyStepEveryXSeconds'] = 4
+    num_envs = 4
+    env = VecEnv(num_envs, config, seed=21)
+    sims = [Simulation(config, seed=seed) for seed in env.env_seeds]
+    dt = 1.0 / config['tickRate']
+    rng = np.random.default_rng(5)
+
+    for index, sim in enumerate(sims):
+        assert_same_planes(env, index, sim)
+
+    finished = 0
+    for tick in range(2400):
+        actions = random_actions(rng, num_envs)
+        _, rewards, dones, info = env.step(actions)
+        for index, sim in enumerate(sims):
+            score = sim.score
+            sim.step(dt, int(actions[index]))
+            assert rewards[index] == sim.score - score
+            assert dones[index] == sim.game_over, tick
+            if sim.game_over:
+                assert info['final_score'][index] == sim.score
+                finished += 1
+                sim.reset()
+            assert env.seeds[index] == sim.seed
+            assert env.score[index] == sim.score
+            assert env.lives[index] == sim.lives
+            assert (env.bird_x[index], env.bird_y[index]) == (sim.bird.x, sim.bird.y)
+            assert_same_planes(env, index, sim)
+    # Las partidas terminan y se reinician durante la prueba
+    assert finished > 0
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+vecenv.py
+=========
+N partidas de Birds & Planes avanzando a la vez, para entrenar y evaluar
+bots. Acciones, recompensas, fin de partida y observaciones son arreglos
+NumPy; las partidas terminadas se reinician solas.
+
+Las reglas son las de `Simulation`, pero el estado de todas las partidas
+vive en arreglos: los aviones en un único `PlaneStore` cuyas filas son los
+carriles de todas las partidas, y el resto en arreglos de largo N. Pájaro,
+colisiones, puntos y dificultad se calculan en bloque; la aparición de
+aviones usa el mismo código que `Simulation` (`pop_due_spawns`, con un
+`random.Random` y un montículo por partida) y cada partida nueva se arma
+con `Simulation.reset` (incluido `warmupSeconds`). Así la partida `i` es la
+misma que `Simulation(config, seed=env.env_seeds[i])` con las mismas
+entradas; tests/test_vecenv.py lo comprueba.
+
+Uso:
+    env = VecEnv(1000, seed=1)
+    obs = env.reset()
+    obs, rewards, dones, info = env.step(actions)   # actions: bits INPUT_*
+
+    python vecenv.py --envs 1000 --steps 2000       # mide pasos/s
+"""
+
+import argparse
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from simulation import (
+    Simulation, PlaneStore, load_config, pop_due_spawns,
+    INPUT_UP, INPUT_DOWN, INPUT_LEFT, INPUT_RIGHT, PLANE_MAX_HEIGHT,
+)
+
+# Valor de los intervalos de avión que faltan en la observación (fuera del
+# rango [-1, 1] de los intervalos reales)
+EMPTY_INTERVAL = 2.0
+
+
+class VecEnv:
+    """
+    `num_envs` partidas en paralelo, avanzadas un paso de `1 / tickRate`
+    segundos por llamada a `step`.
+
+    Observación (float32, una fila por partida):
+        bird_x, bird_y      centro del pájaro / tamaño de pantalla (0..1)
+        por carril, `planes_per_lane` aviones (los más cercanos al pájaro
+        en x, del más cercano al más lejano), cada uno como
+        (left, right, velocity) relativos al centro del pájaro y divididos
+        por el ancho de pantalla; los que faltan valen
+        (EMPTY_INTERVAL, EMPTY_INTERVAL, 0)
+
+    La recompensa de cada paso son los puntos ganados en él.
+
+    Semillas: `seed` (o `seed` de config.json, o una al azar) genera una
+    semilla por partida, `env_seeds`; desde ahí cada partida sigue la misma
+    secuencia de semillas que una `Simulation` creada con ella, también en
+    los reinicios.
+    """
+
+    def __init__(self, num_envs: int, config: Optional[Dict] = None,
+                 seed: Optional[int] = None, planes_per_lane: int = 3):
+        self.num_envs = num_envs
+        self.config = dict(config if config is not None else load_config())
+        self.dt = 1.0 / self.config['tickRate']
+        self.planes_per_lane = planes_per_lane
+
+        if seed is None:
+            seed = self.config.get('seed')
+        if seed is None:
+            seed = random.getrandbits(32)
+        source = random.Random(seed)
+        self.env_seeds = [source.getrandbits(32) for _ in range(num_envs)]
+        self._seed_sources = [random.Random(s) for s in self.env_seeds]
+        self._next_seeds = list(self.env_seeds)
+        self.seeds = list(self.env_seeds)
+
+        # Geometría común a todas las partidas; también arma cada partida
+        # nueva en `_reset_envs`
+        layout = Simulation(self.config, seed=0)
+        self._layout = layout
+        self.width = layout.width
+        self.height = layout.height
+        self.geometry = layout.lane_geometry
+        self.num_lanes = len(layout.lanes)
+        self.finish_line = layout.finish_zone_y + layout.finish_zone_height
+        self.safe_zone_height = layout.safe_zone_height
+        bird = layout.bird
+        self.bird_width, self.bird_height = bird.width, bird.height
+        start_x, start_y = layout.bird_start
+        self.bird_start = (start_x - bird.width // 2, start_y - bird.height // 2)
+        self.play_area_top = layout.play_area_top
+        self.lane_spacing = layout.lane_spacing
+        self._lane_top = np.array(self.geometry.top, dtype=np.int64)
+        self._lane_bottom = np.array(self.geometry.bottom, dtype=np.int64)
+
+        # Fila `env * num_lanes + lane` del almacén = carril `lane` de `env`
+        self.planes = PlaneStore(layout.lanes * num_envs, self.width)
+        self._row_env = np.repeat(np.arange(num_envs), self.num_lanes)
+
+        # Apariciones de cada partida, como en `Simulation`: su azar, su
+        # montículo de (instante, carril) y su reloj; `next_spawn` es la
+        # cima de cada montículo para saber sin recorrerlos cuáles vencen
+        self.rngs: List[random.Random] = [None] * num_envs
+        self.spawn_queues: List[List[Tuple[float, int]]] = [[] for _ in range(num_envs)]
+        self.spawn_clock = np.zeros(num_envs, dtype=np.float64)
+        self.next_spawn = np.zeros(num_envs, dtype=np.float64)
+
+        n = num_envs
+        self.bird_x = np.zeros(n, dtype=np.int64)
+        self.bird_y = np.zeros(n, dtype=np.int64)
+        self.crossed = np.zeros((n, self.num_lanes), dtype=bool)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.lives = np.zeros(n, dtype=np.int64)
+        self.game_time = np.zeros(n, dtype=np.float64)
+        self.difficulty = np.ones(n, dtype=np.float64)
+        self.episode_steps = np.zeros(n, dtype=np.int64)
+
+        self.observation_size = 2 + self.num_lanes * planes_per_lane * 3
+        self._obs = np.zeros((n, self.observation_size), dtype=np.float32)
+        self.reset()
+
+    # ------------------------------------------------------------------
+    # Reinicio
+    # ------------------------------------------------------------------
+
+    def reset(self) -> np.ndarray:
+        """Reinicia todas las partidas; retorna la observación inicial."""
+        self._reset_envs(np.arange(self.num_envs))
+        return self._observe()
+
+    def _reset_envs(self, envs: np.ndarray):
+        """
+        Reinicia las partidas `envs` (índices sin repetir) con su siguiente
+        semilla: `Simulation.reset` arma la partida (primeras apariciones y
+        calentamiento) y se copian su azar, su montículo y sus aviones.
+        """
+        if envs.size == 0:
+            return
+        sim = self._layout
+        lanes = np.arange(self.num_lanes)
+        for env in envs.tolist():
+            seed = self._next_seeds[env]
+            self._next_seeds[env] = self._seed_sources[env].getrandbits(32)
+            self.seeds[env] = seed
+            # reset crea un rng y un montículo nuevos: se pueden tomar sin copiar
+            sim.reset(seed)
+            self.rngs[env] = sim.rng
+            self.spawn_queues[env] = sim.spawn_queue
+            self.spawn_clock[env] = sim.spawn_clock
+            self.next_spawn[env] = sim.spawn_queue[0][0]
+            self.planes.load_lanes(env * self.num_lanes + lanes, sim.planes.get_state())
+        self.score[envs] = 0
+        self.lives[envs] = self.config['lives']
+        self.game_time[envs] = 0.0
+        self.difficulty[envs] = 1.0
+        self.episode_steps[envs] = 0
+        self._reset_birds(envs)
+
+    def _reset_birds(self, envs: np.ndarray):
+        self.bird_x[envs], self.bird_y[envs] = self.bird_start
+        self.crossed[envs] = False
+
+    # ------------------------------------------------------------------
+    # Paso
+    # ------------------------------------------------------------------
+
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray,
+                                                 np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Avanza todas las partidas un paso con los bits de entrada `actions`
+        (uno por partida). Retorna (observaciones, recompensas, terminadas,
+        info). Las terminadas ya vienen reiniciadas: su observación es la
+        de la partida nueva e `info['final_score']` / `info['episode_steps']`
+        tienen el resultado de la que terminó (-1 en las demás).
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        previous_score = self.score.copy()
+
+        self._update_difficulty()
+        self._update_birds(actions)
+        self._update_lanes()
+
+        # Colisiones: se pierde una vida; con vidas, el pájaro vuelve a la salida
+        hit = self._check_collisions()
+        self.lives -= hit
+        dones = hit & (self.lives <= 0)
+        self._reset_birds(np.flatnonzero(hit & ~dones))
+
+        self._check_lane_cross()
+        self.episode_steps += 1
+
+        rewards = (self.score - previous_score).astype(np.float32)
+        final_score = np.where(dones, self.score, -1)
+        episode_steps = np.where(dones, self.episode_steps, -1)
+        self._reset_envs(np.flatnonzero(dones))
+        info = {'final_score': final_score, 'episode_steps': episode_steps}
+        return self._observe(), rewards, dones, info
+
+    def _update_difficulty(self):
+        self.game_time += self.dt
+        steps = (self.game_time / self.config['difficultyStepEveryXSeconds']).astype(np.int64)
+        self.difficulty = self.config['difficultySpeedMultiplier'] ** steps
+
+    def _update_birds(self, actions: np.ndarray):
+        """Como `SimBird.update`: derecha gana a izquierda y abajo a arriba."""
+        move = self.config['birdSpeed'] * self.dt
+        dx = np.where(actions & INPUT_RIGHT, move,
+                      np.where(actions & INPUT_LEFT, -move, 0.0))
+        dy = np.where(actions & INPUT_DOWN, move,
+                      np.where(actions & INPUT_UP, -move, 0.0))
+        # Mitades lejos del cero, como rect_round (np.round las lleva al par)
+        x = self.bird_x + dx
+        y = self.bird_y + dy
+        x = np.copysign(np.floor(np.abs(x) + 0.5), x).astype(np.int64)
+        y = np.copysign(np.floor(np.abs(y) + 0.5), y).astype(np.int64)
+        np.clip(x, 0, self.width - self.bird_width, out=x)
+        np.clip(y, 0, self.height - self.bird_height, out=y)
+        np.minimum(y, self.height - self.safe_zone_height, out=y)
+        self.bird_x, self.bird_y = x, y
+
+    def _update_lanes(self):
+        """
+        Como `Simulation._update_lanes`: mueve y retira en bloque y saca las
+        apariciones vencidas del montículo de cada partida con
+        `pop_due_spawns`, en el mismo orden y con los mismos sorteos.
+        """
+        store = self.planes
+        store.advance(self.dt)
+        store.retire()
+
+        self.spawn_clock += self.dt
+        due = np.flatnonzero(self.next_spawn <= self.spawn_clock)
+        if due.size == 0:
+            return
+
+        blocked = store.blocked_lanes(self.config['minSpawnDistancePx'])
+        base_rate = self.config['spawnRate']
+        base_min, base_max = self.config['planeSpeedRange']
+        num_lanes = self.num_lanes
+        rows, speeds, type_ids = [], [], []
+        for env in due.tolist():
+            # Mismas expresiones que Simulation._set_difficulty
+            multiplier = float(self.difficulty[env])
+            first = env * num_lanes
+            queue = self.spawn_queues[env]
+            lanes, env_speeds, env_types = pop_due_spawns(
+                self.rngs[env], queue, float(self.spawn_clock[env]),
+                base_rate * multiplier, (base_min * multiplier, base_max * multiplier),
+                blocked[first:first + num_lanes])
+            self.next_spawn[env] = queue[0][0]
+            rows.extend(first + lane for lane in lanes)
+            speeds.extend(env_speeds)
+            type_ids.extend(env_types)
+
+        if rows:
+            store.spawn(np.array(rows), np.array(speeds),
+                        np.array(type_ids, dtype=np.int8))
+
+    def _check_collisions(self) -> np.ndarray:
+        """
+        Como `Simulation._check_collisions`, para todas las partidas a la
+        vez. Fase amplia: de cada partida sólo se miran los carriles que
+        devolvería `Simulation.lanes_near`.
+        """
+        store = self.planes
+        if store.count == 0:
+            return np.zeros(self.num_envs, dtype=bool)
+        bx = self.bird_x + 5
+        by = self.bird_y + 5
+        bw, bh = self.bird_width - 10, self.bird_height - 10
+
+        margin = PLANE_MAX_HEIGHT // 2 + 2
+        first = np.floor((by - margin - self.play_area_top) / self.lane_spacing - 0.5)
+        last = np.ceil((by + bh + margin - self.play_area_top) / self.lane_spacing - 0.5)
+        first = np.maximum(first, 0).astype(np.int64)
+        last = np.minimum(last, self.num_lanes - 1).astype(np.int64)
+        span = int((last - first).max()) + 1
+        if span <= 0:
+            return np.zeros(self.num_envs, dtype=bool)
+        lanes = first[:, None] + np.arange(span)
+        valid = lanes <= last[:, None]
+        rows = np.arange(self.num_envs)[:, None] * self.num_lanes + np.minimum(lanes, self.num_lanes - 1)
+
+        bx, by = bx[:, None, None], by[:, None, None]
+        left = store.left[rows] + 2
+        top = store.top[rows] + 2
+        hit = (store.alive[rows] & valid[..., None] &
+               (left < bx + bw) & (bx < left + store.width[rows] - 5) &
+               (top < by + bh) & (by < top + store.height[rows] - 5))
+        return hit.any(axis=(1, 2))
+
+    def _check_lane_cross(self):
+        """Como `Simulation._check_lane_cross`: meta primero, después carriles."""
+        points = self.config['pointsPerCross']
+        x, y = self.bird_x, self.bird_y
+
+        finished = y <= self.finish_line
+        self.score[finished] += points * 2
+        self._reset_birds(np.flatnonzero(finished))
+
+        # Primer carril cuyo borde inferior queda debajo del borde superior
+        lane = np.searchsorted(self._lane_bottom, y, side='right')
+        inside = ((lane < self.num_lanes) & ~finished & (self.geometry.height > 0) &
+                  (x + self.bird_width > 0) & (x < self.width))
+        envs = np.flatnonzero(inside)
+        lane = lane[envs]
+        inside = self._lane_top[lane] < y[envs] + self.bird_height
+        envs, lane = envs[inside], lane[inside]
+        new = ~self.crossed[envs, lane]
+        envs, lane = envs[new], lane[new]
+        self.crossed[envs, lane] = True
+        self.score[envs] += points
+
+    # ------------------------------------------------------------------
+    # Observación
+    # ------------------------------------------------------------------
+
+    def _observe(self) -> np.ndarray:
+        store = self.planes
+        obs = self._obs
+        k = self.planes_per_lane
+        center_x = self.bird_x + self.bird_width // 2
+        obs[:, 0] = center_x / self.width
+        obs[:, 1] = (self.bird_y + self.bird_height // 2) / self.height
+
+        # Distancia horizontal de cada avión al centro del pájaro de su
+        # partida; las ranuras libres quedan más lejos que cualquier avión
+        cx = center_x[self._row_env, None]
+        left = store.left - cx
+        right = left + store.width
+        distance = np.where(store.alive, np.maximum(np.maximum(left, -right), 0),
+                            np.iinfo(np.int64).max)
+        rows, capacity = distance.shape
+        if k < capacity:
+            nearest = np.argpartition(distance, k - 1, axis=1)[:, :k]
+        else:
+            nearest = np.broadcast_to(np.arange(capacity), (rows, capacity))
+        flat = nearest + (np.arange(rows) * capacity)[:, None]
+        order = np.argsort(distance.ravel()[flat], axis=1)
+        flat = np.take_along_axis(flat, order, axis=1)
+
+        present = store.alive.ravel()[flat]
+        planes = np.empty(flat.shape + (3,), dtype=np.float32)
+        planes[..., 0] = left.ravel()[flat]
+        planes[..., 1] = right.ravel()[flat]
+        planes[..., 2] = store.velocity.ravel()[flat]
+        planes /= self.width
+        planes[~present] = (EMPTY_INTERVAL, EMPTY_INTERVAL, 0.0)
+
+        lanes = obs[:, 2:].reshape(self.num_envs, self.num_lanes, k, 3)
+        lanes[:, :, :flat.shape[1]] = planes.reshape(self.num_envs, self.num_lanes, -1, 3)
+        lanes[:, :, flat.shape[1]:] = (EMPTY_INTERVAL, EMPTY_INTERVAL, 0.0)
+        return obs.copy()
+
+
+# ============================================================================
+# EJECUCIÓN
+# ============================================================================
+
+def random_actions(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Acciones al azar sesgadas hacia arriba (sube el 60% de las veces)."""
+    vertical = rng.choice([0, INPUT_UP, INPUT_DOWN], size=n, p=[0.3, 0.6, 0.1])
+    horizontal = rng.choice([0, INPUT_LEFT, INPUT_RIGHT], size=n, p=[0.6, 0.2, 0.2])
+    return vertical | horizontal
+
+
+def main(argv=None):
+    """Mide pasos por segundo con acciones al azar."""
+    parser = argparse.ArgumentParser(description="Partidas en paralelo de Birds & Planes")
+    parser.add_argument('--envs', type=int, default=1000)
+    parser.add_argument('--steps', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    env = VecEnv(args.envs, seed=args.seed)
+    rng = np.random.default_rng(args.seed)
+    env.reset()
+    finished = []
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        _, _, dones, info = env.step(random_actions(rng, args.envs))
+        finished.extend(info['final_score'][dones].tolist())
+    elapsed = time.perf_counter() - start
+
+    total = args.envs * args.steps
+    print(f"{total} pasos ({args.envs} partidas x {args.steps}) en {elapsed:.2f} s "
+          f"({total / elapsed:,.0f} pasos/s)")
+    if finished:
+        print(f"{len(finished)} partidas terminadas, puntuación media "
+              f"{np.mean(finished):.0f}")
+
+
+if __name__ == '__main__':
+    main()